@@ -0,0 +1,75 @@
+import hashlib
+import math
+from typing import List
+
+# Bloom filters over strings: no false negatives, a bounded rate of false
+# positives, a few bits per key. Used as an in-process "definitely absent"
+# check in front of database lookups.
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter sized for `capacity` keys at `error_rate`."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def fill_ratio(self) -> float:
+        return int.from_bytes(self.bits, "little").bit_count() / self.num_bits
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows: when the current stage holds its capacity a new
+    stage with twice the capacity and half the error rate is added, so the
+    overall false-positive rate stays below 2 * error_rate however many keys
+    are added.
+    """
+
+    def __init__(self, initial_capacity: int, error_rate: float):
+        self.stages: List[BloomFilter] = [BloomFilter(initial_capacity, error_rate / 2)]
+
+    def add(self, key: str) -> None:
+        stage = self.stages[-1]
+        if stage.count >= stage.capacity:
+            stage = BloomFilter(stage.capacity * 2, stage.error_rate / 2)
+            self.stages.append(stage)
+        stage.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        return any(key in stage for stage in self.stages)
+
+    def __len__(self) -> int:
+        """Keys added (repeats included)."""
+        return sum(stage.count for stage in self.stages)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(stage.bits) for stage in self.stages)
+
+    def estimated_error_rate(self) -> float:
+        """False-positive probability implied by the current bit fill of each stage."""
+        clear = 1.0
+        for stage in self.stages:
+            clear *= 1 - stage.fill_ratio() ** stage.num_hashes
+        return 1 - clear
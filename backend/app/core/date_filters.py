@@ -0,0 +1,31 @@
+from datetime import date, datetime, time, timedelta
+from typing import Tuple, Union
+from sqlalchemy import and_
+
+# Calendar-day filters on TIMESTAMP columns. Comparing the bare column against
+# day boundaries (instead of `func.date(column) == day`) lets DuckDB prune row
+# groups by their min/max zone maps and use indexes that include the column.
+
+Day = Union[date, datetime]
+
+
+def _as_date(day: Day) -> date:
+    return day.date() if isinstance(day, datetime) else day
+
+
+def day_bounds(first_day: Day, last_day: Day = None) -> Tuple[datetime, datetime]:
+    """[start, end) timestamps covering first_day through last_day (inclusive; same day if omitted)."""
+    first = _as_date(first_day)
+    last = _as_date(last_day) if last_day is not None else first
+    return datetime.combine(first, time.min), datetime.combine(last + timedelta(days=1), time.min)
+
+
+def within_days(column, first_day: Day, last_day: Day = None):
+    """`column` falls on a calendar day from first_day through last_day."""
+    start, end = day_bounds(first_day, last_day)
+    return and_(column >= start, column < end)
+
+
+def same_day(column, day: Day):
+    """`column` falls on the calendar day of `day` (time of day ignored)."""
+    return within_days(column, day)
@@ -0,0 +1,104 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+from urllib.parse import urlsplit
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Shared client for external market data (mfapi.in, Yahoo Finance).
+# Handlers are sync, so this is a pooled sync httpx.Client shared across
+# threads: connections are kept alive between requests instead of paying a new
+# TCP + TLS handshake per call.
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0)
+PER_HOST_CONCURRENCY = 6
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 4.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def get_http_client() -> httpx.Client:
+    """The process-wide pooled client, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    timeout=DEFAULT_TIMEOUT,
+                    limits=POOL_LIMITS,
+                    headers={"User-Agent": "Mozilla/5.0"},
+                    follow_redirects=True
+                )
+    return _client
+
+
+def close_http_client() -> None:
+    """Close pooled connections (application shutdown)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _client_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(PER_HOST_CONCURRENCY)
+    return slot
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def http_get(url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+             timeout: Optional[float] = None, retries: int = MAX_RETRIES) -> httpx.Response:
+    """
+    GET through the shared client.
+
+    At most PER_HOST_CONCURRENCY requests run against one host at a time.
+    Transport errors and 429/5xx responses are retried with jittered backoff;
+    the last response is returned (or the last transport error raised) once
+    retries are exhausted.
+    """
+    client = get_http_client()
+    slot = _host_slot(url)
+    request_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+
+    for attempt in range(retries + 1):
+        try:
+            with slot:
+                response = client.get(url, params=params, headers=headers, timeout=request_timeout)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                return response
+            logger.debug(f"[HTTP] {response.status_code} from {url}, retrying")
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            logger.debug(f"[HTTP] {e!r} for {url}, retrying")
+        time.sleep(_backoff(attempt))
+
+
+def fetch_concurrently(func: Callable[[T], R], items: Iterable[T], max_workers: int = PER_HOST_CONCURRENCY) -> List[R]:
+    """Run `func` over `items` on a small thread pool (results in input order)."""
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
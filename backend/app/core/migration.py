@@ -238,6 +238,83 @@ def run_auto_migrations(engine: Engine):
             );
             """))
 
+            # 19. Local NAV History Store
+            connection.execute(text("""
+            CREATE TABLE IF NOT EXISTS mutual_fund_nav_history (
+                scheme_code VARCHAR NOT NULL,
+                nav_date DATE NOT NULL,
+                nav NUMERIC(15, 4) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (scheme_code, nav_date)
+            );
+            """))
+
+            # 20. Scheme Name Mapping Cache (CAS imports)
+            connection.execute(text("""
+            CREATE TABLE IF NOT EXISTS mutual_fund_scheme_aliases (
+                alias VARCHAR PRIMARY KEY,
+                scheme_code VARCHAR NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """))
+
+            # 21. Materialized Portfolio Timeline (benchmark column + composite lookup index)
+            safe_add_column("portfolio_timeline_cache", "benchmark_value", "NUMERIC(15, 2)")
+            connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_timeline_cache_lookup
+                ON portfolio_timeline_cache (tenant_id, portfolio_hash, snapshot_date);
+            """))
+
+            # 22. Daily Net Worth Snapshots
+            connection.execute(text("""
+            CREATE TABLE IF NOT EXISTS net_worth_snapshots (
+                tenant_id VARCHAR NOT NULL,
+                scope VARCHAR NOT NULL,
+                snapshot_date DATE NOT NULL,
+                liquid NUMERIC(15, 2) NOT NULL,
+                credit NUMERIC(15, 2) NOT NULL,
+                loan NUMERIC(15, 2) NOT NULL,
+                investments NUMERIC(15, 2) NOT NULL,
+                total NUMERIC(15, 2) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (tenant_id, scope, snapshot_date)
+            );
+            """))
+
+            # 23. Daily Transaction Rollups (filled from transactions on first start)
+            connection.execute(text("""
+            CREATE TABLE IF NOT EXISTS transaction_rollups (
+                tenant_id VARCHAR NOT NULL,
+                account_id VARCHAR NOT NULL,
+                day DATE NOT NULL,
+                category VARCHAR NOT NULL,
+                is_transfer BOOLEAN NOT NULL,
+                exclude_from_reports BOOLEAN NOT NULL,
+                debit_total NUMERIC(15, 2) NOT NULL,
+                debit_count INTEGER NOT NULL,
+                credit_total NUMERIC(15, 2) NOT NULL,
+                credit_count INTEGER NOT NULL,
+                PRIMARY KEY (tenant_id, account_id, day, category, is_transfer, exclude_from_reports)
+            );
+            """))
+
+            # 24. Same-day duplicate lookups (account, amount, date range)
+            connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_transactions_dedup
+                ON transactions (tenant_id, account_id, amount, date);
+            """))
+            connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_pending_txns_dedup
+                ON pending_transactions (tenant_id, account_id, amount, date);
+            """))
+
+            # 25. 64-bit content fingerprints (backfilled from content_hash at startup)
+            for table in ("transactions", "pending_transactions", "unparsed_messages"):
+                safe_add_column(table, "content_fingerprint", "BIGINT")
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_content_fingerprint ON {table} (content_fingerprint);"
+                ))
+
 
             # Explicitly commit the transaction!
             connection.commit()
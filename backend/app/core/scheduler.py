@@ -4,6 +4,11 @@ from sqlalchemy.orm import Session
 from backend.app.core.database import SessionLocal
 from backend.app.modules.finance import models
 from backend.app.modules.finance.services.recurring_service import RecurringService
+from backend.app.modules.finance.services.nav_history_service import NavHistoryService
+from backend.app.modules.finance.services.nav_quote_cache import NavQuoteCache
+from backend.app.modules.finance.services.scheme_master_service import SchemeMasterService
+from backend.app.modules.finance.services.market_index_service import MarketIndexService
+from backend.app.modules.finance.services.net_worth_service import NetWorthService
 from backend.app.modules.ingestion.email_sync import EmailSyncService
 from backend.app.modules.ingestion import models as ingestion_models
 import logging
@@ -88,6 +93,58 @@ def auto_sync_job():
     finally:
         db.close()
 
+def nav_history_refresh_job():
+    """
+    Job to append newly published NAVs to the local NAV history store.
+    """
+    logger.info("[NAV] Refreshing NAV history...")
+    db: Session = SessionLocal()
+    try:
+        inserted = NavHistoryService.refresh_all(db)
+        NavQuoteCache.reload(db)
+        logger.info(f"[NAV] NAV history refresh completed. New rows: {inserted}")
+    except Exception as e:
+        logger.error(f"[NAV] Error refreshing NAV history: {e}")
+    finally:
+        db.close()
+
+def scheme_master_refresh_job():
+    """
+    Job to refresh the mutual fund scheme master used by fund search.
+    """
+    logger.info("[SchemeMaster] Refreshing scheme master...")
+    db: Session = SessionLocal()
+    try:
+        written = SchemeMasterService.refresh(db)
+        logger.info(f"[SchemeMaster] Scheme master refresh completed. Rows written: {written}")
+    except Exception as e:
+        logger.error(f"[SchemeMaster] Error refreshing scheme master: {e}")
+    finally:
+        db.close()
+
+def market_indices_poll_job():
+    """
+    Job to keep the market index snapshot current (the service decides whether a poll is due).
+    """
+    try:
+        MarketIndexService.poll()
+    except Exception as e:
+        logger.error(f"[Indices] Error polling market indices: {e}")
+
+def net_worth_snapshot_job():
+    """
+    Job to write end-of-day net worth snapshots (backfills new tenants/members).
+    """
+    logger.info("[NetWorth] Writing net worth snapshots...")
+    db: Session = SessionLocal()
+    try:
+        written = NetWorthService.snapshot_all(db)
+        logger.info(f"[NetWorth] Net worth snapshots completed. Rows written: {written}")
+    except Exception as e:
+        logger.error(f"[NetWorth] Error writing net worth snapshots: {e}")
+    finally:
+        db.close()
+
 def start_scheduler():
     # Run daily at 00:01 UTC (or server time)
     trigger = CronTrigger(hour=0, minute=1)
@@ -100,6 +157,20 @@ def start_scheduler():
     # Run email sync every 15 minutes
     scheduler.add_job(auto_sync_job, 'interval', minutes=15, id="auto_sync_job", replace_existing=True)
     
+    # NAVs are published once a day (evening IST); poll a few times a day and once at startup
+    from datetime import datetime
+    scheduler.add_job(nav_history_refresh_job, 'interval', hours=6, next_run_time=datetime.now(), id="nav_history_refresh_job", replace_existing=True)
+    
+    # New launches and renames are rare; refresh the search master daily and once at startup
+    scheduler.add_job(scheme_master_refresh_job, 'interval', hours=24, next_run_time=datetime.now(), id="scheme_master_refresh_job", replace_existing=True)
+    
+    # Ticks every minute; polls Yahoo every minute in market hours and every 30 minutes otherwise
+    scheduler.add_job(market_indices_poll_job, 'interval', minutes=1, next_run_time=datetime.now(), id="market_indices_poll_job", replace_existing=True)
+    
+    # Yesterday's closing net worth once the day is over, plus a startup run to backfill
+    scheduler.add_job(net_worth_snapshot_job, CronTrigger(hour=0, minute=30), id="net_worth_snapshot_job", replace_existing=True)
+    scheduler.add_job(net_worth_snapshot_job, 'date', run_date=datetime.now(), id="net_worth_snapshot_startup", replace_existing=True)
+    
     scheduler.start()
     logger.info("APScheduler started.")
 
@@ -21,6 +21,11 @@ from backend.app.modules.mobile.router import router as mobile_router
 from backend.app.modules.ingestion.email_sync import EmailSyncService
 from backend.app.modules.ingestion import models as ingestion_models
 from backend.app.core.scheduler import start_scheduler, stop_scheduler
+from backend.app.core.http_client import close_http_client
+from backend.app.modules.ingestion.parser_service import close_parser_session
+from backend.app.modules.finance.services.transaction_rollup_service import TransactionRollupService
+from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
+from backend.app.modules.ingestion.dedup_filter import DedupFilter
 
 def create_application() -> FastAPI:
     application = FastAPI(
@@ -58,6 +63,18 @@ def create_application() -> FastAPI:
     # Run Auto-Migrations (DuckDB Schema Evolution)
     run_auto_migrations(engine)
 
+    # Keep transaction rollups and the dedup filter in step with ORM writes; build them once for existing data
+    TransactionRollupService.install(SessionLocal)
+    DedupFilter.install(SessionLocal)
+    db = SessionLocal()
+    try:
+        TransactionRollupService.ensure_built(db)
+        # Dedup probes compare 64-bit fingerprints; fill them for rows that predate the column
+        TransactionDeduplicator.backfill_fingerprints(db)
+        DedupFilter.warm(db)
+    finally:
+        db.close()
+
     # --- Background Tasks ---
     
     @application.on_event("startup")
@@ -83,6 +100,8 @@ def create_application() -> FastAPI:
     @application.on_event("shutdown")
     async def stop_scheduler_event():
         stop_scheduler()
+        close_http_client()
+        close_parser_session()
 
     return application
 
@@ -1,10 +1,11 @@
 import uuid
 from typing import Optional
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Numeric, Boolean
+from sqlalchemy import Column, String, DateTime, Date, ForeignKey, Numeric, Boolean, Integer, BigInteger, Index
 from sqlalchemy import Enum as SqlEnum
 from sqlalchemy.orm import relationship, backref
 from backend.app.core.database import Base
+from backend.app.core.fingerprint import fingerprint_default
 import enum
 
 class AccountType(str, enum.Enum):
@@ -60,6 +61,7 @@ class Transaction(Base):
     category = Column(String, nullable=True) # Keeping simple string for now, could be FK later
     tags = Column(String, nullable=True) # JSON Array string
     content_hash = Column(String, nullable=True, index=True)
+    content_fingerprint = Column(BigInteger, nullable=True, index=True, default=fingerprint_default) # 64-bit probe key for content_hash
     external_id = Column(String, nullable=True) # For de-duplication
     is_transfer = Column(Boolean, default=False, nullable=False)
     linked_transaction_id = Column(String, nullable=True) # ID of the other leg of a transfer
@@ -73,6 +75,11 @@ class Transaction(Base):
     loan_id = Column(String, ForeignKey("loans.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Same-day duplicate checks (TransactionDeduplicator)
+        Index("ix_transactions_dedup", "tenant_id", "account_id", "amount", "date"),
+    )
+
     expense_group = relationship("ExpenseGroup", back_populates="transactions")
 
     linked_transaction = relationship("Transaction", 
@@ -232,6 +239,23 @@ class MutualFundsMeta(Base):
     category = Column(String, nullable=True)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
+class MutualFundNavHistory(Base):
+    """Local copy of the daily NAV series published by mfapi.in, one row per scheme per day"""
+    __tablename__ = "mutual_fund_nav_history"
+
+    scheme_code = Column(String, primary_key=True)
+    nav_date = Column(Date, primary_key=True)
+    nav = Column(Numeric(15, 4), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class MutualFundSchemeAlias(Base):
+    """Scheme names seen in CAS statements (normalised) and the scheme code they resolved to"""
+    __tablename__ = "mutual_fund_scheme_aliases"
+
+    alias = Column(String, primary_key=True)
+    scheme_code = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class SelectionType(enum.Enum):
     MANUAL = "MANUAL"
     AUTO = "AUTO"
@@ -342,18 +366,50 @@ class MutualFundOrder(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class PortfolioTimelineCache(Base):
-    """Cache for portfolio timeline snapshots to avoid recalculating historical data"""
+    """
+    Materialized portfolio timeline snapshots, one row per scope and date.
+    Rows from the earliest changed order date onwards are dropped when orders change.
+    """
     __tablename__ = "portfolio_timeline_cache"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id = Column(String, ForeignKey("tenants.id"), nullable=False, index=True)
-    snapshot_date = Column(DateTime, nullable=False, index=True)  # Date of this snapshot
-    portfolio_hash = Column(String, nullable=False, index=True)  # Hash of scheme_codes to detect changes
+    tenant_id = Column(String, ForeignKey("tenants.id"), nullable=False)
+    snapshot_date = Column(DateTime, nullable=False)  # Date of this snapshot
+    portfolio_hash = Column(String, nullable=False)  # Hash of the scope (whole tenant or one user)
     portfolio_value = Column(Numeric(15, 2), nullable=False)
     invested_value = Column(Numeric(15, 2), nullable=False)
+    benchmark_value = Column(Numeric(15, 2), nullable=True)  # Same cash flows invested in the benchmark
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Composite index for fast lookups
     __table_args__ = (
-        {'sqlite_autoincrement': True}
-    )
\ No newline at end of file
+        Index("ix_timeline_cache_lookup", "tenant_id", "portfolio_hash", "snapshot_date"),
+    )
+class NetWorthSnapshot(Base):
+    """End-of-day net worth per scope ("tenant" for the family, "user:<id>" for one member)"""
+    __tablename__ = "net_worth_snapshots"
+
+    tenant_id = Column(String, primary_key=True)
+    scope = Column(String, primary_key=True)
+    snapshot_date = Column(Date, primary_key=True)
+    liquid = Column(Numeric(15, 2), nullable=False)  # Bank + wallet balances
+    credit = Column(Numeric(15, 2), nullable=False)  # Credit card dues
+    loan = Column(Numeric(15, 2), nullable=False)  # Outstanding loans
+    investments = Column(Numeric(15, 2), nullable=False)  # Mutual fund portfolio value
+    total = Column(Numeric(15, 2), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class TransactionRollup(Base):
+    """Daily transaction totals per account and category, maintained alongside `transactions`"""
+    __tablename__ = "transaction_rollups"
+
+    tenant_id = Column(String, primary_key=True)
+    account_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)  # "" for uncategorized
+    is_transfer = Column(Boolean, primary_key=True)
+    exclude_from_reports = Column(Boolean, primary_key=True)
+    debit_total = Column(Numeric(15, 2), nullable=False, default=0)  # Sum of negative amounts
+    debit_count = Column(Integer, nullable=False, default=0)
+    credit_total = Column(Numeric(15, 2), nullable=False, default=0)  # Sum of positive amounts
+    credit_count = Column(Integer, nullable=False, default=0)
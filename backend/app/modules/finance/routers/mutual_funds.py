@@ -105,8 +105,11 @@ def cleanup_duplicate_orders(
 ):
     """Remove duplicate mutual fund orders that might have been imported multiple times"""
     tenant_id = str(current_user.tenant_id)
-    removed_count = MutualFundService.cleanup_duplicates(db, tenant_id)
-    return {"message": f"Removed {removed_count} duplicate orders and synchronized holdings"}
+    result = MutualFundService.cleanup_duplicates(db, tenant_id)
+    return {
+        "message": f"Removed {result['removed']} duplicate orders and synchronized {len(result['affected_holdings'])} holdings",
+        **result
+    }
 
 @router.post("/recalculate-holdings")
 def trigger_recalculate_holdings(
@@ -204,7 +207,7 @@ def preview_cas_pdf(
         raw_transactions = CASParser.parse_pdf(temp_path, password)
         
         # 2. Map to schemes
-        mapped_transactions = MutualFundService.map_transactions_to_schemes(raw_transactions)
+        mapped_transactions = MutualFundService.map_transactions_to_schemes(db, raw_transactions)
         
         # 3. Check for duplicates
         tenant_id = str(current_user.tenant_id)
@@ -266,7 +269,7 @@ def preview_cas_email(
     raw_transactions = CASParser.scan_cas_emails(config, password)
     
     # 2. Map to schemes
-    mapped_transactions = MutualFundService.map_transactions_to_schemes(raw_transactions)
+    mapped_transactions = MutualFundService.map_transactions_to_schemes(db, raw_transactions)
     
     # 3. Check for duplicates
     tenant_id = str(current_user.tenant_id)
@@ -76,10 +76,18 @@ class AccountService:
             return db_account
         
         # Apply updates
+        reshapes_history = False
         for key, value in update_data.items():
             if key in ['tenant_id', 'owner_id'] and value:
                 value = str(value)
+            if key in ['balance', 'type', 'owner_id'] and getattr(db_account, key) != value:
+                reshapes_history = True
             setattr(db_account, key, value)
+
+        if reshapes_history:
+            # Past closing balances are derived from the current balance, so every snapshot shifts
+            from backend.app.modules.finance.services.net_worth_service import NetWorthService
+            NetWorthService.invalidate(db, tenant_id)
         
         try:
             db.commit()
@@ -100,7 +108,9 @@ class AccountService:
         
         if not db_account:
             return False
-            
+
+        from backend.app.modules.finance.services.net_worth_service import NetWorthService
+        NetWorthService.invalidate(db, tenant_id)
         db.delete(db_account)
         db.commit()
         return True
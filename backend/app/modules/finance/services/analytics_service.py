@@ -1,9 +1,9 @@
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text, or_
+from sqlalchemy import func, text, or_, and_, true
 from backend.app.modules.finance import models
-from backend.app.modules.finance.services.transaction_service import TransactionService
+from backend.app.modules.finance.services.transaction_rollup_service import TransactionRollupService
 
 class AnalyticsService:
     @staticmethod
@@ -74,56 +74,64 @@ class AnalyticsService:
             raw_overall_util = (breakdown["credit_debt"] / breakdown["total_credit_limit"]) * 100
             breakdown["overall_credit_utilization"] = max(0, raw_overall_util)
 
-        # 2. Monthly Spending (or Filtered Spending)
+        # 2. Period aggregates in one pass over transactions (grouped by category for the top category)
         # Default to current month if no dates provided
         if not start_date and not end_date:
             today = datetime.utcnow()
             start_date = datetime(today.year, today.month, 1)
-            
-        monthly_spending_query = db.query(func.sum(models.Transaction.amount)).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.amount < 0,
-            models.Transaction.is_transfer == False,
-            models.Transaction.exclude_from_reports == False
+        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        Txn = models.Transaction
+        spend = and_(Txn.amount < 0, Txn.is_transfer == False, Txn.exclude_from_reports == False)
+        excluded = or_(Txn.exclude_from_reports == True, Txn.is_transfer == True)
+        in_period = and_(
+            Txn.date >= start_date if start_date else true(),
+            Txn.date <= end_date if end_date else true()
         )
+        # Spending and excluded totals honour the account filter; spending also the child account filter
+        in_account = Txn.account_id == account_id if account_id else true()
+        child_visible = models.Account.type.notin_(["INVESTMENT", "CREDIT"]) if user_role == "CHILD" else true()
+        
+        aggregates_query = db.query(
+            Txn.category,
+            func.sum(Txn.amount).filter(spend, in_period, in_account, child_visible),
+            func.sum(Txn.amount).filter(excluded, Txn.amount < 0, in_period, in_account),
+            func.sum(Txn.amount).filter(excluded, Txn.amount > 0, in_period, in_account),
+            func.sum(Txn.amount).filter(spend, in_period),
+            func.sum(Txn.amount).filter(spend, Txn.date >= today_start)
+        ).outerjoin(
+            models.Account, Txn.account_id == models.Account.id
+        ).filter(Txn.tenant_id == tenant_id)
         if start_date:
-            monthly_spending_query = monthly_spending_query.filter(models.Transaction.date >= start_date)
-        if end_date:
-            monthly_spending_query = monthly_spending_query.filter(models.Transaction.date <= end_date)
-        if account_id:
-            monthly_spending_query = monthly_spending_query.filter(models.Transaction.account_id == account_id)
+            # Compared in SQL: start_date may be offset-aware while today_start is naive
+            aggregates_query = aggregates_query.filter(or_(Txn.date >= start_date, Txn.date >= today_start))
         if user_id:
             # Filter by account ownership: show user's accounts OR shared accounts (owner_id is NULL)
-            monthly_spending_query = monthly_spending_query.join(
-                models.Account, models.Transaction.account_id == models.Account.id
-            ).filter(
+            aggregates_query = aggregates_query.filter(
+                models.Account.id != None,
                 or_(models.Account.owner_id == user_id, models.Account.owner_id == None)
             )
-        if user_role == "CHILD":
-            monthly_spending_query = monthly_spending_query.join(models.Account, models.Transaction.account_id == models.Account.id)\
-                                                           .filter(models.Account.type.notin_(["INVESTMENT", "CREDIT"]))
-        
-        monthly_spending = abs(float(monthly_spending_query.scalar() or 0))
         
-        # 2b. Total Excluded for the period
-        def get_excluded_sum(is_income: bool):
-            q = db.query(func.sum(models.Transaction.amount)).filter(
-                models.Transaction.tenant_id == tenant_id,
-                or_(models.Transaction.exclude_from_reports == True, models.Transaction.is_transfer == True)
-            )
-            if is_income: q = q.filter(models.Transaction.amount > 0)
-            else: q = q.filter(models.Transaction.amount < 0)
-            
-            if start_date: q = q.filter(models.Transaction.date >= start_date)
-            if end_date: q = q.filter(models.Transaction.date <= end_date)
-            if account_id: q = q.filter(models.Transaction.account_id == account_id)
-            if user_id:
-                q = q.join(models.Account, models.Transaction.account_id == models.Account.id)\
-                     .filter(or_(models.Account.owner_id == user_id, models.Account.owner_id == None))
-            return abs(float(q.scalar() or 0))
-
-        total_excluded = get_excluded_sum(False) # Expenses
-        excluded_income = get_excluded_sum(True) # Incomes
+        monthly_spending = total_excluded = excluded_income = today_total = 0.0
+        top_spending_category = None
+        for category, spent, excluded_out, excluded_in, category_spent, spent_today in aggregates_query.group_by(Txn.category).all():
+            monthly_spending += float(spent or 0)
+            total_excluded += float(excluded_out or 0)
+            excluded_income += float(excluded_in or 0)
+            today_total += float(spent_today or 0)
+            # Top Spending Category this period (most negative sum)
+            if category_spent is not None and (top_spending_category is None or category_spent < top_spending_category[1]):
+                top_spending_category = (category, category_spent)
+        
+        monthly_spending = abs(monthly_spending)
+        total_excluded = abs(total_excluded) # Expenses
+        excluded_income = abs(excluded_income) # Incomes
+        today_total = abs(today_total)
+        if top_spending_category:
+            top_spending_category = {
+                "name": top_spending_category[0],
+                "amount": abs(float(top_spending_category[1]))
+            }
         
         # 3. Overall Budget Health
         all_budgets = db.query(models.Budget).filter(models.Budget.tenant_id == tenant_id).all()
@@ -138,65 +146,11 @@ class AnalyticsService:
             "percentage": (float(monthly_spending) / total_budget_limit * 100) if total_budget_limit > 0 else 0
         }
         
-        # 4. Recent Transactions (with owner names)
-        recent_txns = TransactionService.get_transactions(db, tenant_id, limit=5, user_role=user_role, user_id=user_id, exclude_from_reports=exclude_hidden, exclude_transfers=exclude_hidden)
-        
-        # Enrich with account owner names
-        enriched_txns = []
-        for txn in recent_txns:
-            txn_dict = {
-                "id": txn.id,
-                "date": txn.date,
-                "description": txn.description,
-                "amount": float(txn.amount),
-                "category": txn.category,
-                "account_id": txn.account_id,
-                "is_transfer": txn.is_transfer,
-                "exclude_from_reports": txn.exclude_from_reports
-            }
-            
-            # Get account owner name
-            account = db.query(models.Account).filter(models.Account.id == txn.account_id).first()
-            if account and account.owner_id:
-                from backend.app.modules.auth.models import User
-                owner = db.query(User).filter(User.id == account.owner_id).first()
-                if owner:
-                    txn_dict["account_owner_name"] = owner.full_name or owner.email.split('@')[0]
-            
-            enriched_txns.append(txn_dict)
-
-        # 5. Top Spending Category this month
-        top_cat_query = db.query(
-            models.Transaction.category,
-            func.sum(models.Transaction.amount).label('total')
-        ).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.amount < 0,
-            models.Transaction.is_transfer == False,
-            models.Transaction.exclude_from_reports == False
+        # 4. Recent Transactions with account owner names (one joined query)
+        enriched_txns = AnalyticsService._recent_transactions(
+            db, tenant_id, user_role=user_role, user_id=user_id, exclude_hidden=exclude_hidden
         )
-        
-        if start_date:
-            top_cat_query = top_cat_query.filter(models.Transaction.date >= start_date)
-        if end_date:
-            top_cat_query = top_cat_query.filter(models.Transaction.date <= end_date)
-        if user_id:
-            # Filter by account ownership
-            top_cat_query = top_cat_query.join(
-                models.Account, models.Transaction.account_id == models.Account.id
-            ).filter(
-                or_(models.Account.owner_id == user_id, models.Account.owner_id == None)
-            )
-            
-        top_cat_query = top_cat_query.group_by(models.Transaction.category).order_by(func.sum(models.Transaction.amount).asc()).first()
-        
-        top_spending_category = None
-        if top_cat_query:
-            top_spending_category = {
-                "name": top_cat_query[0],
-                "amount": abs(float(top_cat_query[1]))
-            }
-        
+
         # 6. Credit Intelligence
         credit_cards = [a for a in accounts if a.type == 'CREDIT_CARD']
         credit_intelligence = []
@@ -240,24 +194,7 @@ class AnalyticsService:
 
             credit_intelligence.append(intel)
 
-        # 7. Calculate today's total spending
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_spending_query = db.query(func.sum(models.Transaction.amount)).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.amount < 0,
-            models.Transaction.is_transfer == False,
-            models.Transaction.exclude_from_reports == False,
-            models.Transaction.date >= today_start
-        )
-        if user_id:
-            today_spending_query = today_spending_query.join(
-                models.Account, models.Transaction.account_id == models.Account.id
-            ).filter(
-                or_(models.Account.owner_id == user_id, models.Account.owner_id == None)
-            )
-        today_total = abs(float(today_spending_query.scalar() or 0))
-        
-        # 8. Get latest transaction (most recent expense)
+        # 7. Get latest transaction (most recent expense)
         latest_txn_query = db.query(models.Transaction).filter(
             models.Transaction.tenant_id == tenant_id,
             models.Transaction.amount < 0,
@@ -296,80 +233,53 @@ class AnalyticsService:
         }
 
     @staticmethod
-    def get_net_worth_timeline(db: Session, tenant_id: str, days: int = 30, user_id: str = None):
-        from .mutual_funds import MutualFundService
+    def _recent_transactions(db: Session, tenant_id: str, limit: int = 5, user_role: str = "ADULT", user_id: str = None, exclude_hidden: bool = False):
+        """Latest transactions (same filters as TransactionService.get_transactions) with the account owner's name."""
+        from backend.app.modules.auth.models import User
         
-        # 1. Get current static balances (Bank + Cash - Credit Debt - Loans)
-        accounts_query = db.query(models.Account).filter(models.Account.tenant_id == tenant_id)
-        if user_id:
-            accounts_query = accounts_query.filter(or_(models.Account.owner_id == user_id, models.Account.owner_id == None))
-            
-        accounts = accounts_query.all()
-        current_liquid_assets = 0
-        for acc in accounts:
-            bal = float(acc.balance or 0)
-            if acc.type in ['BANK', 'WALLET']:
-                current_liquid_assets += bal
-            elif acc.type in ['CREDIT_CARD', 'LOAN']:
-                current_liquid_assets -= bal
-        
-        # 2. Get net transactions grouped by date
-        start_history = datetime.utcnow() - timedelta(days=days)
-        transactions_grouped_query = db.query(
-            func.date(models.Transaction.date).label('d'),
-            func.sum(models.Transaction.amount).label('total')
-        ).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.date >= start_history
-        )
+        Txn = models.Transaction
+        query = db.query(
+            Txn.id, Txn.date, Txn.description, Txn.amount, Txn.category, Txn.account_id,
+            Txn.is_transfer, Txn.exclude_from_reports, User.full_name, User.email
+        ).outerjoin(
+            models.Account, Txn.account_id == models.Account.id
+        ).outerjoin(
+            User, User.id == models.Account.owner_id
+        ).filter(Txn.tenant_id == tenant_id)
         
+        if user_role == "CHILD":
+            query = query.filter(models.Account.type.notin_(["INVESTMENT", "CREDIT"]))
+        if exclude_hidden:
+            query = query.filter(Txn.exclude_from_reports == False, Txn.is_transfer == False)
         if user_id:
-            # Filter by account ownership
-            transactions_grouped_query = transactions_grouped_query.join(
-                models.Account, models.Transaction.account_id == models.Account.id
-            ).filter(
+            # Filter by account ownership: show user's accounts OR shared accounts
+            query = query.filter(
+                models.Account.id != None,
                 or_(models.Account.owner_id == user_id, models.Account.owner_id == None)
             )
-            
-        transactions_grouped = transactions_grouped_query.group_by(func.date(models.Transaction.date)).all()
-        
-        # 3. Get MF timeline (which already handles historical valuation)
-        mf_res = MutualFundService.get_performance_timeline(db, tenant_id, period='1m', granularity='1d', user_id=user_id)
-        mf_timeline = mf_res.get("timeline", [])
-        mf_map = {datetime.fromisoformat(p["date"]).date(): p["value"] for p in mf_timeline}
         
-        # 4. Backtrack liquid balances
-        timeline = []
-        now = datetime.utcnow()
-        cursor_balance = current_liquid_assets
-        
-        # Group transactions by date
-        txn_by_date = {row.d: float(row.total) for row in transactions_grouped}
-            
-        for i in range(days):
-            target_date = (now - timedelta(days=i)).date()
-            
-            # Balance at end of target_date is cursor_balance
-            mf_val = mf_map.get(target_date, 0)
-            if not mf_val and mf_timeline:
-                # If no exact date, find closest previous
-                past_dates = [d for d in mf_map.keys() if d <= target_date]
-                if past_dates:
-                    mf_val = mf_map[max(past_dates)]
-                else:
-                    mf_val = mf_timeline[0]["value"] # Fallback to first known
+        recent = []
+        for row in query.order_by(Txn.date.desc()).limit(limit).all():
+            txn_dict = {
+                "id": row.id,
+                "date": row.date,
+                "description": row.description,
+                "amount": float(row.amount),
+                "category": row.category,
+                "account_id": row.account_id,
+                "is_transfer": row.is_transfer,
+                "exclude_from_reports": row.exclude_from_reports
+            }
+            if row.email:
+                txn_dict["account_owner_name"] = row.full_name or row.email.split('@')[0]
+            recent.append(txn_dict)
+        return recent
 
-            timeline.append({
-                "date": target_date.isoformat(),
-                "liquid": round(cursor_balance, 2),
-                "investments": round(mf_val, 2),
-                "total": round(cursor_balance + mf_val, 2)
-            })
-            
-            # Step back: subtract todays net transactions to get yesterday's closing balance
-            cursor_balance -= txn_by_date.get(target_date, 0)
-            
-        return timeline[::-1] # Chronological
+    @staticmethod
+    def get_net_worth_timeline(db: Session, tenant_id: str, days: int = 30, user_id: str = None):
+        """Daily net worth, read from the precomputed snapshots (see NetWorthService)."""
+        from .net_worth_service import NetWorthService
+        return NetWorthService.get_timeline(db, tenant_id, days=days, user_id=user_id)
 
     @staticmethod
     def get_spending_trend(db: Session, tenant_id: str, user_id: str = None):
@@ -377,30 +287,21 @@ class AnalyticsService:
         now = datetime.utcnow()
         start_date = datetime(now.year, now.month, 1)
         
-        # Daily spending
-        query = db.query(
-            func.date(models.Transaction.date).label('day'),
-            func.sum(models.Transaction.amount).label('total')
+        # Daily spending (from the daily rollups)
+        rollup = models.TransactionRollup
+        spending = TransactionRollupService.query(
+            db, tenant_id, rollup.day, func.sum(rollup.debit_total).label('total'), user_id=user_id
         ).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.date >= start_date,
-            models.Transaction.amount < 0,
-            models.Transaction.is_transfer == False,
-            models.Transaction.exclude_from_reports == False
-        )
-        
-        if user_id:
-            # Filter by account ownership
-            query = query.join(models.Account, models.Transaction.account_id == models.Account.id)\
-                         .filter(or_(models.Account.owner_id == user_id, models.Account.owner_id == None))
-            
-        spending = query.group_by(func.date(models.Transaction.date)).order_by('day').all()
+            rollup.day >= start_date.date(),
+            rollup.is_transfer == False,
+            rollup.exclude_from_reports == False
+        ).group_by(rollup.day).all()
         
         # Fill gaps with 0
         trend = []
         today = now.date()
         current = start_date.date()
-        spend_map = {row.day: abs(float(row.total)) for row in spending}
+        spend_map = {row.day.isoformat(): abs(float(row.total)) for row in spending}
         
         while current <= today:
             trend.append({
@@ -505,52 +406,34 @@ class AnalyticsService:
         
         start_range = datetime(current_y, current_m, 1)
         
-        # Query spending for ALL categories for the WHOLE period in one go
-        # Group by category and month
+        # Spending for ALL categories for the WHOLE period in one go, grouped by
+        # category and month over the daily rollups
         # Note: func.date_trunc('month', ...) is supported by DuckDB
+        rollup = models.TransactionRollup
+        month_start = func.date_trunc('month', rollup.day)
         monthly_stats = db.query(
-            models.Transaction.category,
-            func.date_trunc('month', models.Transaction.date).label('month_start'),
-            func.sum(models.Transaction.amount).label('total')
+            rollup.category,
+            month_start.label('month_start'),
+            func.sum(rollup.debit_total).label('total')
         ).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.date >= start_range,
-            models.Transaction.amount < 0,
-            models.Transaction.is_transfer == False,
-            models.Transaction.exclude_from_reports == False
+            rollup.tenant_id == tenant_id,
+            rollup.day >= start_range.date(),
+            rollup.is_transfer == False,
+            rollup.exclude_from_reports == False
         ).group_by(
-            models.Transaction.category,
-            text('month_start')
+            rollup.category,
+            month_start
         ).all()
         
         # Organize statistics into a map for easy lookup: {month_start_date: {category: amount}}
+        # 'OVERALL' is the sum over every category
         stats_map = {}
         for row in monthly_stats:
             m_date = row.month_start.date() if hasattr(row.month_start, 'date') else row.month_start
-            if m_date not in stats_map:
-                stats_map[m_date] = {}
-            stats_map[m_date][row.category] = abs(float(row.total))
-            
-        # Handle 'OVERALL' special case if it exists in categories
-        if 'OVERALL' in categories:
-            overall_stats = db.query(
-                func.date_trunc('month', models.Transaction.date).label('month_start'),
-                func.sum(models.Transaction.amount).label('total')
-            ).filter(
-                models.Transaction.tenant_id == tenant_id,
-                models.Transaction.date >= start_range,
-                models.Transaction.amount < 0,
-                models.Transaction.is_transfer == False,
-                models.Transaction.exclude_from_reports == False
-            ).group_by(
-                text('month_start')
-            ).all()
-            
-            for row in overall_stats:
-                m_date = row.month_start.date() if hasattr(row.month_start, 'date') else row.month_start
-                if m_date not in stats_map:
-                    stats_map[m_date] = {}
-                stats_map[m_date]['OVERALL'] = abs(float(row.total))
+            month_stats = stats_map.setdefault(m_date, {'OVERALL': 0.0})
+            amount = abs(float(row.total or 0))
+            month_stats[row.category or None] = month_stats.get(row.category or None, 0.0) + amount
+            month_stats['OVERALL'] += amount
 
         history = []
         for i in range(months):
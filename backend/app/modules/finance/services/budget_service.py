@@ -2,7 +2,7 @@ from typing import List, Dict, Optional
 from decimal import Decimal
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from backend.app.modules.finance import models, schemas
 
 class BudgetService:
@@ -26,52 +26,39 @@ class BudgetService:
         else:
             end_of_period = datetime(year, month + 1, 1)
         
-        # Helper to get spending for categories
-        spending_rows = db.query(
-            models.Transaction.category, 
-            func.sum(models.Transaction.amount).label("sum")
+        # Spending and excluded totals per category from the daily rollups (one query)
+        rollup = models.TransactionRollup
+        rows = db.query(
+            rollup.category,
+            rollup.is_transfer,
+            rollup.exclude_from_reports,
+            func.sum(rollup.debit_total).label("debit"),
+            func.sum(rollup.credit_total).label("credit")
         ).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.date >= start_of_period,
-            models.Transaction.date < end_of_period,
-            models.Transaction.is_transfer == False,
-            models.Transaction.exclude_from_reports == False
-        ).group_by(models.Transaction.category).all()
+            rollup.tenant_id == tenant_id,
+            rollup.day >= start_of_period.date(),
+            rollup.day < end_of_period.date()
+        ).group_by(
+            rollup.category, rollup.is_transfer, rollup.exclude_from_reports
+        ).having(
+            func.sum(rollup.debit_count + rollup.credit_count) > 0
+        ).all()
         
         spending_map = {}
-        for row in spending_rows:
+        # Excluded spending per category (for per-category display)
+        excluded_map = {}
+        # Total volume by polarity (not grouped) to catch transfers
+        excluded_spending = Decimal(0)
+        excluded_income = Decimal(0)
+        for row in rows:
             name = row.category or 'Uncategorized'
-            spending_map[name] = spending_map.get(name, Decimal(0)) + (row.sum or Decimal(0))
-        
-        # 2b. Helper to get excluded spending per category (for per-category display)
-        excluded_rows = db.query(
-            models.Transaction.category,
-            func.sum(models.Transaction.amount).label("sum")
-        ).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.date >= start_of_period,
-            models.Transaction.date < end_of_period,
-            or_(models.Transaction.exclude_from_reports == True, models.Transaction.is_transfer == True)
-        ).group_by(models.Transaction.category).all()
-        
-        excluded_map = { (row.category or 'Uncategorized'): row.sum for row in excluded_rows }
-        
-        # Calculate total volume by polarity (not grouped) to catch transfers
-        excluded_spending = db.query(func.sum(models.Transaction.amount)).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.date >= start_of_period,
-            models.Transaction.date < end_of_period,
-            or_(models.Transaction.exclude_from_reports == True, models.Transaction.is_transfer == True),
-            models.Transaction.amount < 0
-        ).scalar() or Decimal(0)
-        
-        excluded_income = db.query(func.sum(models.Transaction.amount)).filter(
-            models.Transaction.tenant_id == tenant_id,
-            models.Transaction.date >= start_of_period,
-            models.Transaction.date < end_of_period,
-            or_(models.Transaction.exclude_from_reports == True, models.Transaction.is_transfer == True),
-            models.Transaction.amount > 0
-        ).scalar() or Decimal(0)
+            value = (row.debit or Decimal(0)) + (row.credit or Decimal(0))
+            if row.is_transfer or row.exclude_from_reports:
+                excluded_map[name] = excluded_map.get(name, Decimal(0)) + value
+                excluded_spending += row.debit or Decimal(0)
+                excluded_income += row.credit or Decimal(0)
+            else:
+                spending_map[name] = spending_map.get(name, Decimal(0)) + value
 
         excluded_spending = abs(excluded_spending)
         
@@ -1,8 +1,25 @@
 from typing import List, Optional, Dict
 import json
+import threading
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy import func
 from backend.app.modules.finance import models, schemas
+from backend.app.modules.finance.utils.rule_matcher import RuleMatcher
+
+# Compiled rule matchers per tenant, rebuilt on first use after a rule change
+_matchers: Dict[str, RuleMatcher] = {}
+_matcher_versions: Dict[str, int] = {}
+_matcher_lock = threading.Lock()
+
+
+def _decode_keywords(rule: models.CategoryRule) -> None:
+    """Expose keywords as a list for the response without marking the stored JSON as changed."""
+    try:
+        keywords = json.loads(rule.keywords)
+    except:
+        keywords = []
+    set_committed_value(rule, "keywords", keywords)
 
 class CategoryService:
     # --- Category Management ---
@@ -128,13 +145,11 @@ class CategoryService:
              
         db.add(db_rule)
         db.commit()
+        CategoryService.invalidate_rule_matcher(tenant_id)
         db.refresh(db_rule)
         
         # Manually deserialize keywords for Pydantic response
-        try:
-             db_rule.keywords = json.loads(db_rule.keywords)
-        except:
-             db_rule.keywords = []
+        _decode_keywords(db_rule)
              
         return db_rule
 
@@ -142,10 +157,7 @@ class CategoryService:
     def get_category_rules(db: Session, tenant_id: str) -> List[models.CategoryRule]:
         rules = db.query(models.CategoryRule).filter(models.CategoryRule.tenant_id == tenant_id).order_by(models.CategoryRule.priority.desc()).all()
         for r in rules:
-             try:
-                 r.keywords = json.loads(r.keywords)
-             except:
-                 r.keywords = []
+             _decode_keywords(r)
         return rules
 
     @staticmethod
@@ -166,13 +178,11 @@ class CategoryService:
                 setattr(db_rule, key, value)
                 
         db.commit()
+        CategoryService.invalidate_rule_matcher(tenant_id)
         db.refresh(db_rule)
         
         # Deserialize for response
-        try:
-             db_rule.keywords = json.loads(db_rule.keywords)
-        except:
-             db_rule.keywords = []
+        _decode_keywords(db_rule)
              
         return db_rule
 
@@ -188,8 +198,43 @@ class CategoryService:
             
         db.delete(db_rule)
         db.commit()
+        CategoryService.invalidate_rule_matcher(tenant_id)
         return True
 
+    @staticmethod
+    def get_rule_matcher(db: Session, tenant_id: str) -> RuleMatcher:
+        """
+        The tenant's rules compiled into one matcher, cached in process until a
+        rule is created, updated or deleted.
+        """
+        with _matcher_lock:
+            matcher = _matchers.get(tenant_id)
+            version = _matcher_versions.get(tenant_id, 0)
+        if matcher is not None:
+            return matcher
+
+        rules = db.query(models.CategoryRule).filter(
+            models.CategoryRule.tenant_id == tenant_id
+        ).order_by(
+            models.CategoryRule.priority.desc(),
+            models.CategoryRule.created_at,
+            models.CategoryRule.id
+        ).all()
+        matcher = RuleMatcher(rules)
+
+        with _matcher_lock:
+            # A rule changed while compiling: serve this one, but do not cache it
+            if _matcher_versions.get(tenant_id, 0) == version:
+                _matchers[tenant_id] = matcher
+        return matcher
+
+    @staticmethod
+    def invalidate_rule_matcher(tenant_id: str) -> None:
+        """Drop the tenant's compiled matcher; call after committing a rule change."""
+        with _matcher_lock:
+            _matchers.pop(tenant_id, None)
+            _matcher_versions[tenant_id] = _matcher_versions.get(tenant_id, 0) + 1
+
     @staticmethod
     def ignore_suggestion(db: Session, pattern: str, tenant_id: str):
         exists = db.query(models.IgnoredSuggestion).filter(
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time as clock
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+from backend.app.core.http_client import http_get, fetch_concurrently
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN_IST = time(9, 15)
+MARKET_CLOSE_IST = time(15, 30)
+# Poll cadence: every minute while NSE/BSE are trading, every 30 minutes otherwise
+MARKET_HOURS_INTERVAL_SECONDS = 60
+OFF_HOURS_INTERVAL_SECONDS = 30 * 60
+# Until a first good snapshot exists, failed polls are retried this often
+COLD_RETRY_SECONDS = 30
+
+INDICES = [
+    {"name": "NIFTY 50", "symbol": "^NSEI"},
+    {"name": "SENSEX", "symbol": "^BSESN"},
+    {"name": "BANK NIFTY", "symbol": "^NSEBANK"}
+]
+
+_snapshot: Dict[str, dict] = {}      # index name -> last good quote
+_fetched_at: Dict[str, datetime] = {}
+_last_poll: Optional[float] = None   # monotonic time of the last poll attempt
+_poll_lock = threading.Lock()
+
+
+def _is_market_hours(now: datetime) -> bool:
+    now_ist = now.astimezone(IST)
+    return now_ist.weekday() < 5 and MARKET_OPEN_IST <= now_ist.time() <= MARKET_CLOSE_IST
+
+
+def _placeholder(name: str, value: str) -> dict:
+    return {"name": name, "value": value, "change": "0.00", "percent": "0.00%", "isUp": True}
+
+
+class MarketIndexService:
+    """
+    In-memory market index snapshot kept current by the scheduler.
+
+    The poller refreshes Yahoo Finance quotes on a market-hours aware interval
+    and keeps the last good quote per index, so a failed poll never replaces
+    data with an error. Readers get the snapshot plus its age and never wait
+    on Yahoo once the first poll has completed.
+    """
+
+    @staticmethod
+    def _fetch_index(idx: dict) -> Optional[dict]:
+        """Current quote for one index, or None if Yahoo did not return one."""
+        try:
+            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{idx['symbol']}?interval=5m&range=1d"
+            response = http_get(url, timeout=5.0, retries=1)
+            if response.status_code != 200:
+                return None
+
+            data = response.json()
+            meta = data['chart']['result'][0]['meta']
+            current_price = meta['regularMarketPrice']
+            previous_close = meta['chartPreviousClose']
+            change = current_price - previous_close
+            percent = (change / previous_close) * 100
+
+            indicators = data['chart']['result'][0]['indicators']['quote'][0]
+            closes = indicators.get('close', [])
+            valid_closes = [c for c in closes if c is not None]
+            sparkline = valid_closes[-20:] if len(valid_closes) > 20 else valid_closes
+
+            return {
+                "name": idx['name'],
+                "value": f"{current_price:,.2f}",
+                "change": f"{change:+.2f}",
+                "percent": f"{percent:+.2f}%",
+                "isUp": change >= 0,
+                "sparkline": sparkline
+            }
+        except Exception as e:
+            logger.debug(f"[Indices] Fetch failed for {idx['symbol']}: {e}")
+            return None
+
+    @staticmethod
+    def poll(force: bool = False) -> bool:
+        """
+        Refresh the snapshot if the current interval has elapsed (or `force`).
+        Returns True if a poll ran.
+        """
+        global _last_poll
+        with _poll_lock:
+            now = datetime.now(timezone.utc)
+            interval = MARKET_HOURS_INTERVAL_SECONDS if _is_market_hours(now) else OFF_HOURS_INTERVAL_SECONDS
+            if not _snapshot:
+                interval = min(interval, COLD_RETRY_SECONDS)
+            if not force and _last_poll is not None and clock.monotonic() - _last_poll < interval:
+                return False
+            _last_poll = clock.monotonic()
+
+            quotes = fetch_concurrently(MarketIndexService._fetch_index, INDICES)
+            fetched_at = datetime.now(timezone.utc)
+            for quote in quotes:
+                if quote:
+                    _snapshot[quote["name"]] = quote
+                    _fetched_at[quote["name"]] = fetched_at
+            return True
+
+    @staticmethod
+    def get_snapshot() -> List[dict]:
+        """Cached quotes in display order, each with `as_of` and `age_seconds` (None if never fetched)."""
+        if not _snapshot:
+            # Cold start before the first scheduled poll
+            MarketIndexService.poll()
+
+        now = datetime.now(timezone.utc)
+        results = []
+        for idx in INDICES:
+            quote = _snapshot.get(idx["name"])
+            if quote is None:
+                results.append({**_placeholder(idx["name"], "Unavailable"), "as_of": None, "age_seconds": None})
+                continue
+            fetched_at = _fetched_at[idx["name"]]
+            results.append({
+                **quote,
+                "as_of": fetched_at.isoformat(),
+                "age_seconds": int((now - fetched_at).total_seconds())
+            })
+        return results
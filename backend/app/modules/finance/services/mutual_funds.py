@@ -1,16 +1,34 @@
+import logging
 import threading
 import time
-import httpx
+import uuid
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, date
 from typing import List, Optional
+from backend.app.core.date_filters import same_day
+from backend.app.core.http_client import http_get
 from backend.app.modules.finance.models import MutualFundsMeta, MutualFundHolding, MutualFundOrder
 
+logger = logging.getLogger(__name__)
+
 MFAPI_BASE_URL = "https://api.mfapi.in/mf"
+BENCHMARK_SCHEME_CODE = "120716"  # UTI Nifty 50 Index Fund, used as the timeline benchmark
+# Ids per DELETE ... WHERE id IN (...) when removing duplicate orders
+DELETE_CHUNK = 500
 
 # Global lock for DuckDB writes to prevent Conflict on Update within this process
 _db_write_lock = threading.Lock()
 
+_BUY_ORDER_TYPES = {"BUY", "DEBIT", "PURCHASE", "PURCHASE_SIP", "SWITCH_IN", "SIP", "STP_IN"}
+_SELL_ORDER_TYPES = {"SELL", "CREDIT", "REDEMPTION", "SWITCH_OUT", "STP_OUT"}
+
+
+def _normalize_order_type(order_type) -> str:
+    t = str(order_type).upper().strip()
+    if t in _BUY_ORDER_TYPES: return "BUY"
+    if t in _SELL_ORDER_TYPES: return "SELL"
+    return t
+
 class MutualFundService:
     
     @staticmethod
@@ -42,62 +60,18 @@ class MutualFundService:
             return 12.0
 
     @staticmethod
-    def search_funds(query: Optional[str] = None, category: Optional[str] = None, amc: Optional[str] = None, limit: int = 20, offset: int = 0, sort_by: str = 'relevance', all_funds_cache: Optional[List[dict]] = None):
+    def search_funds(query: Optional[str] = None, category: Optional[str] = None, amc: Optional[str] = None, limit: int = 20, offset: int = 0, sort_by: str = 'relevance'):
+        from backend.app.modules.finance.services.scheme_master_service import SchemeMasterService
         try:
-            # Fetch the main list from MFAPI if not provided
-            if all_funds_cache:
-                all_funds = all_funds_cache
-            else:
-                response = httpx.get(f"{MFAPI_BASE_URL}")
-                if response.status_code == 200:
-                    all_funds = response.json()
-                else:
-                    return []
-            
-            # Continue with processing...
-            if True: # indent preservation wrapper
-                query_low = query.lower() if query else None
-                cat_low = category.lower() if category else None
-                amc_low = amc.lower() if amc else None
-
-                # Optimization: Direct filter if possible, otherwise iterate
-                filtered_funds = []
-                for f in all_funds:
-                    scheme_name = f.get('schemeName', '').lower()
-                    
-                    # Filtering logic
-                    match = True
-                    if query_low and query_low not in scheme_name:
-                        match = False
-                    if cat_low and cat_low not in scheme_name: 
-                        match = False
-                    if amc_low and amc_low not in scheme_name: 
-                        match = False
-                        
-                    if match:
-                        filtered_funds.append(f)
-
-                # Sorting
-                if sort_by == 'returns_desc':
-                    filtered_funds.sort(key=lambda x: MutualFundService.get_mock_returns(str(x.get('schemeCode'))), reverse=True)
-                elif sort_by == 'returns_asc':
-                    filtered_funds.sort(key=lambda x: MutualFundService.get_mock_returns(str(x.get('schemeCode'))))
-                # Default 'relevance' keeps original order (usually by scheme code or alphabetical from API)
-
-                # Pagination
-                start = offset
-                end = offset + limit
-                results = filtered_funds[start:end]
-                            
-                return results
-            return []
+            return SchemeMasterService.search(query, category=category, amc=amc, limit=limit, offset=offset, sort_by=sort_by)
         except Exception as e:
+            logger.warning(f"[SchemeMaster] Search failed: {e}")
             return []
 
     @staticmethod
     def get_fund_nav(scheme_code: str):
         try:
-            response = httpx.get(f"{MFAPI_BASE_URL}/{scheme_code}")
+            response = http_get(f"{MFAPI_BASE_URL}/{scheme_code}")
             if response.status_code == 200:
                 data = response.json()
                 if data.get("status") == "SUCCESS":
@@ -109,35 +83,33 @@ class MutualFundService:
             return None
 
     @staticmethod
-    def map_transactions_to_schemes(transactions: List[dict]):
-        """Map raw transaction names/AMFI codes to MFAPI scheme codes."""
+    def map_transactions_to_schemes(db: Session, transactions: List[dict]):
+        """Map raw transaction names/AMFI codes/ISINs to MFAPI scheme codes."""
+        from backend.app.modules.finance.services.scheme_master_service import SchemeMasterService
+
         if not transactions:
             return []
-            
-        all_funds = []
-        amfi_map = {}
-        try:
-            import httpx
-            resp = httpx.get("https://api.mfapi.in/mf", timeout=10.0)
-            if resp.status_code == 200:
-                all_funds = resp.json()
-                amfi_map = {str(f['schemeCode']): f for f in all_funds}
-        except Exception:
-            pass
+
+        index = SchemeMasterService.get_index(db)
+
+        # 1. Direct AMFI code / ISIN hits; everything else is resolved by name in one batch
+        direct = {}
+        unresolved_names = set()
+        for i, txn in enumerate(transactions):
+            matched_scheme = index.get(txn['amfi']) if txn.get('amfi') else None
+            if not matched_scheme and txn.get('isin'):
+                matched_scheme = index.get_by_isin(txn['isin'])
+            if matched_scheme:
+                direct[i] = matched_scheme
+            elif txn.get('scheme_name'):
+                unresolved_names.add(txn['scheme_name'])
+
+        # 2. Fallback to Name Search (distinct names only, cached across imports)
+        by_alias = SchemeMasterService.resolve_names(db, unresolved_names)
+
         mapped_results = []
-        for txn in transactions:
-            matched_scheme = None
-            amfi_code = txn.get('amfi')
-            
-            # 1. Try AMFI lookup
-            if amfi_code and str(amfi_code) in amfi_map:
-                matched_scheme = amfi_map[str(amfi_code)]
-            
-            # 2. Fallback to Name Search - Pass cache to avoid redundant fetches
-            if not matched_scheme:
-                results = MutualFundService.search_funds(txn['scheme_name'], all_funds_cache=all_funds)
-                if results:
-                    matched_scheme = results[0]
+        for i, txn in enumerate(transactions):
+            matched_scheme = direct.get(i) or by_alias.get(SchemeMasterService.scheme_alias(txn.get('scheme_name')))
             
             if matched_scheme:
                 txn['scheme_code'] = matched_scheme['schemeCode']
@@ -154,107 +126,108 @@ class MutualFundService:
             
         return mapped_results
     
+    @staticmethod
+    def _parse_import_date(value) -> Optional[date]:
+        """Calendar date of an imported transaction ('date' may be a datetime, date or string)."""
+        if isinstance(value, str):
+            # Handle ISO format with T
+            if 'T' in value:
+                value = value.split('T')[0]
+            for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S"):
+                try:
+                    value = datetime.strptime(value, fmt)
+                    break
+                except ValueError:
+                    continue
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return None
+
     @staticmethod
     def check_duplicates(db: Session, tenant_id: str, transactions: List[dict]) -> List[dict]:
         """
         Check which transactions are duplicates of existing orders.
         Returns the same list with 'is_duplicate' flag set.
+
+        Existing orders for all involved schemes and users are loaded in one
+        query and bucketed by (user, scheme, date, type); each incoming
+        transaction then probes its bucket, comparing units/amount within the
+        rounding tolerance.
         """
-        from sqlalchemy import func
-        from datetime import datetime, date
-        
+        candidates = []
         for txn in transactions:
-            is_duplicate = False
-            
+            txn['is_duplicate'] = False
             # Only check if successfully mapped
             if txn.get('scheme_code'):
-                user_id = txn.get('user_id')
-                scheme_code = str(txn.get('scheme_code'))
-                external_id = txn.get('external_id')
-                
-                # Priority 1: Check by external_id
-                if external_id:
-                    existing = db.query(MutualFundOrder.id).filter(
-                        MutualFundOrder.tenant_id == tenant_id,
-                        MutualFundOrder.user_id == user_id,
-                        MutualFundOrder.external_id == external_id
-                    ).first()
-                    if existing:
-                        is_duplicate = True
-                
-                # Priority 2: Check by field match
-                if not is_duplicate:
-                    txn_date_raw = txn.get('date')
-                    if isinstance(txn_date_raw, str):
-                        # Handle ISO format with T
-                        if 'T' in txn_date_raw:
-                             txn_date_raw = txn_date_raw.split('T')[0]
-                        
-                        # Parse string date
-                        for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S"):
-                            try:
-                                txn_date_raw = datetime.strptime(txn_date_raw, fmt)
-                                break
-                            except: continue
-                    
-                    if isinstance(txn_date_raw, (datetime, date)):
-                        txn_date = txn_date_raw.date() if isinstance(txn_date_raw, datetime) else txn_date_raw
-                        # Fix: Normalize type and sign for comparison
-                        txn_type = txn.get('type', 'BUY')
-                        if txn_type == "DEBIT": txn_type = "BUY"
-                        elif txn_type == "CREDIT": txn_type = "SELL"
-                        
-                        rounded_units = abs(round(float(txn.get('units', 0)), 4))
-                        rounded_amount = abs(round(float(txn.get('amount', 0)), 2))
+                candidates.append(txn)
+        if not candidates:
+            return transactions
 
-                        # Ensure scheme_code is string for DB query
-                        scheme_code_str = str(scheme_code).strip()
-                        
-                        # Candidate search: Fetch ALL orders for this scheme (safer to filter in Python)
-                        # Relax user_id check to include legacy (NULL) records
-                        candidates = db.query(MutualFundOrder).filter(
-                            MutualFundOrder.tenant_id == tenant_id,
-                            (MutualFundOrder.user_id == user_id) | (MutualFundOrder.user_id.is_(None)),
-                            MutualFundOrder.scheme_code == scheme_code_str
-                        ).all()
-                        
-                        def normalize_type(t_str):
-                            t = str(t_str).upper().strip()
-                            if t in ["BUY", "DEBIT", "PURCHASE", "PURCHASE_SIP", "SWITCH_IN", "SIP", "STP_IN"]: return "BUY"
-                            if t in ["SELL", "CREDIT", "REDEMPTION", "SWITCH_OUT", "STP_OUT"]: return "SELL"
-                            return t
-
-                        # Python-side robust matching
-                        for result in candidates:
-                            # 1. Date Check
-                            db_date = result.order_date.date() if hasattr(result.order_date, 'date') else result.order_date
-                            if db_date != txn_date:
-                                continue
-
-                            # 2. Units/Amount Check (Epsilon)
-                            db_units = abs(float(result.units))
-                            db_amount = abs(float(result.amount))
-                            
-                            if not (abs(db_units - rounded_units) < 0.001 and abs(db_amount - rounded_amount) < 0.01):
-                                continue
+        user_ids = {txn.get('user_id') for txn in candidates}
+        scheme_codes = {str(txn['scheme_code']).strip() for txn in candidates}
+        external_ids = {txn['external_id'] for txn in candidates if txn.get('external_id')}
+
+        # Priority 1: Check by external_id (one query for the whole batch)
+        known_external = set()
+        if external_ids:
+            known_external = {
+                (row.user_id, row.external_id) for row in db.query(
+                    MutualFundOrder.user_id, MutualFundOrder.external_id
+                ).filter(
+                    MutualFundOrder.tenant_id == tenant_id,
+                    MutualFundOrder.external_id.in_(external_ids)
+                ).all()
+            }
+
+        # Priority 2: Field match. Relax user_id check to include legacy (NULL) records
+        user_filter = MutualFundOrder.user_id.is_(None)
+        non_null_users = [u for u in user_ids if u is not None]
+        if non_null_users:
+            user_filter = user_filter | MutualFundOrder.user_id.in_(non_null_users)
+
+        existing = {}
+        for row in db.query(
+            MutualFundOrder.user_id, MutualFundOrder.scheme_code, MutualFundOrder.order_date,
+            MutualFundOrder.type, MutualFundOrder.units, MutualFundOrder.amount
+        ).filter(
+            MutualFundOrder.tenant_id == tenant_id,
+            MutualFundOrder.scheme_code.in_(scheme_codes),
+            user_filter
+        ).all():
+            order_date = row.order_date.date() if hasattr(row.order_date, 'date') else row.order_date
+            key = (row.user_id, str(row.scheme_code), order_date, _normalize_order_type(row.type))
+            existing.setdefault(key, []).append((abs(float(row.units)), abs(float(row.amount))))
+
+        for txn in candidates:
+            user_id = txn.get('user_id')
+            if txn.get('external_id') and (user_id, txn['external_id']) in known_external:
+                txn['is_duplicate'] = True
+                continue
+
+            txn_date = MutualFundService._parse_import_date(txn.get('date'))
+            if txn_date is None:
+                continue
+
+            rounded_units = abs(round(float(txn.get('units', 0)), 4))
+            rounded_amount = abs(round(float(txn.get('amount', 0)), 2))
+            scheme_code = str(txn['scheme_code']).strip()
+            txn_type = _normalize_order_type(txn.get('type', 'BUY'))
+
+            for owner in {user_id, None}:
+                bucket = existing.get((owner, scheme_code, txn_date, txn_type), ())
+                if any(abs(units - rounded_units) < 0.001 and abs(amount - rounded_amount) < 0.01 for units, amount in bucket):
+                    txn['is_duplicate'] = True
+                    break
 
-                            # 3. Type Check (Robust Normalization)
-                            db_type_norm = normalize_type(result.type)
-                            input_type_norm = normalize_type(txn_type)
-                            
-                            if db_type_norm == input_type_norm:
-                                is_duplicate = True
-                                break
-            
-            txn['is_duplicate'] = is_duplicate
-        
         return transactions
 
     @staticmethod
     def import_mapped_transactions(db: Session, tenant_id: str, transactions: List[dict]):
         """Bulk ingest transactions under a global lock."""
         stats = {"processed": 0, "failed": 0, "details": {"imported": [], "failed": []}}
-        
+        earliest_order_date = None
         
         with _db_write_lock:
             for idx, txn in enumerate(transactions):
@@ -277,6 +250,8 @@ class MutualFundService:
                     if result and hasattr(result, 'id'):
                         stats["processed"] += 1
                         stats["details"]["imported"].append(txn)
+                        if earliest_order_date is None or result.order_date < earliest_order_date:
+                            earliest_order_date = result.order_date
                     else:
                         stats["failed"] += 1
                         txn['error'] = "No order returned"
@@ -286,6 +261,8 @@ class MutualFundService:
                     stats["failed"] += 1
                     stats["details"]["failed"].append(txn)
             
+            if earliest_order_date:
+                MutualFundService._invalidate_timeline_cache(db, tenant_id, earliest_order_date)
             MutualFundService._safe_commit(db)
             
         return stats
@@ -295,6 +272,8 @@ class MutualFundService:
         """Public method that wraps logic in a global lock for DuckDB safety."""
         with _db_write_lock:
             result = MutualFundService._add_transaction_logic(db, tenant_id, data)
+            if result:
+                MutualFundService._invalidate_timeline_cache(db, tenant_id, result.order_date)
             MutualFundService._safe_commit(db)
             return result
 
@@ -304,20 +283,20 @@ class MutualFundService:
         scheme_code = str(data['scheme_code'])
         meta = db.query(MutualFundsMeta).filter(MutualFundsMeta.scheme_code == scheme_code).first()
         
-        if not meta:
+        # Rows stored from the scheme master carry only name/ISIN; fill in house and category on first use
+        if not meta or not meta.category:
             # Fetch from API and save
             fund_data = MutualFundService.get_fund_nav(scheme_code)
             if fund_data:
                 meta_info = fund_data.get("meta", {})
-                meta = MutualFundsMeta(
-                    scheme_code=str(meta_info.get("scheme_code")),
-                    scheme_name=meta_info.get("scheme_name"),
-                    fund_house=meta_info.get("fund_house"),
-                    category=meta_info.get("scheme_category")
-                )
-                db.add(meta)
+                if not meta:
+                    meta = MutualFundsMeta(scheme_code=str(meta_info.get("scheme_code")))
+                    db.add(meta)
+                meta.scheme_name = meta_info.get("scheme_name") or meta.scheme_name
+                meta.fund_house = meta_info.get("fund_house")
+                meta.category = meta_info.get("scheme_category")
                 db.flush() # Use flush instead of commit to allow external batching
-            else:
+            elif not meta:
                 raise ValueError("Invalid Scheme Code or API Error")
 
         # 2. Check for duplicate order (Idempotency)
@@ -352,7 +331,7 @@ class MutualFundService:
             MutualFundOrder.tenant_id == tenant_id,
             MutualFundOrder.user_id == user_id,
             MutualFundOrder.scheme_code == scheme_code,
-            func.date(MutualFundOrder.order_date) == txn_date,
+            same_day(MutualFundOrder.order_date, txn_date),
             MutualFundOrder.type == txn_type,
             func.round(func.abs(MutualFundOrder.units), 4) == rounded_units,
             func.round(func.abs(MutualFundOrder.amount), 2) == rounded_amount
@@ -450,50 +429,52 @@ class MutualFundService:
 
     @staticmethod
     def cleanup_duplicates(db: Session, tenant_id: str):
-        """Find and remove duplicate orders, then rebuild holdings."""
+        """
+        Remove duplicate orders (keeping the earliest created of each group) with
+        a single set-based DELETE, then rebuild only the holdings they belonged to.
+
+        Returns:
+            {"removed": int, "affected_holdings": [holding_id, ...]}
+        """
+        from sqlalchemy import func, select
+
         with _db_write_lock:
-            # 1. Find duplicate groups
-            from sqlalchemy import func
-            duplicates = db.query(
-                MutualFundOrder.scheme_code, 
-                MutualFundOrder.order_date, 
-                MutualFundOrder.units, 
-                MutualFundOrder.amount, 
-                MutualFundOrder.type
-            ).filter(MutualFundOrder.tenant_id == tenant_id).group_by(
-                MutualFundOrder.scheme_code, 
-                MutualFundOrder.order_date, 
-                MutualFundOrder.units, 
-                MutualFundOrder.amount, 
-                MutualFundOrder.type
-            ).having(func.count('*') > 1).all()
-            
-            removed_count = 0
-            for sc, d, u, a, t in duplicates:
-                all_matches = db.query(MutualFundOrder).filter(
-                    MutualFundOrder.tenant_id == tenant_id,
-                    MutualFundOrder.scheme_code == sc,
-                    MutualFundOrder.order_date == d,
-                    MutualFundOrder.units == u,
-                    MutualFundOrder.amount == a,
-                    MutualFundOrder.type == t
-                ).order_by(MutualFundOrder.created_at).all()
-                
-                to_delete = all_matches[1:]
-                for order in to_delete:
-                    db.delete(order)
-                    removed_count += 1
-                    
-            MutualFundService._safe_commit(db)
-            
-            # 2. Recalculate holdings (nested call, same lock thread)
-            # Actually _update_holding_with_order is used inside recalculate_holdings
-            # We call the internal logic to avoid re-taking the lock if it's already held by us
-            # But threading.Lock() is NOT re-entrant. 
-            # I should use an RLock or call an internal method.
-            MutualFundService._recalculate_holdings_logic(db, tenant_id)
-            
-            return removed_count
+            # 1. Rank orders within each duplicate group
+            rn = func.row_number().over(
+                partition_by=(
+                    MutualFundOrder.scheme_code,
+                    MutualFundOrder.order_date,
+                    MutualFundOrder.units,
+                    MutualFundOrder.amount,
+                    MutualFundOrder.type
+                ),
+                # id breaks created_at ties so the same survivor is kept on every run
+                order_by=(MutualFundOrder.created_at, MutualFundOrder.id)
+            ).label("rn")
+            ranked = select(MutualFundOrder.id, MutualFundOrder.holding_id, MutualFundOrder.order_date, rn).where(
+                MutualFundOrder.tenant_id == tenant_id
+            ).subquery()
+            duplicates = db.execute(
+                select(ranked.c.id, ranked.c.holding_id, ranked.c.order_date).where(ranked.c.rn > 1)
+            ).all()
+            removed_count = len(duplicates)
+            affected_holdings = sorted({holding_id for _, holding_id, _ in duplicates if holding_id})
+
+            # 2. Delete exactly the rows read above, a chunk of ids per statement
+            if removed_count:
+                table = MutualFundOrder.__table__
+                ids = [order_id for order_id, _, _ in duplicates]
+                for start in range(0, len(ids), DELETE_CHUNK):
+                    db.execute(table.delete().where(table.c.id.in_(ids[start:start + DELETE_CHUNK])))
+                MutualFundService._invalidate_timeline_cache(db, tenant_id, min(d for _, _, d in duplicates))
+
+            # 3. Rebuild only the holdings that lost orders (commits; lock is not re-entrant, so call the internal logic)
+            if removed_count:
+                MutualFundService._recalculate_holdings_logic(db, tenant_id, holding_ids=affected_holdings)
+            else:
+                MutualFundService._safe_commit(db)
+
+            return {"removed": removed_count, "affected_holdings": affected_holdings}
 
     @staticmethod
     def recalculate_holdings(db: Session, tenant_id: str, user_id: Optional[str] = None):
@@ -501,32 +482,135 @@ class MutualFundService:
             return MutualFundService._recalculate_holdings_logic(db, tenant_id, user_id)
 
     @staticmethod
-    def _recalculate_holdings_logic(db: Session, tenant_id: str, user_id: Optional[str] = None):
-        """Internal logic without lock for nested calls"""
+    def _recalculate_holdings_logic(db: Session, tenant_id: str, user_id: Optional[str] = None, holding_ids: Optional[List[str]] = None):
+        """
+        Internal logic without lock for nested calls.
+
+        If `holding_ids` is given, only those holdings (and the orders linked to
+        them) are rebuilt.
+
+        Orders are loaded once and folded in memory into (user, scheme, folio)
+        holdings, applying the same rules as _update_holding_with_order. Existing
+        holding rows with a matching key are updated in place (keeping their id,
+        goal link and live NAV), new ones inserted, and holdings left without
+        orders deleted, each with a single bulk statement.
+        """
+        from sqlalchemy import bindparam
+        import uuid
+
         # 1. Get all orders sorted by date
-        query = db.query(MutualFundOrder).filter(MutualFundOrder.tenant_id == tenant_id)
+        query = db.query(
+            MutualFundOrder.id, MutualFundOrder.user_id, MutualFundOrder.scheme_code,
+            MutualFundOrder.folio_number, MutualFundOrder.type, MutualFundOrder.units,
+            MutualFundOrder.amount, MutualFundOrder.nav, MutualFundOrder.order_date,
+            MutualFundOrder.holding_id
+        ).filter(MutualFundOrder.tenant_id == tenant_id)
         if user_id:
             query = query.filter(MutualFundOrder.user_id == user_id)
-        
-        orders = query.order_by(MutualFundOrder.order_date).all()
-        
-        # 2. Delete existing holdings
-        h_query = db.query(MutualFundHolding).filter(MutualFundHolding.tenant_id == tenant_id)
+        if holding_ids is not None:
+            query = query.filter(MutualFundOrder.holding_id.in_(holding_ids))
+        orders = query.order_by(MutualFundOrder.order_date, MutualFundOrder.created_at).all()
+
+        # 2. Fold orders into holdings
+        folded = {}
+        order_keys = []
+        for order in orders:
+            key = (order.user_id, order.scheme_code, order.folio_number)
+            h = folded.get(key)
+            if h is None:
+                h = folded[key] = {"units": 0.0, "average_price": 0.0, "last_nav": None, "last_updated_at": None}
+            order_keys.append(key)
+
+            order_units = float(order.units)
+            if order.type == "BUY":
+                order_amount = float(order.amount)
+                txn_cost = order_amount if order_amount > 0 else (float(order.nav) * order_units)
+                total_units = h["units"] + order_units
+                h["average_price"] = ((h["average_price"] * h["units"]) + txn_cost) / total_units if total_units > 0 else 0.0
+                h["units"] = total_units
+            elif order.type == "SELL":
+                h["units"] = max(0, h["units"] - order_units)
+
+            if not h["last_nav"]:
+                h["last_nav"] = float(order.nav)
+                h["last_updated_at"] = order.order_date
+
+        # 3. Match against existing holdings
+        h_query = db.query(
+            MutualFundHolding.id, MutualFundHolding.user_id, MutualFundHolding.scheme_code,
+            MutualFundHolding.folio_number, MutualFundHolding.last_nav, MutualFundHolding.last_updated_at
+        ).filter(MutualFundHolding.tenant_id == tenant_id)
         if user_id:
             h_query = h_query.filter(MutualFundHolding.user_id == user_id)
-        
-        h_query.delete(synchronize_session=False)
-        db.flush()
-        
-        # 3. Process each order
-        processed_orders = []
-        for order in orders:
-            MutualFundService._update_holding_with_order(db, tenant_id, order, order.folio_number)
-            processed_orders.append(order)
-        
-        # 4. Special Commit
+        if holding_ids is not None:
+            h_query = h_query.filter(MutualFundHolding.id.in_(holding_ids))
+
+        key_ids = {}
+        stale_ids = []
+        updates, inserts = [], []
+        for row in h_query.all():
+            key = (row.user_id, row.scheme_code, row.folio_number)
+            if key not in folded or key in key_ids:
+                stale_ids.append(row.id)
+                continue
+            key_ids[key] = row.id
+            h = folded[key]
+            # Keep the live NAV of a holding that survives the rebuild
+            if row.last_nav and float(row.last_nav) > 0:
+                h["last_nav"], h["last_updated_at"] = float(row.last_nav), row.last_updated_at
+
+        for key, h in folded.items():
+            values = {
+                "units": h["units"],
+                "average_price": h["average_price"],
+                "last_nav": h["last_nav"],
+                "last_updated_at": h["last_updated_at"],
+                "current_value": h["units"] * (h["last_nav"] or 0.0)
+            }
+            if key in key_ids:
+                updates.append({"b_id": key_ids[key], **{f"b_{k}": v for k, v in values.items()}})
+            else:
+                key_ids[key] = str(uuid.uuid4())
+                user, scheme_code, folio_number = key
+                inserts.append({
+                    "id": key_ids[key], "tenant_id": tenant_id, "user_id": user,
+                    "scheme_code": scheme_code, "folio_number": folio_number, **values
+                })
+
+        # 4. Bulk writes: holdings, then order -> holding links that changed
+        holdings_table = MutualFundHolding.__table__
+        orders_table = MutualFundOrder.__table__
+        if stale_ids:
+            db.execute(holdings_table.delete().where(holdings_table.c.id.in_(stale_ids)))
+        if updates:
+            db.execute(
+                holdings_table.update().where(holdings_table.c.id == bindparam("b_id")).values(
+                    units=bindparam("b_units"),
+                    average_price=bindparam("b_average_price"),
+                    last_nav=bindparam("b_last_nav"),
+                    last_updated_at=bindparam("b_last_updated_at"),
+                    current_value=bindparam("b_current_value")
+                ),
+                updates
+            )
+        if inserts:
+            db.execute(holdings_table.insert(), inserts)
+
+        links = [
+            {"b_id": order.id, "b_holding_id": key_ids[key]}
+            for order, key in zip(orders, order_keys) if order.holding_id != key_ids[key]
+        ]
+        if links:
+            db.execute(
+                orders_table.update().where(orders_table.c.id == bindparam("b_id")).values(
+                    holding_id=bindparam("b_holding_id")
+                ),
+                links
+            )
+
+        # 5. Special Commit
         MutualFundService._safe_commit(db)
-        return len(processed_orders)
+        return len(orders)
 
     @staticmethod
     def delete_holding(db: Session, tenant_id: str, holding_id: str):
@@ -539,6 +623,12 @@ class MutualFundService:
             if not holding:
                 raise Exception("Holding not found")
             
+            earliest_order_date = MutualFundService._earliest_order_date(
+                db, tenant_id, MutualFundOrder.holding_id == holding_id
+            )
+            if earliest_order_date:
+                MutualFundService._invalidate_timeline_cache(db, tenant_id, earliest_order_date)
+            
             # First, delete all associated orders
             deleted_orders = db.query(MutualFundOrder).filter(
                 MutualFundOrder.holding_id == holding_id,
@@ -553,75 +643,64 @@ class MutualFundService:
 
     @staticmethod
     def get_portfolio(db: Session, tenant_id: str, user_id: Optional[str] = None):
-        import asyncio
-        
-        query = db.query(MutualFundHolding).filter(MutualFundHolding.tenant_id == tenant_id)
+        """
+        Portfolio read model: every holding valued at its latest NAV, with scheme
+        name/category, P/L and a 30-day sparkline.
+
+        Holdings and their meta come from one joined query, and the values are
+        captured before the commit so building the response does not reload
+        each holding.
+        """
+        query = db.query(
+            MutualFundHolding, MutualFundsMeta.scheme_name, MutualFundsMeta.category
+        ).outerjoin(
+            MutualFundsMeta, MutualFundsMeta.scheme_code == MutualFundHolding.scheme_code
+        ).filter(MutualFundHolding.tenant_id == tenant_id)
         if user_id:
             query = query.filter(MutualFundHolding.user_id == user_id)
         
-        holdings = query.all()
+        rows = query.all()
+        holdings = [row[0] for row in rows]
         results = []
         
-        # Check for updates needed (Stale > 24h or None)
-        updates_made = False
-        today = datetime.utcnow().date()
-        
-        async def fetch_nav_and_sparkline(scheme_code):
-            """Fetch both current NAV and 30-day history concurrently"""
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=5.0)
-                    
-                if response.status_code == 200:
-                    fund_data = response.json()
-                    raw_data = fund_data.get("data", [])
-                    
-                    def parse_date(d_str):
-                        try:
-                            return datetime.strptime(d_str, "%d-%m-%Y")
-                        except:
-                            return datetime.min
+        # Current NAV and 30-day sparkline come from the in-process quote cache (refreshed in the background)
+        from backend.app.modules.finance.services.nav_quote_cache import NavQuoteCache
+        recent_navs = NavQuoteCache.get_quotes(db, [h.scheme_code for h in holdings])
 
-                    # Sort by date descending
-                    sorted_data = sorted(raw_data, key=lambda x: parse_date(x.get("date", "")), reverse=True)
-                    
-                    # Latest NAV
-                    latest_nav = 0.0
-                    nav_date_str = ""
-                    if sorted_data:
-                        latest_nav_data = sorted_data[0]
-                        latest_nav = float(latest_nav_data.get("nav", 0.0))
-                        nav_date_str = latest_nav_data.get("date", "")
-                    
-                    # Sparkline (last 30 days)
-                    sparkline_data = sorted_data[:30]  # Get last 30 entries
-                    sparkline_data.reverse()  # Reverse to chronological order
-                    sparkline = [float(d.get("nav", 0.0)) for d in sparkline_data if d.get("nav")]
-                    
-                    return {
-                        "latest_nav": latest_nav,
-                        "nav_date": nav_date_str,
-                        "sparkline": sparkline
-                    }
-                else:
-                    return {"latest_nav": 0.0, "nav_date": "", "sparkline": []}
-            except Exception as e:
-                return {"latest_nav": 0.0, "nav_date": "", "sparkline": []}
-        
-        # Fetch all NAV data concurrently
-        async def fetch_all_nav_data():
-            tasks = [fetch_nav_and_sparkline(h.scheme_code) for h in holdings]
-            return await asyncio.gather(*tasks)
-        
-        nav_data_list = asyncio.run(fetch_all_nav_data())
+        nav_data_list = []
+        for h in holdings:
+            series = recent_navs.get(str(h.scheme_code))
+            if series:
+                nav_date, latest_nav = series.latest()
+                nav_data_list.append({
+                    "latest_nav": latest_nav,
+                    "nav_date": nav_date,
+                    "sparkline": series.navs.tolist()
+                })
+            else:
+                nav_data_list.append({"latest_nav": 0.0, "nav_date": None, "sparkline": []})
         
+        def capture(h: MutualFundHolding) -> dict:
+            return {
+                "id": h.id,
+                "scheme_code": h.scheme_code,
+                "folio_number": h.folio_number,
+                "units": float(h.units or 0.0),
+                "average_price": float(h.average_price or 0.0),
+                "current_value": float(h.current_value or 0.0),
+                "last_nav": float(h.last_nav or 0.0),
+                "last_updated_at": h.last_updated_at,
+                "user_id": h.user_id,
+                "goal_id": h.goal_id
+            }
+
         # Phase 1: Update Holdings (Write Lock)
         updates_made = False
         with _db_write_lock:
             try:
                 for h, nav_data in zip(holdings, nav_data_list):
                     latest_nav = nav_data.get("latest_nav", 0.0)
-                    nav_date_str = nav_data.get("nav_date", "")
+                    nav_date = nav_data.get("nav_date")
                     
                     if latest_nav > 0:
                         has_changed = False
@@ -638,61 +717,91 @@ class MutualFundService:
                             has_changed = True
                         
                         # Date Update
-                        def parse_date_local(d_str):
-                            try:
-                                return datetime.strptime(d_str, "%d-%m-%Y")
-                            except: return None
-                        
-                        new_date = parse_date_local(nav_date_str)
+                        new_date = datetime.combine(nav_date, datetime.min.time()) if nav_date else None
                         if new_date and (not h.last_updated_at or h.last_updated_at != new_date):
                             h.last_updated_at = new_date
                             has_changed = True
                             
                         if has_changed:
                             updates_made = True
-                
+
+                # Capture values now: the commit below expires every holding
+                snapshots = [capture(h) for h in holdings]
                 if updates_made:
                     MutualFundService._safe_commit(db)
             except Exception as e:
                 db.rollback()
+                snapshots = [capture(h) for h in holdings]
 
-        # Phase 2: Build Results (Read-Only)
-        # Objects might be expired after commit, so accessing properties will trigger refresh (SELECT)
-        # This is safe as we are outside the write lock and transaction.
-        for h, nav_data in zip(holdings, nav_data_list):
-            sparkline = nav_data.get("sparkline", [])
-            
-            # Accessing properties triggers reload if needed
-            units = float(h.units or 0.0)
-            avg_price = float(h.average_price or 0.0)
-            current_val = float(h.current_value or 0.0)
+        # Phase 2: Build Results (Read-Only, from the captured values)
+        for (_, scheme_name, category), h, nav_data in zip(rows, snapshots, nav_data_list):
+            units = h["units"]
+            avg_price = h["average_price"]
+            current_val = h["current_value"]
             invested = units * avg_price
             pl = (current_val - invested) if current_val > 0 else 0.0
-            last_updated_str = h.last_updated_at.strftime("%d-%b-%Y") if h.last_updated_at else "N/A"
-            
-            # Fetch meta (Autoflush irrelevant now as no pending changes)
-            meta = db.query(MutualFundsMeta).filter(MutualFundsMeta.scheme_code == h.scheme_code).first()
+            last_updated_str = h["last_updated_at"].strftime("%d-%b-%Y") if h["last_updated_at"] else "N/A"
 
             results.append({
-                "id": h.id,
-                "scheme_code": h.scheme_code,
-                "scheme_name": meta.scheme_name if meta else "Unknown Fund",
-                "category": meta.category if meta else "Other",
-                "folio_number": h.folio_number,
+                "id": h["id"],
+                "scheme_code": h["scheme_code"],
+                "scheme_name": scheme_name or "Unknown Fund",
+                "category": category or "Other",
+                "folio_number": h["folio_number"],
                 "units": units,
                 "average_price": avg_price,
                 "current_value": current_val,
                 "invested_value": invested,
-                "last_nav": float(h.last_nav or 0.0),
+                "last_nav": h["last_nav"],
                 "profit_loss": pl,
                 "last_updated": last_updated_str,
-                "sparkline": sparkline,
-                "user_id": h.user_id,
-                "goal_id": h.goal_id
+                "sparkline": nav_data.get("sparkline", []),
+                "user_id": h["user_id"],
+                "goal_id": h["goal_id"]
             })
             
         return results
 
+    @staticmethod
+    def get_holdings_xirr(db: Session, tenant_id: str, holdings: List[dict]) -> dict:
+        """
+        XIRR (%) of each holding plus the combined portfolio, solved in one batch.
+
+        Args:
+            holdings: Valued holdings as returned by get_portfolio
+
+        Returns:
+            {"holdings": {holding_id: xirr or None}, "portfolio": xirr or None}
+        """
+        from backend.app.modules.finance.utils.financial_math import order_cash_flows, xirr_batch
+
+        if not holdings:
+            return {"holdings": {}, "portfolio": None}
+
+        current_values = {h["id"]: float(h.get("current_value") or 0.0) for h in holdings}
+        orders = db.query(MutualFundOrder).filter(
+            MutualFundOrder.tenant_id == tenant_id,
+            MutualFundOrder.holding_id.in_(list(current_values.keys()))
+        ).all()
+
+        orders_by_holding = {}
+        for o in orders:
+            orders_by_holding.setdefault(o.holding_id, []).append(o)
+
+        flows = {
+            holding_id: order_cash_flows(orders_by_holding.get(holding_id, []), value)
+            for holding_id, value in current_values.items()
+        }
+        portfolio_key = ("portfolio",)
+        flows[portfolio_key] = order_cash_flows(orders, sum(current_values.values()))
+
+        rates = xirr_batch(flows)
+        as_percent = lambda r: round(r * 100, 2) if r is not None else None
+        return {
+            "holdings": {holding_id: as_percent(rates[holding_id]) for holding_id in current_values},
+            "portfolio": as_percent(rates[portfolio_key])
+        }
+
     @staticmethod
     def get_holding_details(db: Session, tenant_id: str, holding_id: str):
         from backend.app.modules.auth.models import User
@@ -718,36 +827,10 @@ class MutualFundService:
         ).order_by(MutualFundOrder.order_date.desc()).all()
         
         # Calculate XIRR for this specific fund
-        from backend.app.modules.finance.utils.financial_math import xirr
-        from datetime import date
-        
-        cash_flows = []
-        total_invested = 0.0
-        for order in orders:
-            amount = float(order.amount)
-            if amount <= 0:
-                amount = float(order.units) * float(order.nav)
-            
-            order_date = order.order_date.date() if hasattr(order.order_date, 'date') else order.order_date
-            
-            if order.type == "BUY":
-                cash_flows.append((order_date, -amount))
-                total_invested += amount
-            else:
-                cash_flows.append((order_date, amount))
-        
-        if float(holding.current_value or 0) > 0:
-            cash_flows.append((date.today(), float(holding.current_value)))
-            
-        xirr_value = None
-        try:
-            if len(cash_flows) >= 2:
-                sum_out = sum(cf[1] for cf in cash_flows if cf[1] < 0)
-                if abs(sum_out) > 0.01:
-                    xirr_decimal = xirr(cash_flows)
-                    xirr_value = round(xirr_decimal * 100, 2)
-        except:
-            xirr_value = None
+        from backend.app.modules.finance.utils.financial_math import order_cash_flows, xirr_percent
+
+        cash_flows = order_cash_flows(orders, float(holding.current_value or 0))
+        xirr_value = xirr_percent(cash_flows)
 
         # Format orders for response
         orders_list = []
@@ -762,42 +845,15 @@ class MutualFundService:
                 "status": o.status
             })
 
-        # Fetch Full NAV History from MFAPI
+        # NAV History from the local store, starting at the first order
         nav_history = []
         try:
-            import requests
-            from datetime import datetime
-            
-            # Re-using the simplified fetch logic
-            response = requests.get(f"https://api.mfapi.in/mf/{holding.scheme_code}", timeout=3)
+            from backend.app.modules.finance.services.nav_history_service import NavHistoryService
             
-            if response.status_code == 200:
-                mf_data = response.json()
-                raw_history = mf_data.get("data", [])
-                
-                # If we have orders, get history from first order date only
-                start_date = None
-                if orders:
-                    # Orders are desc sorted in query above, so last element is earliest
-                    earliest_order = orders[-1].order_date
-                    start_date = earliest_order.date()
-                
-                valid_history = []
-                for entry in raw_history:
-                    try:
-                        d_obj = datetime.strptime(entry['date'], "%d-%m-%Y").date()
-                        # Include if no start date (no orders) or date >= start_date
-                        if start_date is None or d_obj >= start_date:
-                            valid_history.append({
-                                "date": d_obj.strftime("%Y-%m-%d"),
-                                "value": float(entry['nav'])
-                            })
-                    except:
-                        continue
-                
-                # Sort ascending for chart
-                nav_history = sorted(valid_history, key=lambda x: x['date'])
-
+            # Orders are desc sorted in query above, so last element is earliest
+            start_date = orders[-1].order_date.date() if orders else None
+            history = NavHistoryService.get_history(db, holding.scheme_code, start_date=start_date)
+            nav_history = [{"date": d.isoformat(), "value": nav} for d, nav in history]
         except Exception as e:
             pass
 
@@ -869,34 +925,10 @@ class MutualFundService:
         profit_loss = total_current_value - total_invested_value
         
         # 5. XIRR Calculation (Combined)
-        from backend.app.modules.finance.utils.financial_math import xirr
-        from datetime import date
-        
-        cash_flows = []
-        for order in orders:
-            amount = float(order.amount)
-            if amount <= 0:
-                amount = float(order.units) * float(order.nav)
-            
-            order_date = order.order_date.date() if hasattr(order.order_date, 'date') else order.order_date
-            
-            if order.type == "BUY":
-                cash_flows.append((order_date, -amount))
-            else:
-                cash_flows.append((order_date, amount))
-        
-        if total_current_value > 0:
-            cash_flows.append((date.today(), total_current_value))
-            
-        xirr_value = None
-        try:
-            if len(cash_flows) >= 2:
-                sum_out = sum(cf[1] for cf in cash_flows if cf[1] < 0)
-                if abs(sum_out) > 0.01:
-                    xirr_decimal = xirr(cash_flows)
-                    xirr_value = round(xirr_decimal * 100, 2)
-        except:
-            xirr_value = None
+        from backend.app.modules.finance.utils.financial_math import order_cash_flows, xirr_percent
+
+        cash_flows = order_cash_flows(orders, total_current_value)
+        xirr_value = xirr_percent(cash_flows)
 
         # 6. Format Transcations
         orders_list = []
@@ -914,30 +946,11 @@ class MutualFundService:
         # 7. NAV History (Same as before)
         nav_history = []
         try:
-            import requests
-            from datetime import datetime
+            from backend.app.modules.finance.services.nav_history_service import NavHistoryService
             
-            response = requests.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=3)
-            if response.status_code == 200:
-                mf_data = response.json()
-                raw_history = mf_data.get("data", [])
-                
-                start_date = None
-                if orders:
-                    earliest_order = orders[-1].order_date
-                    start_date = earliest_order.date()
-                
-                valid_history = []
-                for entry in raw_history:
-                    try:
-                        d_obj = datetime.strptime(entry['date'], "%d-%m-%Y").date()
-                        if start_date is None or d_obj >= start_date:
-                            valid_history.append({
-                                "date": d_obj.strftime("%Y-%m-%d"),
-                                "value": float(entry['nav'])
-                            })
-                    except: continue
-                nav_history = sorted(valid_history, key=lambda x: x['date'])
+            start_date = orders[-1].order_date.date() if orders else None
+            history = NavHistoryService.get_history(db, scheme_code, start_date=start_date)
+            nav_history = [{"date": d.isoformat(), "value": nav} for d, nav in history]
         except Exception as e:
             pass
 
@@ -1034,6 +1047,13 @@ class MutualFundService:
                     MutualFundOrder.holding_id == holding.id,
                     MutualFundOrder.tenant_id == tenant_id
                 ).update({"user_id": data["user_id"]})
+                
+                # Both members' timelines change from the holding's first order on
+                earliest_order_date = MutualFundService._earliest_order_date(
+                    db, tenant_id, MutualFundOrder.holding_id == holding.id
+                )
+                if earliest_order_date:
+                    MutualFundService._invalidate_timeline_cache(db, tenant_id, earliest_order_date)
             
             db.flush()
             MutualFundService._safe_commit(db)
@@ -1041,69 +1061,23 @@ class MutualFundService:
 
     @staticmethod
     def get_market_indices():
-        import asyncio
-        
-        async def fetch_index_data(idx):
-            try:
-                url = f"https://query1.finance.yahoo.com/v8/finance/chart/{idx['symbol']}?interval=5m&range=1d"
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(url, headers=headers, timeout=5.0)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    meta = data['chart']['result'][0]['meta']
-                    current_price = meta['regularMarketPrice']
-                    previous_close = meta['chartPreviousClose']
-                    change = current_price - previous_close
-                    percent = (change / previous_close) * 100
-                    
-                    indicators = data['chart']['result'][0]['indicators']['quote'][0]
-                    closes = indicators.get('close', [])
-                    valid_closes = [c for c in closes if c is not None]
-                    sparkline = valid_closes[-20:] if len(valid_closes) > 20 else valid_closes
-
-                    return {
-                        "name": idx['name'],
-                        "value": f"{current_price:,.2f}",
-                        "change": f"{change:+.2f}",
-                        "percent": f"{percent:+.2f}%",
-                        "isUp": change >= 0,
-                        "sparkline": sparkline
-                    }
-                else:
-                    return {"name": idx['name'], "value": "Unavailable", "change": "0.00", "percent": "0.00%", "isUp": True}
-            except Exception as e:
-                pass
-                return {"name": idx['name'], "value": "Error", "change": "0.00", "percent": "0.00%", "isUp": True}
-        
-        async def fetch_all():
-            indices = [
-                {"name": "NIFTY 50", "symbol": "^NSEI"},
-                {"name": "SENSEX", "symbol": "^BSESN"},
-                {"name": "BANK NIFTY", "symbol": "^NSEBANK"}
-            ]
-            tasks = [fetch_index_data(idx) for idx in indices]
-            return await asyncio.gather(*tasks)
-        
-        # Run async tasks
-        return asyncio.run(fetch_all())
+        """Last polled index snapshot (see MarketIndexService)."""
+        from backend.app.modules.finance.services.market_index_service import MarketIndexService
+        return MarketIndexService.get_snapshot()
 
     @staticmethod
     def get_portfolio_analytics(db: Session, tenant_id: str, user_id: Optional[str] = None):
         """
         Calculate portfolio analytics: allocation, top performers, XIRR
         """
-        from backend.app.modules.finance.utils.financial_math import xirr, categorize_fund
+        from backend.app.modules.finance.utils.financial_math import (
+            categorize_fund, order_cash_flows, order_cash_amount, xirr_percent, BUY_TYPES
+        )
         
-        # Get portfolio data
-        query = db.query(MutualFundHolding).filter(MutualFundHolding.tenant_id == tenant_id)
-        if user_id:
-            query = query.filter(MutualFundHolding.user_id == user_id)
-        holdings = query.all()
+        # Valued portfolio (one joined read); reused for allocation, performers and XIRR
+        portfolio_data = MutualFundService.get_portfolio(db, tenant_id, user_id)
         
-        if not holdings:
+        if not portfolio_data:
             return {
                 "asset_allocation": {"equity": 0, "debt": 0, "hybrid": 0, "other": 0},
                 "category_allocation": {},
@@ -1119,11 +1093,10 @@ class MutualFundService:
         category_allocation = {}
         total_value = 0.0
         
-        for h in holdings:
-            meta = db.query(MutualFundsMeta).filter(MutualFundsMeta.scheme_code == h.scheme_code).first()
-            raw_category = meta.category if meta else "Other"
+        for item in portfolio_data:
+            raw_category = item["category"]
             asset_type = categorize_fund(raw_category)
-            current_val = float(h.current_value or 0.0)
+            current_val = item["current_value"]
             
             allocation[asset_type] += current_val
             
@@ -1139,9 +1112,6 @@ class MutualFundService:
             allocation = {k: round((v / total_value) * 100, 2) for k, v in allocation.items()}
             category_allocation = {k: round((v / total_value) * 100, 2) for k, v in category_allocation.items()}
         
-        # Get portfolio with P/L for top performers
-        portfolio_data = MutualFundService.get_portfolio(db, tenant_id, user_id)
-        
         # Calculate P/L percentage for sorting
         for item in portfolio_data:
             invested = item.get('invested_value', 0)
@@ -1158,10 +1128,7 @@ class MutualFundService:
         
         # Calculate XIRR
         # Get all transactions for EXISTING holdings only (Same as timeline)
-        h_q = db.query(MutualFundHolding.id).filter(MutualFundHolding.tenant_id == tenant_id)
-        if user_id:
-            h_q = h_q.filter(MutualFundHolding.user_id == user_id)
-        active_holding_ids = [h.id for h in h_q.all()]
+        active_holding_ids = [item["id"] for item in portfolio_data]
         
         o_q = db.query(MutualFundOrder).filter(
             MutualFundOrder.tenant_id == tenant_id,
@@ -1176,36 +1143,8 @@ class MutualFundService:
         total_invested = 0.0
         
         if orders and len(orders) > 0:
-            from datetime import date
-            cash_flows = []
-            for order in orders:
-                # Use units * nav if amount is 0 (fallback for older imports)
-                amount = float(order.amount)
-                if amount <= 0:
-                    amount = float(order.units) * float(order.nav)
-                
-                # Convert order_date to date if it's datetime
-                order_date = order.order_date.date() if hasattr(order.order_date, 'date') else order.order_date
-                
-                if order.type == "BUY" or order.type == "DEBIT":
-                    cash_flows.append((order_date, -amount))  # Outflow is negative
-                    total_invested += amount
-                elif order.type == "SELL" or order.type == "CREDIT":
-                    cash_flows.append((order_date, amount))  # Inflow is positive
-            
-            # Add current value as final inflow at today's date
-            if total_value > 0:
-                cash_flows.append((date.today(), total_value))
-            
-            
-            try:
-                # Need at least one negative (outflow) and one positive (inflow) for XIRR
-                sum_out = sum(cf[1] for cf in cash_flows if cf[1] < 0)
-                if len(cash_flows) >= 2 and abs(sum_out) > 0.01:
-                    xirr_decimal = xirr(cash_flows)
-                    xirr_value = round(xirr_decimal * 100, 2)  # Convert to percentage
-            except Exception:
-                xirr_value = None
+            total_invested = sum(order_cash_amount(o) for o in orders if o.type in BUY_TYPES)
+            xirr_value = xirr_percent(order_cash_flows(orders, total_value))
         
         return {
             "asset_allocation": allocation,
@@ -1221,54 +1160,96 @@ class MutualFundService:
     def clear_timeline_cache(db: Session, tenant_id: str, from_date=None):
         """
         Clear timeline cache for a tenant.
-        Call this when transactions are added/deleted to invalidate cache.
         
         Args:
             tenant_id: Tenant ID
             from_date: Clear cache from this date onwards (defaults to all)
         """
+        with _db_write_lock:
+            deleted_count = MutualFundService._invalidate_timeline_cache(db, tenant_id, from_date)
+            MutualFundService._safe_commit(db)
+            return deleted_count
+
+    @staticmethod
+    def _invalidate_timeline_cache(db: Session, tenant_id: str, from_date=None) -> int:
+        """
+        Drop cached snapshots (every user scope) and net worth snapshots on or after
+        `from_date`, without committing.
+
+        A snapshot only depends on orders dated on or before it, so when orders are
+        added, removed or re-assigned, snapshots before the earliest affected order
+        date stay valid. Callers run this inside their own write transaction.
+        """
         from ..models import PortfolioTimelineCache
-        
+        from .net_worth_service import NetWorthService
+
+        # Net worth snapshots include the portfolio value, so they go stale from the same date
+        NetWorthService.invalidate(db, tenant_id, from_date)
+
         query = db.query(PortfolioTimelineCache).filter(
             PortfolioTimelineCache.tenant_id == tenant_id
         )
-        
         if from_date:
+            if not isinstance(from_date, datetime):
+                from_date = datetime.combine(from_date, datetime.min.time())
             query = query.filter(PortfolioTimelineCache.snapshot_date >= from_date)
-        
-        deleted_count = query.delete()
-        db.commit()
-        return deleted_count
+        return query.delete(synchronize_session=False)
+
+    @staticmethod
+    def _earliest_order_date(db: Session, tenant_id: str, *criteria):
+        """Earliest order_date among the tenant's orders matching `criteria` (None if there are none)."""
+        from sqlalchemy import func
+        return db.query(func.min(MutualFundOrder.order_date)).filter(
+            MutualFundOrder.tenant_id == tenant_id, *criteria
+        ).scalar()
     
     @staticmethod
-    def get_performance_timeline(db: Session, tenant_id: str, period: str = "1y", granularity: str = "1w", user_id: Optional[str] = None):
+    def _timeline_orders(db: Session, tenant_id: str, user_id: Optional[str] = None) -> List[MutualFundOrder]:
         """
-        Calculate portfolio value over time with smart caching.
-        
-        Returns timeline data with portfolio value and invested amount at weekly intervals.
+        Orders of the scope's EXISTING holdings, oldest first.
+        This prevents orphaned orders from deleted holdings from inflating the timeline.
         """
-        from datetime import date, timedelta
-        from ..utils.financial_math import calculate_start_date, add_months
-        from ..models import PortfolioTimelineCache
-        import httpx
-        import hashlib
-        
-        # Get all transactions for EXISTING holdings only
-        # This prevents orphaned orders from deleted holdings from inflating the timeline
         holdings_query = db.query(MutualFundHolding.id).filter(MutualFundHolding.tenant_id == tenant_id)
         if user_id:
             holdings_query = holdings_query.filter(MutualFundHolding.user_id == user_id)
-        holdings = holdings_query.all()
-        active_holding_ids = [h.id for h in holdings]
         
         orders_query = db.query(MutualFundOrder).filter(
             MutualFundOrder.tenant_id == tenant_id,
-            MutualFundOrder.holding_id.in_(active_holding_ids)
+            MutualFundOrder.holding_id.in_(holdings_query)
         )
         if user_id:
             orders_query = orders_query.filter(MutualFundOrder.user_id == user_id)
         
-        orders = orders_query.order_by(MutualFundOrder.order_date.asc()).all()
+        return orders_query.order_by(MutualFundOrder.order_date.asc()).all()
+
+    @staticmethod
+    def get_portfolio_values(db: Session, tenant_id: str, dates: List[date], user_id: Optional[str] = None) -> List[float]:
+        """Portfolio value at each of the given dates (ascending), priced from the local NAV store."""
+        from ..utils.timeline_engine import PortfolioTimelineEngine
+        from .nav_history_service import NavHistoryService
+
+        orders = MutualFundService._timeline_orders(db, tenant_id, user_id)
+        if not orders or not dates:
+            return [0.0] * len(dates)
+        nav_histories = NavHistoryService.get_histories(db, sorted({str(o.scheme_code) for o in orders}))
+        values = PortfolioTimelineEngine(orders, nav_histories=nav_histories).evaluate(dates).value
+        return [float(v) for v in values]
+
+    @staticmethod
+    def get_performance_timeline(db: Session, tenant_id: str, period: str = "1y", granularity: str = "1w", user_id: Optional[str] = None):
+        """
+        Calculate portfolio value over time with smart caching.
+        
+        Returns timeline data with portfolio value and invested amount at weekly intervals.
+        """
+        from datetime import date, timedelta
+        from ..utils.financial_math import calculate_start_date, add_months
+        from ..utils.timeline_engine import PortfolioTimelineEngine
+        from ..models import PortfolioTimelineCache
+        from .nav_history_service import NavHistoryService
+        import hashlib
+        
+        orders = MutualFundService._timeline_orders(db, tenant_id, user_id)
         
         if not orders:
             return {
@@ -1277,13 +1258,12 @@ class MutualFundService:
                 "total_return_percent": 0
             }
         
-        # Calculate portfolio hash (sorted scheme codes + user_id)
+        # Cache scope: the whole family or one member. Order changes invalidate
+        # the scope's snapshots from the earliest affected date instead of
+        # changing the key (see _invalidate_timeline_cache).
+        scope = f"user:{user_id}" if user_id else "tenant"
+        portfolio_hash = hashlib.md5(scope.encode()).hexdigest()
         unique_schemes = sorted(set(str(o.scheme_code) for o in orders))
-        hash_input = ",".join(unique_schemes)
-        if user_id:
-            hash_input += f"|user:{user_id}"
-            
-        portfolio_hash = hashlib.md5(hash_input.encode()).hexdigest()
         
         # Determine date range and granularity
         end_date = date.today() - timedelta(days=1)
@@ -1305,8 +1285,13 @@ class MutualFundService:
             if days_until_monday > 0:
                 start_date = start_date + timedelta(days=days_until_monday)
         
-        # Try to fetch cached snapshots
-        cached_snapshots = db.query(PortfolioTimelineCache).filter(
+        # Try to fetch cached snapshots (one range read on the composite index)
+        cached_snapshots = db.query(
+            PortfolioTimelineCache.snapshot_date,
+            PortfolioTimelineCache.portfolio_value,
+            PortfolioTimelineCache.invested_value,
+            PortfolioTimelineCache.benchmark_value
+        ).filter(
             PortfolioTimelineCache.tenant_id == tenant_id,
             PortfolioTimelineCache.portfolio_hash == portfolio_hash,
             PortfolioTimelineCache.snapshot_date >= start_date,
@@ -1315,179 +1300,90 @@ class MutualFundService:
         
         # Convert cached snapshots to dict for easy lookup
         cache_dict = {}
-        for snap in cached_snapshots:
+        for snapshot_date, portfolio_value, invested_value, benchmark_value in cached_snapshots:
             # Self-Healing: Ignore cached entries with 0 value if investment exists (indicates failed NAV fetch previously)
-            if snap.portfolio_value == 0 and snap.invested_value > 0:
+            if portfolio_value == 0 and invested_value > 0:
+                continue
+            # Rows written before benchmark values were stored are recomputed
+            if benchmark_value is None:
                 continue
                 
-            cache_dict[snap.snapshot_date.date()] = {
-                "date": snap.snapshot_date.date().isoformat(),
-                "value": float(snap.portfolio_value),
-                "invested": float(snap.invested_value),
-                "benchmark_value": float(getattr(snap, 'benchmark_value', 0.0) or 0.0)
+            cache_dict[snapshot_date.date()] = {
+                "date": snapshot_date.date().isoformat(),
+                "value": float(portfolio_value),
+                "invested": float(invested_value),
+                "benchmark_value": float(benchmark_value)
             }
         
-        # Convert cached snapshots to dict for easy lookup
-        
-        # Generate snapshots
-        timeline = []
+        # Snapshot dates
+        snapshot_dates = []
         current_date = start_date
-        
-        # Bulk NAV data cache to avoid repeated API calls per scheme
-        # {scheme_code: {date_str: nav}}
-        bulk_nav_data = {}
-        
-        def get_nav_bulk(scheme_code: str):
-            if scheme_code in bulk_nav_data:
-                return bulk_nav_data[scheme_code]
-            
-            try:
-                import httpx
-                resp = httpx.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=10.0)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    nav_map = {entry['date']: float(entry['nav']) for entry in data.get('data', [])}
-                    bulk_nav_data[scheme_code] = nav_map
-                    return nav_map
-            except Exception as e:
-                pass
-            return {}
-
-        def find_closest_nav(nav_map, target_date):
-            if not nav_map: return 0.0
-            
-            # Try exact match first (API format is DD-MM-YYYY)
-            target_str = target_date.strftime("%d-%m-%Y")
-            if target_str in nav_map:
-                return nav_map[target_str]
-            
-            # Look back up to 7 days
-            for i in range(1, 8):
-                prev_date = target_date - timedelta(days=i)
-                prev_str = prev_date.strftime("%d-%m-%Y")
-                if prev_str in nav_map:
-                    return nav_map[prev_str]
-            
-            # Fallback to any latest available if none in range
-            # (In a real app, you might want more complex logic here)
-            return next(iter(nav_map.values())) if nav_map else 0.0
-        
-        
         while current_date <= end_date:
-            # Check if this snapshot is cached
-            if current_date in cache_dict and current_date < end_date:
-                # Use cached value
-                timeline.append(cache_dict[current_date])
-            else:
-                # Calculate holdings snapshot at this date
-                holdings_snapshot = {}  # {scheme_code: units}
-                invested_at_date = 0
-                buy_total = 0
-                sell_total = 0
-                
-                for order in orders:
-                    order_date = order.order_date.date() if hasattr(order.order_date, 'date') else order.order_date
-                    
-                    if order_date <= current_date:
-                        scheme_code = str(order.scheme_code)
-                        
-                        if order.type == "BUY" or order.type == "DEBIT":
-                            holdings_snapshot[scheme_code] = holdings_snapshot.get(scheme_code, 0) + float(order.units)
-                            invested_at_date += float(order.amount)
-                            buy_total += float(order.amount)
-                        elif order.type == "SELL" or order.type == "CREDIT":
-                            holdings_snapshot[scheme_code] = holdings_snapshot.get(scheme_code, 0) - float(order.units)
-                            invested_at_date -= float(order.amount)
-                            sell_total += float(order.amount)
-                
-                
-                # Calculate portfolio value at this date
-                portfolio_value = 0
-                nav_fetched = 0
-                nav_fallback = 0
-                
-                for scheme_code, units in holdings_snapshot.items():
-                    if units > 0:
-                        try:
-                            if scheme_code not in bulk_nav_data:
-                                get_nav_bulk(scheme_code)
-                            
-                            nav = find_closest_nav(bulk_nav_data.get(scheme_code, {}), current_date)
-                            portfolio_value += units * nav
-                            nav_fetched += 1
-                        except Exception as e:
-                            # Use current NAV as fallback if API/Cache fails
-                            holding = db.query(MutualFundHolding).filter(
-                                MutualFundHolding.scheme_code == scheme_code,
-                                MutualFundHolding.tenant_id == tenant_id
-                            ).first()
-                            if holding and holding.last_nav:
-                                portfolio_value += units * float(holding.last_nav)
-                                nav_fallback += 1
-                
-                
-                # Calculate Benchmark (Nifty 50 Proxy: 120716)
-                benchmark_value = 0.0
-                try:
-                    BENCHMARK_SCHEME = "120716"
-                    if BENCHMARK_SCHEME not in bulk_nav_data:
-                        get_nav_bulk(BENCHMARK_SCHEME)
-                    
-                    bm_nav = find_closest_nav(bulk_nav_data.get(BENCHMARK_SCHEME, {}), current_date)
-                    
-                    shadow_units = 0.0
-                    for order in orders:
-                        o_date = order.order_date.date() if hasattr(order.order_date, 'date') else order.order_date
-                        if o_date <= current_date:
-                            hist_bm_nav = find_closest_nav(bulk_nav_data.get(BENCHMARK_SCHEME, {}), o_date)
-                            if hist_bm_nav > 0:
-                                amt = float(order.amount)
-                                # Approximate amount if 0 using units * nav
-                                if amt <= 0: amt = float(order.units) * float(order.nav)
-                                
-                                if order.type == "BUY" or order.type == "DEBIT":
-                                    shadow_units += (amt / hist_bm_nav)
-                                elif order.type == "SELL" or order.type == "CREDIT":
-                                    shadow_units -= (amt / hist_bm_nav)
-                    
-                    benchmark_value = max(0, shadow_units * bm_nav)
-                except Exception:
-                    benchmark_value = 0.0
-
-                snapshot_data = {
-                    "date": current_date.isoformat(),
-                    "value": round(portfolio_value, 2),
-                    "invested": round(invested_at_date, 2),
-                    "benchmark_value": round(benchmark_value, 2)
-                }
-                timeline.append(snapshot_data)
-                
-                # Save to cache if not today
-                if current_date < end_date:
-                    # Sanity Check: Don't cache if value is 0 but we have investment (means NAV fetch failed)
-                    if portfolio_value == 0 and invested_at_date > 0:
-                        pass
-                    else:
-                        from datetime import datetime as dt
-                        cache_entry = PortfolioTimelineCache(
-                            tenant_id=tenant_id,
-                            snapshot_date=dt.combine(current_date, dt.min.time()),
-                            portfolio_hash=portfolio_hash,
-                            portfolio_value=round(portfolio_value, 2),
-                            invested_value=round(invested_at_date, 2)
-                        )
-                        db.add(cache_entry)
-            
-            # Move to next snapshot date
+            snapshot_dates.append(current_date)
             # Move to next date based on granularity
             if granularity == "1m":
                 current_date = add_months(current_date, 1)
             else:
                 current_date = current_date + timedelta(days=snapshot_days)
-            
-            # Don't overshoot end date
-            if current_date > end_date:
-                break
+        
+        # Only snapshots missing from the cache are priced. A snapshot depends only
+        # on the orders before it, so evaluating a subset of dates is exact.
+        missing_dates = [d for d in snapshot_dates if d not in cache_dict]
+        computed = {}
+        unpriced_dates = set()
+        if missing_dates:
+            # NAV histories for every scheme plus the benchmark, loaded in one query
+            try:
+                nav_histories = NavHistoryService.get_histories(db, unique_schemes + [BENCHMARK_SCHEME_CODE])
+            except Exception as e:
+                logger.warning(f"[Timeline] Failed to load NAV histories: {e}")
+                nav_histories = {}
+            
+            # Orders are folded once into a cumulative units matrix and valued against a
+            # forward-filled NAV matrix, so all snapshots are priced as array operations
+            engine = PortfolioTimelineEngine(
+                orders,
+                nav_histories=nav_histories,
+                benchmark_history=nav_histories.get(BENCHMARK_SCHEME_CODE)
+            )
+            values, invested_values, benchmark_values, priced = engine.evaluate(missing_dates)
+            for i, current_date in enumerate(missing_dates):
+                computed[current_date] = {
+                    "date": current_date.isoformat(),
+                    "value": round(float(values[i]), 2),
+                    "invested": round(float(invested_values[i]), 2),
+                    "benchmark_value": round(float(benchmark_values[i]), 2)
+                }
+                if not priced[i]:
+                    unpriced_dates.add(current_date)
+        
+        timeline = []
+        benchmark_timeline = []
+        new_rows = []
+        for current_date in snapshot_dates:
+            snapshot_data = cache_dict.get(current_date)
+            if snapshot_data is None:
+                snapshot_data = computed[current_date]
+                # Save to cache if not today.
+                # Sanity Check: Don't cache if a held scheme had no NAV (its history failed to load)
+                if current_date < end_date and current_date not in unpriced_dates:
+                    new_rows.append({
+                        "id": str(uuid.uuid4()),
+                        "tenant_id": tenant_id,
+                        "snapshot_date": datetime.combine(current_date, datetime.min.time()),
+                        "portfolio_hash": portfolio_hash,
+                        "portfolio_value": snapshot_data["value"],
+                        "invested_value": snapshot_data["invested"],
+                        "benchmark_value": snapshot_data["benchmark_value"],
+                        "created_at": datetime.utcnow()
+                    })
+            timeline.append(snapshot_data)
+            
+            # Benchmark (Nifty 50 proxy): simulates actual investment timing (SIPs/Lumpsums)
+            benchmark_timeline.append({
+                "date": snapshot_data["date"],
+                "value": snapshot_data["benchmark_value"]
+            })
         
         # Calculate total return
         total_return_percent = 0
@@ -1497,63 +1393,21 @@ class MutualFundService:
                 timeline[-1]["invested"] * 100
             )
         
-        # Commit cache entries to database
-        try:
+        # Upsert new snapshots: replace any stale rows for the same dates, then one bulk insert
+        if new_rows:
+            table = PortfolioTimelineCache.__table__
             with _db_write_lock:
-                MutualFundService._safe_commit(db)
-        except Exception as e:
-            # Silent fail or log properly
-            db.rollback()
-        
-        # Calculate Benchmark (Nifty 50 proxy: 120716)
-        # Instead of simple normalization, we simulate actual investment timing (SIPs/Lumpsums)
-        benchmark_timeline = []
-        try:
-            benchmark_code = "120716" # UTI Nifty 50 Index Fund
-            get_nav_bulk(benchmark_code)
-            b_nav_map = bulk_nav_data.get(benchmark_code, {})
-
-            total_benchmark_units = 0.0
-            order_idx = 0
-            
-            for point in timeline:
-                p_date_iso = point["date"]
-                p_date = date.fromisoformat(p_date_iso)
-                
-                # Check for any transactions UP TO this snapshot date
-                while order_idx < len(orders):
-                    order = orders[order_idx]
-                    o_date = order.order_date.date() if hasattr(order.order_date, 'date') else order.order_date
-                    
-                    if o_date <= p_date:
-                        # Fetch index NAV on this transaction date
-                        o_nav = find_closest_nav(b_nav_map, o_date)
-                        if o_nav > 0:
-                            # Use units * nav if amount is 0 (fallback)
-                            amount = float(order.amount)
-                            if amount <= 0:
-                                amount = float(order.units) * float(order.nav)
-                                
-                            if order.type == "BUY" or order.type == "DEBIT":
-                                total_benchmark_units += (amount / o_nav)
-                            elif order.type == "SELL" or order.type == "CREDIT":
-                                # Proportionally sell benchmark units based on value ratio
-                                # We'll just sell the same equivalent cash value for simplicity
-                                total_benchmark_units -= (amount / o_nav)
-                        order_idx += 1
-                    else:
-                        break
-                
-                # Nifty 50 value today = total units * current snapshot NAV
-                p_nav = find_closest_nav(b_nav_map, p_date)
-                simulated_value = total_benchmark_units * p_nav
-                
-                benchmark_timeline.append({
-                    "date": p_date_iso,
-                    "value": round(simulated_value, 2)
-                })
-        except Exception as b_err:
-            benchmark_timeline = []
+                try:
+                    db.execute(table.delete().where(
+                        table.c.tenant_id == tenant_id,
+                        table.c.portfolio_hash == portfolio_hash,
+                        table.c.snapshot_date.in_([r["snapshot_date"] for r in new_rows])
+                    ))
+                    db.execute(table.insert(), new_rows)
+                    MutualFundService._safe_commit(db)
+                except Exception as e:
+                    logger.warning(f"[Timeline] Failed to store snapshots: {e}")
+                    db.rollback()
 
         return {
             "timeline": timeline,
@@ -1563,51 +1417,3 @@ class MutualFundService:
             "total_return_percent": round(total_return_percent, 2)
         }
     
-    @staticmethod
-    def _fetch_historical_nav(scheme_code: str, target_date) -> float:
-        """
-        Fetch NAV for a specific date from mfapi.in.
-        Falls back to nearest available NAV if exact date not found.
-        """
-        import httpx
-        from datetime import timedelta
-        
-        try:
-            # mfapi.in provides historical data in reverse chronological order
-            response = httpx.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=5.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'data' not in data:
-                raise ValueError("No NAV data available")
-            
-            # Format target date as DD-MM-YYYY to match API format
-            target_date_str = target_date.strftime("%d-%m-%Y")
-            
-            # Try to find exact date first
-            for entry in data['data']:
-                if entry['date'] == target_date_str:
-                    return float(entry['nav'])
-            
-            # If not found, find closest date within 7 days before
-            target_timestamp = target_date
-            for entry in data['data']:
-                try:
-                    from datetime import datetime
-                    entry_date = datetime.strptime(entry['date'], "%d-%m-%Y").date()
-                    
-                    # Use NAV from up to 7 days before target
-                    if entry_date <= target_date and (target_date - entry_date).days <= 7:
-                        return float(entry['nav'])
-                except:
-                    continue
-            
-            # If still not found, use the latest available NAV
-            if data['data']:
-                return float(data['data'][0]['nav'])
-            
-            raise ValueError("No suitable NAV found")
-            
-        except Exception as e:
-            pass
-            raise
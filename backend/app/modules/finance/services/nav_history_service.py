@@ -0,0 +1,273 @@
+import logging
+import threading
+import time
+from datetime import datetime, date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from backend.app.core.database import SessionLocal
+from backend.app.core.http_client import http_get, fetch_concurrently
+from backend.app.modules.finance.models import MutualFundNavHistory, MutualFundHolding
+from backend.app.modules.finance.utils.nav_series import NavSeries
+from backend.app.modules.finance.services.mutual_funds import (
+    MFAPI_BASE_URL, BENCHMARK_SCHEME_CODE, _db_write_lock
+)
+
+logger = logging.getLogger(__name__)
+
+# Schemes the upstream failed to serve on a cold read are not retried inline
+# for this long, so a dead mfapi.in does not stall every request.
+COLD_FETCH_RETRY_SECONDS = 300
+_cold_fetch_failures: Dict[str, float] = {}
+# Cold fetches in progress, shared by request threads and the quote revalidator,
+# so each scheme is downloaded once however many callers want it
+COLD_FETCH_WAIT_SECONDS = 15
+_cold_fetches: Dict[str, threading.Event] = {}
+_cold_fetch_lock = threading.Lock()
+
+NavPoint = Tuple[date, float]
+
+
+class NavHistoryService:
+    """
+    Local NAV history store backed by the `mutual_fund_nav_history` table.
+
+    Readers are served from the database only. The upstream series is downloaded
+    once per scheme on first use and afterwards appended to by the scheduled
+    refresher, which inserts only dates newer than the latest stored one.
+    """
+
+    @staticmethod
+    def _download(scheme_code: str, timeout: float = 10.0) -> List[NavPoint]:
+        """Fetch the full upstream series for a scheme, oldest first."""
+        response = http_get(f"{MFAPI_BASE_URL}/{scheme_code}", timeout=timeout)
+        if response.status_code != 200:
+            return []
+
+        points = {}
+        for entry in response.json().get("data", []):
+            try:
+                nav_date = datetime.strptime(entry["date"], "%d-%m-%Y").date()
+                # mfapi.in occasionally repeats a date; keep the newest entry (listed first)
+                if nav_date not in points:
+                    points[nav_date] = float(entry["nav"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return sorted(points.items())
+
+    @staticmethod
+    def get_latest_date(db: Session, scheme_code: str) -> Optional[date]:
+        return db.query(func.max(MutualFundNavHistory.nav_date)).filter(
+            MutualFundNavHistory.scheme_code == str(scheme_code)
+        ).scalar()
+
+    @staticmethod
+    def _store(scheme_code: str, points: List[NavPoint]) -> int:
+        """
+        Insert the points newer than the latest stored date. Returns rows inserted.
+
+        Writes through a session of its own: a request session may hold an older
+        snapshot (and unrelated pending work). Dates another writer stored in the
+        meantime are skipped, so concurrent fetches of one scheme are harmless.
+        """
+        if not points:
+            return 0
+
+        with _db_write_lock:
+            session = SessionLocal()
+            try:
+                latest = NavHistoryService.get_latest_date(session, scheme_code)
+                new_rows = [
+                    {"scheme_code": scheme_code, "nav_date": d, "nav": nav, "created_at": datetime.utcnow()}
+                    for d, nav in points if latest is None or d > latest
+                ]
+                if not new_rows:
+                    return 0
+
+                table = MutualFundNavHistory.__table__
+                stmt = insert(table).values(new_rows).on_conflict_do_nothing(
+                    index_elements=["scheme_code", "nav_date"]
+                ).returning(table.c.nav_date)
+                inserted = len(session.execute(stmt).fetchall())
+                session.commit()
+                return inserted
+            except Exception as e:
+                session.rollback()
+                logger.warning(f"[NAV] Failed to store history for {scheme_code}: {e}")
+                return 0
+            finally:
+                session.close()
+
+    @staticmethod
+    def refresh_schemes(scheme_codes: Iterable[str]) -> Dict[str, int]:
+        """
+        Append upstream NAVs newer than the local copy for several schemes.
+
+        Downloads run concurrently over the shared HTTP client; rows are written
+        one scheme at a time. Returns {scheme_code: rows inserted}. Upstream
+        errors are logged and leave that scheme's history untouched.
+        """
+        codes = sorted({str(c) for c in scheme_codes if c})
+
+        def download(code: str) -> List[NavPoint]:
+            try:
+                return NavHistoryService._download(code)
+            except Exception as e:
+                logger.warning(f"[NAV] Upstream fetch failed for {code}: {e}")
+                return []
+
+        downloads = fetch_concurrently(download, codes)
+        return {code: NavHistoryService._store(code, points) for code, points in zip(codes, downloads)}
+
+    @staticmethod
+    def refresh_scheme(scheme_code: str) -> int:
+        """Append upstream NAVs newer than the local copy. Returns the number of rows inserted."""
+        return NavHistoryService.refresh_schemes([scheme_code]).get(str(scheme_code), 0)
+
+    @staticmethod
+    def stored_scheme_codes(db: Session, scheme_codes: Iterable[str]) -> Set[str]:
+        """The subset of schemes that have any local NAV rows."""
+        codes = {str(c) for c in scheme_codes if c}
+        if not codes:
+            return set()
+        return {
+            row[0] for row in db.query(MutualFundNavHistory.scheme_code).filter(
+                MutualFundNavHistory.scheme_code.in_(codes)
+            ).distinct().all()
+        }
+
+    @staticmethod
+    def ensure_history(db: Session, scheme_codes: Iterable[str]) -> Set[str]:
+        """
+        Download the series for any scheme that has no local rows yet.
+
+        A scheme already being fetched by another thread is waited for rather
+        than downloaded again. Returns the missing schemes that now have rows;
+        `db` does not see them until its transaction ends, so read them through
+        a fresh session.
+        """
+        codes = {str(c) for c in scheme_codes if c}
+        if not codes:
+            return set()
+
+        present = NavHistoryService.stored_scheme_codes(db, codes)
+
+        now = time.monotonic()
+        missing = [
+            code for code in codes - present
+            if code not in _cold_fetch_failures or now - _cold_fetch_failures[code] >= COLD_FETCH_RETRY_SECONDS
+        ]
+        if not missing:
+            return set()
+
+        owned, pending = [], []
+        with _cold_fetch_lock:
+            for code in missing:
+                if code in _cold_fetches:
+                    pending.append(_cold_fetches[code])
+                else:
+                    _cold_fetches[code] = threading.Event()
+                    owned.append(code)
+        try:
+            NavHistoryService.refresh_schemes(owned)
+        finally:
+            with _cold_fetch_lock:
+                for code in owned:
+                    _cold_fetches.pop(code).set()
+        for event in pending:
+            event.wait(COLD_FETCH_WAIT_SECONDS)
+
+        # Rows may come from this call or from a concurrent fetch of the same scheme
+        session = SessionLocal()
+        try:
+            fetched = NavHistoryService.stored_scheme_codes(session, missing)
+        finally:
+            session.close()
+        for code in owned:
+            if code in fetched:
+                _cold_fetch_failures.pop(code, None)
+            else:
+                _cold_fetch_failures[code] = now
+        return fetched
+
+    @staticmethod
+    def get_histories(db: Session, scheme_codes: Iterable[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, NavSeries]:
+        """Load the NAV series of several schemes in one query, oldest first per scheme."""
+        codes = {str(c) for c in scheme_codes if c}
+        if not codes:
+            return {}
+
+        fetched = NavHistoryService.ensure_history(db, codes)
+
+        session = SessionLocal() if fetched else db
+        try:
+            query = session.query(
+                MutualFundNavHistory.scheme_code,
+                MutualFundNavHistory.nav_date,
+                MutualFundNavHistory.nav
+            ).filter(MutualFundNavHistory.scheme_code.in_(codes))
+            if start_date:
+                query = query.filter(MutualFundNavHistory.nav_date >= start_date)
+            if end_date:
+                query = query.filter(MutualFundNavHistory.nav_date <= end_date)
+            rows = query.order_by(MutualFundNavHistory.scheme_code, MutualFundNavHistory.nav_date).all()
+        finally:
+            if session is not db:
+                session.close()
+
+        histories = {code: NavSeries() for code in codes}
+        for code, nav_date, nav in rows:
+            histories[code].append(nav_date, nav)
+        return histories
+
+    @staticmethod
+    def get_history(db: Session, scheme_code: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> NavSeries:
+        return NavHistoryService.get_histories(db, [scheme_code], start_date, end_date).get(str(scheme_code), NavSeries())
+
+    @staticmethod
+    def get_recent_navs(db: Session, scheme_codes: Iterable[str], points: int = 30, fetch_missing: bool = True) -> Dict[str, NavSeries]:
+        """
+        Last `points` NAVs per scheme (oldest first), used for current NAV and sparklines.
+
+        With `fetch_missing=False` only the local store is read, even for schemes
+        that have no history yet.
+        """
+        codes = {str(c) for c in scheme_codes if c}
+        if not codes:
+            return {}
+
+        fetched = NavHistoryService.ensure_history(db, codes) if fetch_missing else set()
+
+        rn = func.row_number().over(
+            partition_by=MutualFundNavHistory.scheme_code,
+            order_by=MutualFundNavHistory.nav_date.desc()
+        ).label("rn")
+        session = SessionLocal() if fetched else db
+        try:
+            recent = session.query(
+                MutualFundNavHistory.scheme_code,
+                MutualFundNavHistory.nav_date,
+                MutualFundNavHistory.nav,
+                rn
+            ).filter(MutualFundNavHistory.scheme_code.in_(codes)).subquery()
+
+            rows = session.query(recent.c.scheme_code, recent.c.nav_date, recent.c.nav).filter(
+                recent.c.rn <= points
+            ).order_by(recent.c.scheme_code, recent.c.nav_date).all()
+        finally:
+            if session is not db:
+                session.close()
+
+        result = {code: NavSeries() for code in codes}
+        for code, nav_date, nav in rows:
+            result[code].append(nav_date, nav)
+        return result
+
+    @staticmethod
+    def refresh_all(db: Session) -> int:
+        """Append new NAVs for every held scheme plus the timeline benchmark."""
+        codes = {row[0] for row in db.query(MutualFundHolding.scheme_code).distinct().all()}
+        codes.add(BENCHMARK_SCHEME_CODE)
+
+        return sum(NavHistoryService.refresh_schemes(codes).values())
@@ -0,0 +1,154 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from sqlalchemy.orm import Session
+from backend.app.core.database import SessionLocal
+from backend.app.modules.finance.utils.nav_series import NavSeries
+from backend.app.modules.finance.services.nav_history_service import NavHistoryService
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+# AMFI NAVs for a business day are normally on mfapi.in by late evening IST
+NAV_PUBLISH_TIME_IST = time(21, 0)
+# A quote that is behind the expected NAV date (upstream lag, market holiday)
+# is re-checked this often rather than on every request
+STALE_RETRY_SECONDS = 30 * 60
+SPARKLINE_POINTS = 30
+
+
+class _Quote(NamedTuple):
+    series: NavSeries
+    expires_at: datetime
+
+
+_quotes: Dict[str, _Quote] = {}
+_inflight: Set[str] = set()
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _latest_expected_nav_date(now_ist: datetime) -> date:
+    """The most recent business day whose NAV should already be published."""
+    day = now_ist.date()
+    if now_ist.time() < NAV_PUBLISH_TIME_IST:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def _next_publication(now_ist: datetime) -> datetime:
+    day = now_ist.date()
+    if now_ist.time() >= NAV_PUBLISH_TIME_IST:
+        day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return datetime.combine(day, NAV_PUBLISH_TIME_IST, tzinfo=IST)
+
+
+def _is_current(series: NavSeries, now: datetime) -> bool:
+    latest = series.latest()
+    return bool(latest) and latest[0] >= _latest_expected_nav_date(now.astimezone(IST))
+
+
+def _expiry(series: NavSeries, now: datetime) -> datetime:
+    """Up-to-date quotes stay fresh until the next NAV publication; lagging ones are retried sooner."""
+    if _is_current(series, now):
+        return _next_publication(now.astimezone(IST))
+    return now + timedelta(seconds=STALE_RETRY_SECONDS)
+
+
+class NavQuoteCache:
+    """
+    Process-wide stale-while-revalidate cache of current NAV + sparkline per scheme.
+
+    Quotes are served from memory. A quote that has expired (a new NAV should be
+    out) is still returned as-is while a background worker appends the new NAVs
+    to the local history store and reloads the quote. Revalidation is coalesced
+    per scheme, so concurrent requests from any tenant trigger at most one
+    upstream fetch per scheme. Schemes without local history are fetched in the
+    background too; the request never waits on mfapi.in.
+    """
+
+    @staticmethod
+    def get_quotes(db: Session, scheme_codes: Iterable[str]) -> Dict[str, NavSeries]:
+        """Last SPARKLINE_POINTS NAVs per scheme (oldest first); empty series if none are known yet."""
+        codes = {str(c) for c in scheme_codes if c}
+        now = datetime.now(timezone.utc)
+
+        result: Dict[str, NavSeries] = {}
+        missing, stale = [], []
+        with _lock:
+            for code in codes:
+                quote = _quotes.get(code)
+                if quote is None:
+                    missing.append(code)
+                else:
+                    result[code] = quote.series
+                    if quote.expires_at <= now:
+                        stale.append(code)
+
+        if missing:
+            # First sight in this process: a local store read, never an upstream call
+            loaded = NavHistoryService.get_recent_navs(db, missing, points=SPARKLINE_POINTS, fetch_missing=False)
+            NavQuoteCache._store(loaded, now)
+            for code in missing:
+                series = loaded.get(code) or NavSeries()
+                result[code] = series
+                if not _is_current(series, now):
+                    stale.append(code)
+
+        NavQuoteCache._revalidate_async(stale)
+        return result
+
+    @staticmethod
+    def reload(db: Session, scheme_codes: Optional[Iterable[str]] = None) -> None:
+        """Reload quotes from the local store (all cached schemes if none are given)."""
+        if scheme_codes is None:
+            with _lock:
+                scheme_codes = list(_quotes.keys())
+        codes = {str(c) for c in scheme_codes if c}
+        if codes:
+            loaded = NavHistoryService.get_recent_navs(db, codes, points=SPARKLINE_POINTS, fetch_missing=False)
+            NavQuoteCache._store(loaded, datetime.now(timezone.utc))
+
+    @staticmethod
+    def _store(loaded: Dict[str, NavSeries], now: datetime) -> None:
+        with _lock:
+            for code, series in loaded.items():
+                # Unknown schemes are not cached so the next request re-checks the store
+                if series:
+                    _quotes[code] = _Quote(series, _expiry(series, now))
+
+    @staticmethod
+    def _revalidate_async(scheme_codes: List[str]) -> None:
+        global _executor
+        with _lock:
+            todo = [c for c in scheme_codes if c not in _inflight]
+            _inflight.update(todo)
+            if todo and _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="nav-quotes")
+        if todo:
+            _executor.submit(NavQuoteCache._revalidate, todo)
+
+    @staticmethod
+    def _revalidate(scheme_codes: List[str]) -> None:
+        db = SessionLocal()
+        try:
+            stored = NavHistoryService.stored_scheme_codes(db, scheme_codes)
+            # Cold fetches go through ensure_history so failing schemes are throttled and
+            # a scheme a request thread is already fetching is not downloaded twice
+            NavHistoryService.ensure_history(db, [c for c in scheme_codes if c not in stored])
+            NavHistoryService.refresh_schemes(stored)
+            # Rows are written through their own sessions; end this snapshot to see them
+            db.rollback()
+            NavQuoteCache.reload(db, scheme_codes)
+        except Exception as e:
+            logger.warning(f"[NAV] Quote revalidation failed for {len(scheme_codes)} schemes: {e}")
+        finally:
+            db.close()
+            with _lock:
+                _inflight.difference_update(scheme_codes)
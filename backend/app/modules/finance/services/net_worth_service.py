@@ -0,0 +1,246 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from backend.app.modules.auth.models import User
+from backend.app.modules.finance import models
+
+logger = logging.getLogger(__name__)
+
+# Longest range offered by the net worth chart
+BACKFILL_DAYS = 365
+# Trailing days rewritten on every run, so late SMS/email transactions and newly
+# published NAVs are reflected in recent snapshots
+REFRESH_DAYS = 7
+
+# Account type -> snapshot bucket; other account types do not count towards net worth
+BUCKETS = {
+    models.AccountType.BANK: "liquid",
+    models.AccountType.WALLET: "liquid",
+    models.AccountType.CREDIT_CARD: "credit",
+    models.AccountType.LOAN: "loan"
+}
+
+
+def scope_key(user_id: Optional[str] = None) -> str:
+    return f"user:{user_id}" if user_id else "tenant"
+
+
+def _account_filter(query, user_id: Optional[str]):
+    """A member sees their own accounts plus shared family accounts."""
+    if user_id:
+        query = query.filter(or_(models.Account.owner_id == user_id, models.Account.owner_id == None))
+    return query
+
+
+class NetWorthService:
+    """
+    Daily end-of-day net worth snapshots per tenant and member.
+
+    The scheduler backfills up to BACKFILL_DAYS of history once and afterwards
+    only adds the days since the last run (re-writing the trailing REFRESH_DAYS).
+    Account balances are backtracked from current balances with one grouped
+    transactions query and the mutual fund portfolio is priced for all missing
+    days in one pass, so the chart itself is a range read on the primary key.
+
+    Writes that change past closing balances drop the affected snapshots with
+    `invalidate` and the next run refills them. Transaction writes that move
+    the account balance with them (create, import, recurring) only affect
+    days from their date on; the rollup hook covers those. Writes that leave
+    the balance alone (edits, deletes) and balance or account edits shift
+    every earlier day as well, so those paths drop all of the tenant's snapshots.
+    """
+
+    @staticmethod
+    def invalidate(db: Session, tenant_id: str, from_day=None) -> int:
+        """
+        Drop the tenant's snapshots (every scope) on or after `from_day` (all if
+        omitted), without committing. Callers run this inside their own write
+        transaction.
+        """
+        query = db.query(models.NetWorthSnapshot).filter(models.NetWorthSnapshot.tenant_id == tenant_id)
+        if from_day is not None:
+            if isinstance(from_day, datetime):
+                from_day = from_day.date()
+            if from_day >= date.today():
+                # Snapshots stop at yesterday
+                return 0
+            query = query.filter(models.NetWorthSnapshot.snapshot_date >= from_day)
+        return query.delete(synchronize_session=False)
+
+    @staticmethod
+    def _current_balances(db: Session, tenant_id: str, user_id: Optional[str] = None) -> Dict[str, float]:
+        query = _account_filter(db.query(
+            models.Account.type, func.sum(models.Account.balance)
+        ).filter(
+            models.Account.tenant_id == tenant_id,
+            models.Account.type.in_(list(BUCKETS))
+        ), user_id).group_by(models.Account.type)
+
+        balances = {"liquid": 0.0, "credit": 0.0, "loan": 0.0}
+        for account_type, total in query.all():
+            balances[BUCKETS[account_type]] += float(total or 0)
+        return balances
+
+    @staticmethod
+    def compute(db: Session, tenant_id: str, dates: List[date], user_id: Optional[str] = None) -> List[dict]:
+        """
+        End-of-day balances per bucket and portfolio value at each date (ascending).
+
+        A date's closing balance is the current balance minus every transaction
+        dated after it (plus, for liabilities, where spending raises the balance owed).
+        """
+        from backend.app.modules.finance.services.mutual_funds import MutualFundService
+
+        if not dates:
+            return []
+        current = NetWorthService._current_balances(db, tenant_id, user_id)
+
+        # Net transaction amount per bucket and day after the first snapshot date
+        since = datetime.combine(dates[0] + timedelta(days=1), datetime.min.time())
+        day = func.date(models.Transaction.date)
+        rows = _account_filter(db.query(
+            models.Account.type, day, func.sum(models.Transaction.amount)
+        ).join(
+            models.Account, models.Transaction.account_id == models.Account.id
+        ).filter(
+            models.Transaction.tenant_id == tenant_id,
+            models.Transaction.date >= since,
+            models.Account.type.in_(list(BUCKETS))
+        ), user_id).group_by(models.Account.type, day).all()
+        movements = sorted(((d, BUCKETS[t], float(total or 0)) for t, d, total in rows), reverse=True)
+
+        investments = MutualFundService.get_portfolio_values(db, tenant_id, dates, user_id)
+
+        # Walk back from today, accumulating the transactions after each date
+        after = {"liquid": 0.0, "credit": 0.0, "loan": 0.0}
+        pos = 0
+        snapshots = []
+        for i in range(len(dates) - 1, -1, -1):
+            while pos < len(movements) and movements[pos][0] > dates[i]:
+                _, bucket, amount = movements[pos]
+                after[bucket] += amount
+                pos += 1
+            liquid = current["liquid"] - after["liquid"]
+            credit = current["credit"] + after["credit"]
+            loan = current["loan"] + after["loan"]
+            snapshots.append({
+                "date": dates[i],
+                "liquid": round(liquid, 2),
+                "credit": round(credit, 2),
+                "loan": round(loan, 2),
+                "investments": round(investments[i], 2),
+                "total": round(liquid - credit - loan + investments[i], 2)
+            })
+        return snapshots[::-1]
+
+    @staticmethod
+    def snapshot_scope(db: Session, tenant_id: str, user_id: Optional[str] = None, today: Optional[date] = None) -> int:
+        """
+        Write missing snapshots (up to BACKFILL_DAYS back) and refresh the trailing
+        REFRESH_DAYS, through yesterday. Returns rows written.
+        """
+        today = today or date.today()
+        scope = scope_key(user_id)
+        first_day = today - timedelta(days=BACKFILL_DAYS)
+        refresh_from = today - timedelta(days=REFRESH_DAYS)
+
+        stored = {
+            d for (d,) in db.query(models.NetWorthSnapshot.snapshot_date).filter(
+                models.NetWorthSnapshot.tenant_id == tenant_id,
+                models.NetWorthSnapshot.scope == scope,
+                models.NetWorthSnapshot.snapshot_date >= first_day
+            ).all()
+        }
+        window = [first_day + timedelta(days=i) for i in range(BACKFILL_DAYS)]
+        dates = [d for d in window if d >= refresh_from or d not in stored]
+        if not dates:
+            return 0
+
+        now = datetime.utcnow()
+        rows = [
+            dict(snapshot, tenant_id=tenant_id, scope=scope, snapshot_date=snapshot.pop("date"), created_at=now)
+            for snapshot in NetWorthService.compute(db, tenant_id, dates, user_id)
+        ]
+
+        table = models.NetWorthSnapshot.__table__
+        try:
+            db.execute(table.delete().where(
+                table.c.tenant_id == tenant_id,
+                table.c.scope == scope,
+                table.c.snapshot_date.in_(dates)
+            ))
+            db.execute(table.insert(), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(rows)
+
+    @staticmethod
+    def snapshot_all(db: Session) -> int:
+        """Snapshot every tenant (family scope) and every member. Returns rows written."""
+        members: Dict[str, List[str]] = {}
+        for tenant_id, user_id in db.query(User.tenant_id, User.id).all():
+            members.setdefault(tenant_id, []).append(user_id)
+
+        written = 0
+        for tenant_id, user_ids in members.items():
+            for user_id in [None] + user_ids:
+                try:
+                    written += NetWorthService.snapshot_scope(db, tenant_id, user_id)
+                except Exception as e:
+                    logger.error(f"[NetWorth] Snapshot failed for tenant {tenant_id} ({scope_key(user_id)}): {e}")
+        return written
+
+    @staticmethod
+    def get_timeline(db: Session, tenant_id: str, days: int = 30, user_id: Optional[str] = None) -> List[dict]:
+        """
+        Net worth for the last `days` days (chronological). Past days come from
+        the snapshot table; today is valued live from current balances and holdings.
+        """
+        today = date.today()
+        start = today - timedelta(days=days - 1)
+
+        def read():
+            return db.query(models.NetWorthSnapshot).filter(
+                models.NetWorthSnapshot.tenant_id == tenant_id,
+                models.NetWorthSnapshot.scope == scope_key(user_id),
+                models.NetWorthSnapshot.snapshot_date >= start,
+                models.NetWorthSnapshot.snapshot_date < today
+            ).order_by(models.NetWorthSnapshot.snapshot_date).all()
+
+        snapshots = read()
+        if len(snapshots) < min(days - 1, BACKFILL_DAYS):
+            # Scope not backfilled yet (new member or scheduler has not run)
+            NetWorthService.snapshot_scope(db, tenant_id, user_id, today)
+            snapshots = read()
+
+        timeline = [
+            NetWorthService._point(s.snapshot_date, float(s.liquid), float(s.credit), float(s.loan), float(s.investments))
+            for s in snapshots
+        ]
+
+        current = NetWorthService._current_balances(db, tenant_id, user_id)
+        holdings_query = db.query(func.sum(models.MutualFundHolding.current_value)).filter(
+            models.MutualFundHolding.tenant_id == tenant_id
+        )
+        if user_id:
+            holdings_query = holdings_query.filter(models.MutualFundHolding.user_id == user_id)
+        investments = float(holdings_query.scalar() or 0)
+        timeline.append(NetWorthService._point(today, current["liquid"], current["credit"], current["loan"], investments))
+        return timeline
+
+    @staticmethod
+    def _point(day: date, liquid: float, credit: float, loan: float, investments: float) -> dict:
+        # "liquid" is the net cash position (bank + wallet - credit dues - loans), as the chart plots it
+        net_liquid = liquid - credit - loan
+        return {
+            "date": day.isoformat(),
+            "liquid": round(net_liquid, 2),
+            "credit": round(credit, 2),
+            "loan": round(loan, 2),
+            "investments": round(investments, 2),
+            "total": round(net_liquid + investments, 2)
+        }
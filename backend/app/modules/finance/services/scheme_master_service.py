@@ -0,0 +1,221 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+from backend.app.core.database import SessionLocal
+from backend.app.core.http_client import http_get
+from backend.app.modules.finance.models import MutualFundsMeta, MutualFundSchemeAlias
+from backend.app.modules.finance.utils.scheme_index import SchemeIndex, tokenize
+from backend.app.modules.finance.services.mutual_funds import MFAPI_BASE_URL, MutualFundService, _db_write_lock
+
+logger = logging.getLogger(__name__)
+
+# mutual_funds_meta also holds rows created for individual holdings; fewer rows
+# than this means the full scheme master (~40k schemes) has not been stored yet.
+MIN_MASTER_SCHEMES = 1000
+
+_index: Optional[SchemeIndex] = None
+_index_lock = threading.Lock()
+
+
+class SchemeMasterService:
+    """
+    Process-wide scheme master used for fund search and scheme lookups.
+
+    The mfapi.in scheme list is persisted into `mutual_funds_meta` and indexed
+    in memory once per process. The scheduled refresh re-downloads the list,
+    stores new or renamed schemes and swaps in a freshly built index.
+    """
+
+    @staticmethod
+    def _download(timeout: float = 30.0) -> List[dict]:
+        response = http_get(MFAPI_BASE_URL, timeout=timeout)
+        if response.status_code != 200:
+            return []
+        return [s for s in response.json() if s.get("schemeCode") and s.get("schemeName")]
+
+    @staticmethod
+    def _load_from_db(db: Session) -> List[dict]:
+        rows = db.query(
+            MutualFundsMeta.scheme_code,
+            MutualFundsMeta.scheme_name,
+            MutualFundsMeta.isin_growth,
+            MutualFundsMeta.isin_reinvest
+        ).order_by(MutualFundsMeta.scheme_code).all()
+        return [
+            {
+                "schemeCode": int(code) if code.isdigit() else code,
+                "schemeName": name,
+                "isinGrowth": isin_growth,
+                "isinDivReinvestment": isin_reinvest
+            }
+            for code, name, isin_growth, isin_reinvest in rows
+        ]
+
+    @staticmethod
+    def persist(db: Session, schemes: List[dict]) -> int:
+        """Insert new schemes and update renamed ones in `mutual_funds_meta`. Returns rows written."""
+        table = MutualFundsMeta.__table__
+        with _db_write_lock:
+            try:
+                existing = {
+                    code: (name, isin_growth, isin_reinvest)
+                    for code, name, isin_growth, isin_reinvest in db.query(
+                        MutualFundsMeta.scheme_code,
+                        MutualFundsMeta.scheme_name,
+                        MutualFundsMeta.isin_growth,
+                        MutualFundsMeta.isin_reinvest
+                    ).all()
+                }
+
+                now = datetime.utcnow()
+                new_rows, changed_rows = [], []
+                seen = set()
+                for s in schemes:
+                    code = str(s["schemeCode"])
+                    if code in seen:
+                        continue
+                    seen.add(code)
+                    values = (s["schemeName"], s.get("isinGrowth") or None, s.get("isinDivReinvestment") or None)
+                    if code not in existing:
+                        new_rows.append({
+                            "scheme_code": code, "scheme_name": values[0],
+                            "isin_growth": values[1], "isin_reinvest": values[2], "updated_at": now
+                        })
+                    elif existing[code] != values:
+                        changed_rows.append({
+                            "b_code": code, "b_name": values[0],
+                            "b_isin_growth": values[1], "b_isin_reinvest": values[2], "b_updated_at": now
+                        })
+
+                if new_rows:
+                    db.execute(table.insert(), new_rows)
+                if changed_rows:
+                    db.execute(
+                        table.update().where(table.c.scheme_code == bindparam("b_code")).values(
+                            scheme_name=bindparam("b_name"),
+                            isin_growth=bindparam("b_isin_growth"),
+                            isin_reinvest=bindparam("b_isin_reinvest"),
+                            updated_at=bindparam("b_updated_at")
+                        ),
+                        changed_rows
+                    )
+                MutualFundService._safe_commit(db)
+                return len(new_rows) + len(changed_rows)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"[SchemeMaster] Failed to store scheme master: {e}")
+                return 0
+
+    @staticmethod
+    def refresh(db: Session) -> int:
+        """Download the scheme list, persist it and rebuild the in-memory index."""
+        global _index
+        try:
+            schemes = SchemeMasterService._download()
+        except Exception as e:
+            logger.warning(f"[SchemeMaster] Upstream fetch failed: {e}")
+            return 0
+        if not schemes:
+            return 0
+
+        written = SchemeMasterService.persist(db, schemes)
+        _index = SchemeIndex(schemes)
+        return written
+
+    @staticmethod
+    def get_index(db: Optional[Session] = None) -> SchemeIndex:
+        """The process-wide index, built from the database (or upstream) on first use."""
+        global _index
+        if _index is not None:
+            return _index
+
+        with _index_lock:
+            if _index is not None:
+                return _index
+
+            session = db or SessionLocal()
+            try:
+                schemes = SchemeMasterService._load_from_db(session)
+                if len(schemes) >= MIN_MASTER_SCHEMES:
+                    _index = SchemeIndex(schemes)
+                else:
+                    SchemeMasterService.refresh(session)
+                if _index is None:
+                    # Upstream unavailable: serve what is stored, but retry the download next time
+                    return SchemeIndex(schemes)
+            finally:
+                if db is None:
+                    session.close()
+            return _index
+
+    @staticmethod
+    def scheme_alias(name: Optional[str]) -> str:
+        """Normalised form of a scheme name used as the mapping cache key."""
+        return " ".join(tokenize(name))
+
+    @staticmethod
+    def resolve_names(db: Session, names: Iterable[str]) -> Dict[str, dict]:
+        """
+        Resolve scheme names to scheme master entries in one pass.
+
+        Names are deduplicated by their normalised alias. Aliases resolved by an
+        earlier import come from `mutual_fund_scheme_aliases` in a single query;
+        the rest are looked up in the index and the new resolutions stored.
+
+        Returns:
+            {alias: scheme entry} for every alias that could be resolved
+        """
+        index = SchemeMasterService.get_index(db)
+        aliases = {SchemeMasterService.scheme_alias(n) for n in names if n}
+        aliases.discard("")
+        if not aliases:
+            return {}
+
+        resolved = {}
+        for alias, scheme_code in db.query(MutualFundSchemeAlias.alias, MutualFundSchemeAlias.scheme_code).filter(
+            MutualFundSchemeAlias.alias.in_(aliases)
+        ).all():
+            scheme = index.get(scheme_code)
+            if scheme:
+                resolved[alias] = scheme
+
+        new_rows = []
+        for alias in aliases - resolved.keys():
+            matches = index.search(alias, limit=1)
+            if matches:
+                resolved[alias] = matches[0]
+                new_rows.append({"alias": alias, "scheme_code": str(matches[0]["schemeCode"]), "created_at": datetime.utcnow()})
+
+        if new_rows:
+            with _db_write_lock:
+                try:
+                    # Clear stale aliases (scheme since removed from the master) before re-inserting
+                    db.query(MutualFundSchemeAlias).filter(
+                        MutualFundSchemeAlias.alias.in_([r["alias"] for r in new_rows])
+                    ).delete(synchronize_session=False)
+                    db.execute(MutualFundSchemeAlias.__table__.insert(), new_rows)
+                    MutualFundService._safe_commit(db)
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"[SchemeMaster] Failed to store scheme aliases: {e}")
+
+        return resolved
+
+    @staticmethod
+    def search(query: Optional[str] = None, category: Optional[str] = None, amc: Optional[str] = None,
+               limit: int = 20, offset: int = 0, sort_by: str = 'relevance') -> List[dict]:
+        index = SchemeMasterService.get_index()
+        sort_key = None
+        if sort_by in ('returns_desc', 'returns_asc'):
+            sort_key = _mock_returns_key
+        return index.search(
+            query, filters=(category, amc), limit=limit, offset=offset,
+            sort_key=sort_key, descending=(sort_by == 'returns_desc')
+        )
+
+
+def _mock_returns_key(scheme: Dict) -> float:
+    return MutualFundService.get_mock_returns(str(scheme.get("schemeCode")))
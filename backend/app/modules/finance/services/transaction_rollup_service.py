@@ -0,0 +1,209 @@
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import Date, cast, event, func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, attributes
+from backend.app.modules.finance import models
+from backend.app.modules.finance.services.net_worth_service import NetWorthService
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = ("tenant_id", "account_id", "date", "category", "is_transfer", "exclude_from_reports", "amount")
+
+# Keys per upsert statement when applying deltas (bulk imports touch hundreds)
+APPLY_CHUNK = 500
+
+# (tenant_id, account_id, day, category, is_transfer, exclude_from_reports)
+RollupKey = Tuple[str, str, date, str, bool, bool]
+
+
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _key(values: dict) -> RollupKey:
+    return (
+        values["tenant_id"],
+        str(values["account_id"]),
+        _day(values["date"]),
+        values["category"] or "",  # Part of the primary key, so uncategorized is stored as ""
+        bool(values["is_transfer"]),
+        bool(values["exclude_from_reports"])
+    )
+
+
+def _old_values(txn: models.Transaction) -> dict:
+    """Values as last flushed to the database (before pending changes)."""
+    values = {}
+    for field in ROLLUP_FIELDS:
+        history = attributes.get_history(txn, field)
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.unchanged:
+            values[field] = history.unchanged[0]
+        else:
+            values[field] = getattr(txn, field)
+    return values
+
+
+def _new_values(txn: models.Transaction) -> dict:
+    return {field: getattr(txn, field) for field in ROLLUP_FIELDS}
+
+
+class TransactionRollupService:
+    """
+    Daily per-account, per-category transaction totals (`transaction_rollups`).
+
+    Rows are keyed by (tenant, account, day, category, is_transfer,
+    exclude_from_reports) and hold debit/credit sums and counts. They are kept in
+    step with `transactions` inside the same database transaction: ORM inserts,
+    updates and deletes are picked up by a session flush hook, and bulk paths
+    that bypass the ORM call `record` themselves. Budget, trend and dashboard
+    reads aggregate these rows (monthly views group the days) instead of
+    scanning raw transactions.
+    """
+
+    @staticmethod
+    def add_delta(deltas: Dict[RollupKey, list], values: dict, sign: int) -> None:
+        amount = Decimal(str(values["amount"] or 0))
+        delta = deltas.setdefault(_key(values), [Decimal(0), 0, Decimal(0), 0])
+        if amount < 0:
+            delta[0] += sign * amount
+            delta[1] += sign
+        else:
+            delta[2] += sign * amount
+            delta[3] += sign
+
+    @staticmethod
+    def apply(db: Session, deltas: Dict[RollupKey, list]) -> None:
+        """
+        Add pre-aggregated deltas to the rollups (multi-row upserts of APPLY_CHUNK
+        keys) and drop the net worth snapshots they make stale.
+        """
+        rows = [
+            {
+                "tenant_id": k[0], "account_id": k[1], "day": k[2], "category": k[3],
+                "is_transfer": k[4], "exclude_from_reports": k[5],
+                "debit_total": d[0], "debit_count": d[1], "credit_total": d[2], "credit_count": d[3]
+            }
+            for k, d in deltas.items() if d[1] or d[3] or d[0] or d[2]
+        ]
+        if not rows:
+            return
+
+        # Closing balances change from the first day whose net amount on an account moved
+        # (category or flag edits move amounts between keys of the same day and cancel out)
+        net: Dict[tuple, Decimal] = {}
+        for row in rows:
+            day_key = (row["tenant_id"], row["account_id"], row["day"])
+            net[day_key] = net.get(day_key, Decimal(0)) + row["debit_total"] + row["credit_total"]
+        earliest: Dict[str, date] = {}
+        for (tenant_id, _, day), amount in net.items():
+            if amount and (tenant_id not in earliest or day < earliest[tenant_id]):
+                earliest[tenant_id] = day
+        for tenant_id, day in earliest.items():
+            NetWorthService.invalidate(db, tenant_id, day)
+
+        table = models.TransactionRollup.__table__
+        for start in range(0, len(rows), APPLY_CHUNK):
+            stmt = insert(table).values(rows[start:start + APPLY_CHUNK])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    table.c.tenant_id, table.c.account_id, table.c.day, table.c.category,
+                    table.c.is_transfer, table.c.exclude_from_reports
+                ],
+                set_={
+                    "debit_total": table.c.debit_total + stmt.excluded.debit_total,
+                    "debit_count": table.c.debit_count + stmt.excluded.debit_count,
+                    "credit_total": table.c.credit_total + stmt.excluded.credit_total,
+                    "credit_count": table.c.credit_count + stmt.excluded.credit_count
+                }
+            )
+            db.execute(stmt)
+
+    @staticmethod
+    def record(db: Session, transactions: Iterable[dict], sign: int = 1) -> None:
+        """
+        Apply rows written outside the ORM unit of work (bulk insert: sign=1,
+        bulk delete: sign=-1). Each row needs the ROLLUP_FIELDS keys.
+        """
+        deltas: Dict[RollupKey, list] = {}
+        for values in transactions:
+            TransactionRollupService.add_delta(deltas, values, sign)
+        TransactionRollupService.apply(db, deltas)
+
+    @staticmethod
+    def _after_flush(session: Session, flush_context) -> None:
+        deltas: Dict[RollupKey, list] = {}
+        for obj in session.new:
+            if isinstance(obj, models.Transaction):
+                TransactionRollupService.add_delta(deltas, _new_values(obj), 1)
+        for obj in session.deleted:
+            if isinstance(obj, models.Transaction):
+                TransactionRollupService.add_delta(deltas, _old_values(obj), -1)
+        for obj in session.dirty:
+            if isinstance(obj, models.Transaction) and session.is_modified(obj, include_collections=False):
+                old, new = _old_values(obj), _new_values(obj)
+                if old != new:
+                    TransactionRollupService.add_delta(deltas, old, -1)
+                    TransactionRollupService.add_delta(deltas, new, 1)
+        if deltas:
+            TransactionRollupService.apply(session, deltas)
+
+    @staticmethod
+    def install(session_factory) -> None:
+        """Keep rollups in step with ORM writes made through sessions from `session_factory`."""
+        if not event.contains(session_factory, "after_flush", TransactionRollupService._after_flush):
+            event.listen(session_factory, "after_flush", TransactionRollupService._after_flush)
+
+    @staticmethod
+    def query(db: Session, tenant_id: str, *columns, user_id: str = None):
+        """Query over the tenant's rollups; for a member, only their own and shared accounts."""
+        rollup = models.TransactionRollup
+        query = db.query(*columns).filter(rollup.tenant_id == tenant_id)
+        if user_id:
+            query = query.join(models.Account, rollup.account_id == models.Account.id).filter(
+                or_(models.Account.owner_id == user_id, models.Account.owner_id == None)
+            )
+        return query
+
+    @staticmethod
+    def rebuild(db: Session, tenant_id: str = None) -> None:
+        """Recompute rollups from `transactions` (all tenants, or one) with a single INSERT ... SELECT."""
+        table = models.TransactionRollup.__table__
+        txn = models.Transaction
+        where = [txn.tenant_id == tenant_id] if tenant_id else []
+
+        delete = table.delete()
+        if tenant_id:
+            delete = delete.where(table.c.tenant_id == tenant_id)
+        db.execute(delete)
+
+        day = cast(txn.date, Date)
+        category = func.coalesce(txn.category, "")
+        is_debit = txn.amount < 0
+        source = select(
+            txn.tenant_id, txn.account_id, day, category, txn.is_transfer, txn.exclude_from_reports,
+            func.coalesce(func.sum(txn.amount).filter(is_debit), 0),
+            func.count().filter(is_debit),
+            func.coalesce(func.sum(txn.amount).filter(~is_debit), 0),
+            func.count().filter(~is_debit)
+        ).where(*where).group_by(
+            txn.tenant_id, txn.account_id, day, category, txn.is_transfer, txn.exclude_from_reports
+        )
+        db.execute(table.insert().from_select([
+            "tenant_id", "account_id", "day", "category", "is_transfer", "exclude_from_reports",
+            "debit_total", "debit_count", "credit_total", "credit_count"
+        ], source))
+        db.commit()
+
+    @staticmethod
+    def ensure_built(db: Session) -> None:
+        """Build the rollups once for databases that have transactions but no rollups yet."""
+        has_rollups = db.execute(text("SELECT 1 FROM transaction_rollups LIMIT 1")).first()
+        has_transactions = db.execute(text("SELECT 1 FROM transactions LIMIT 1")).first()
+        if has_transactions and not has_rollups:
+            logger.info("[Rollups] Building transaction rollups...")
+            TransactionRollupService.rebuild(db)
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import json
 import uuid
@@ -7,18 +7,22 @@ from backend.app.modules.finance import models, schemas
 from backend.app.modules.finance.models import TransactionType
 from backend.app.modules.finance.services.category_service import CategoryService
 from backend.app.modules.finance.services.transfer_service import TransferService
+from backend.app.modules.finance.services.net_worth_service import NetWorthService
 from backend.app.modules.ingestion import models as ingestion_models
 
 class TransactionService:
     @staticmethod
-    def create_transaction(db: Session, transaction: schemas.TransactionCreate, tenant_id: str, exclude_pending_id: Optional[str] = None) -> models.Transaction:
+    def create_transaction(db: Session, transaction: schemas.TransactionCreate, tenant_id: str, exclude_pending_id: Optional[str] = None, duplicate: Optional[Tuple[bool, Optional[str], Optional[str]]] = None) -> models.Transaction:
         # 1. Unified Deduplication Check (Ref ID, Hash-Fallback, and Fields)
+        # Bulk callers pass the result of TransactionDeduplicator.check_batch as `duplicate`
         from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
-        is_dup, reason, existing_id = TransactionDeduplicator.check_raw_duplicate(
-            db, tenant_id, str(transaction.account_id), transaction.amount, transaction.date, 
-            transaction.description, transaction.recipient, transaction.external_id,
-            exclude_pending_id=exclude_pending_id
-        )
+        if duplicate is None:
+            duplicate = TransactionDeduplicator.check_raw_duplicate(
+                db, tenant_id, str(transaction.account_id), transaction.amount, transaction.date, 
+                transaction.description, transaction.recipient, transaction.external_id,
+                exclude_pending_id=exclude_pending_id
+            )
+        is_dup, reason, existing_id = duplicate
         
         if is_dup:
             # If it found a match in confirmed transactions, return it
@@ -49,21 +53,11 @@ class TransactionService:
         final_exclude = transaction.exclude_from_reports or transaction.is_transfer
         
         if (not final_category or final_category == "Uncategorized") and (transaction.description or transaction.recipient):
-            rules = db.query(models.CategoryRule).filter(models.CategoryRule.tenant_id == tenant_id).order_by(models.CategoryRule.priority.desc()).all()
-            
-            desc_lower = (transaction.description or "").lower()
-            recipient_lower = (transaction.recipient or "").lower()
-            
-            for rule in rules:
-                try:
-                    keywords = json.loads(rule.keywords)
-                    if any(k.lower() in desc_lower or k.lower() in recipient_lower for k in keywords):
-                        final_category = rule.category
-                        if rule.exclude_from_reports:
-                            final_exclude = True
-                        break
-                except Exception as e:
-                    pass
+            rule = CategoryService.get_rule_matcher(db, tenant_id).match(transaction.description, transaction.recipient)
+            if rule:
+                final_category = rule.category
+                if rule.exclude_from_reports:
+                    final_exclude = True
         # ---------------------------------
         
         txn_type = models.TransactionType.DEBIT if transaction.amount < 0 else models.TransactionType.CREDIT
@@ -205,11 +199,17 @@ class TransactionService:
     @staticmethod
     def bulk_delete_transactions(db: Session, transaction_ids: List[str], tenant_id: str) -> int:
         if not transaction_ids: return 0
+        from backend.app.modules.finance.services.transaction_rollup_service import TransactionRollupService, ROLLUP_FIELDS
         try:
             query = db.query(models.Transaction).filter(
                 models.Transaction.id.in_(transaction_ids),
                 models.Transaction.tenant_id == tenant_id
             )
+            # Bulk delete bypasses the ORM flush, so take the rows out of the rollups here
+            removed = query.with_entities(*(getattr(models.Transaction, f) for f in ROLLUP_FIELDS)).all()
+            TransactionRollupService.record(db, (row._asdict() for row in removed), sign=-1)
+            # Balances are not adjusted on delete, so every earlier snapshot shifts too
+            NetWorthService.invalidate(db, tenant_id)
             count = query.delete(synchronize_session=False)
             db.commit()
             return count
@@ -307,6 +307,10 @@ class TransactionService:
                 setattr(db_txn, key, json.dumps(value))
             else:
                 setattr(db_txn, key, value)
+
+        if update_data.keys() & {'amount', 'date', 'account_id', 'is_transfer', 'to_account_id'}:
+            # Balances are not adjusted on edit, so every earlier snapshot shifts too
+            NetWorthService.invalidate(db, tenant_id)
                 
         db.commit()
         db.refresh(db_txn)
@@ -317,19 +321,8 @@ class TransactionService:
         if not description and not recipient:
             return "Uncategorized"
             
-        rules = db.query(models.CategoryRule).filter(models.CategoryRule.tenant_id == tenant_id).order_by(models.CategoryRule.priority.desc()).all()
-        
-        desc_lower = (description or "").lower()
-        recipient_lower = (recipient or "").lower()
-        
-        for rule in rules:
-            try:
-                keywords = json.loads(rule.keywords)
-                if any(k.lower() in desc_lower or k.lower() in recipient_lower for k in keywords):
-                    return rule.category
-            except:
-                continue
-        return "Uncategorized"
+        rule = CategoryService.get_rule_matcher(db, tenant_id).match(description, recipient)
+        return rule.category if rule else "Uncategorized"
 
     # --- Triage Functions ---
     @staticmethod
@@ -405,6 +398,9 @@ class TransactionService:
             account = db.query(models.Account).filter(models.Account.id == pending.account_id).first()
             if account:
                 if pending.balance is not None:
+                    if account.balance is None or float(account.balance) != float(pending.balance):
+                        # Statement balance overrides the running balance: every past snapshot shifts
+                        NetWorthService.invalidate(db, tenant_id)
                     account.balance = pending.balance
                 if pending.credit_limit is not None:
                     account.credit_limit = pending.credit_limit
@@ -549,6 +545,8 @@ class TransactionService:
                 affected_count += 1
 
         db.commit()
+        if rule_created:
+            CategoryService.invalidate_rule_matcher(tenant_id)
         return {
             "success": True, 
             "affected": affected_count, 
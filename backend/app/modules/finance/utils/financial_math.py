@@ -1,57 +1,203 @@
-from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from datetime import date, datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
 import math
+import numpy as np
 
-def xirr(cash_flows: List[Tuple[datetime, float]], guess: float = 0.1) -> float:
+CashFlow = Tuple[date, float]
+
+BUY_TYPES = ("BUY", "DEBIT")
+SELL_TYPES = ("SELL", "CREDIT")
+
+XIRR_MIN_RATE = -0.99
+XIRR_MAX_RATE = 10.0
+
+
+def order_day(order) -> date:
+    """Calendar date of an order (order_date may be a datetime or a date)."""
+    return order.order_date.date() if hasattr(order.order_date, 'date') else order.order_date
+
+
+def order_cash_amount(order) -> float:
+    """Cash value of an order, using units * nav if amount is 0 (fallback for older imports)."""
+    amount = float(order.amount)
+    if amount <= 0:
+        amount = float(order.units) * float(order.nav)
+    return amount
+
+
+def order_cash_flows(orders: Sequence, current_value: float = 0.0, valuation_date: Optional[date] = None) -> List[CashFlow]:
     """
-    Calculate XIRR (Extended Internal Rate of Return) using Newton-Raphson method.
-    
+    Investor cash flows for a set of orders: buys are outflows (negative), sells
+    inflows (positive), and a positive current value is added as a final inflow
+    on `valuation_date` (default today).
+    """
+    cash_flows = []
+    for order in orders:
+        if order.type in BUY_TYPES:
+            cash_flows.append((order_day(order), -order_cash_amount(order)))
+        elif order.type in SELL_TYPES:
+            cash_flows.append((order_day(order), order_cash_amount(order)))
+
+    if current_value > 0:
+        cash_flows.append((valuation_date or date.today(), float(current_value)))
+    return cash_flows
+
+
+def _day_ordinal(day) -> int:
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.toordinal()
+
+
+def _npv_and_derivative(rates: np.ndarray, years: np.ndarray, amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """NPV and dNPV/drate of each row of (years, amounts) at the matching rate."""
+    base = 1.0 + rates[:, None]
+    discounted = amounts * base ** (-years)
+    return discounted.sum(axis=1), (-years * discounted / base).sum(axis=1)
+
+
+def _bracketed_xirr(years: np.ndarray, amounts: np.ndarray, tolerance: float = 1e-10, max_iterations: int = 200) -> Optional[float]:
+    """
+    Bisection over a bracket where the NPV changes sign. Used for flows where
+    Newton-Raphson does not converge (flat derivative, oscillation, or a rate
+    outside the Newton clamp). Returns None if no sign change can be found.
+    """
+    def npv(rate: float) -> float:
+        return float(_npv_and_derivative(np.array([rate]), years[None, :], amounts[None, :])[0][0])
+
+    low, high = -0.9999, XIRR_MAX_RATE
+    f_low, f_high = npv(low), npv(high)
+    while math.isfinite(f_low) and f_low * f_high > 0 and high < 1e6:
+        high *= 10
+        f_high = npv(high)
+
+    if not (math.isfinite(f_low) and math.isfinite(f_high)) or f_low * f_high > 0:
+        return None
+
+    for _ in range(max_iterations):
+        mid = (low + high) / 2
+        f_mid = npv(mid)
+        if f_mid == 0 or (high - low) / 2 < tolerance:
+            return mid
+        if f_low * f_mid < 0:
+            high = mid
+        else:
+            low, f_low = mid, f_mid
+    return (low + high) / 2
+
+
+def _solve_xirr(years: np.ndarray, amounts: np.ndarray) -> Optional[float]:
+    """
+    Bisection result clamped to [XIRR_MIN_RATE, XIRR_MAX_RATE]. Flows whose
+    rate lies beyond a bound (e.g. a near-total loss within days, or a large
+    gain within days) get that bound, as the Newton clamp always did.
+    """
+    rate = _bracketed_xirr(years, amounts)
+    if rate is not None:
+        return min(max(rate, XIRR_MIN_RATE), XIRR_MAX_RATE)
+
+    def npv(rate: float) -> float:
+        return float(_npv_and_derivative(np.array([rate]), years[None, :], amounts[None, :])[0][0])
+
+    # NPV still positive at the upper bound: the rate is above it; negative at the lower bound: below it
+    if npv(XIRR_MAX_RATE) > 0:
+        return XIRR_MAX_RATE
+    if npv(XIRR_MIN_RATE) < 0:
+        return XIRR_MIN_RATE
+    return None
+
+
+def xirr_batch(flows_by_key: Dict[Hashable, List[CashFlow]], guess: float = 0.1,
+               tolerance: float = 1e-9, max_iterations: int = 100) -> Dict[Hashable, Optional[float]]:
+    """
+    XIRR for many independent cash flow sets at once (e.g. one per holding).
+
+    All sets are padded into a single (sets x flows) matrix and solved together
+    with a vectorized Newton-Raphson iteration; sets that do not converge fall
+    back to bracketed bisection. Rates are clamped to [XIRR_MIN_RATE, XIRR_MAX_RATE].
+
+    Returns:
+        {key: annualized return as decimal, or None if it has no solution
+        (e.g. no outflow or no inflow)}
+    """
+    results: Dict[Hashable, Optional[float]] = {}
+    keys = []
+    for key, flows in flows_by_key.items():
+        # Need at least one outflow and one inflow for a rate to exist
+        if len(flows) < 2 or not any(a < 0 for _, a in flows) or not any(a > 0 for _, a in flows):
+            results[key] = None
+        else:
+            keys.append(key)
+    if not keys:
+        return results
+
+    width = max(len(flows_by_key[k]) for k in keys)
+    years = np.zeros((len(keys), width))
+    amounts = np.zeros((len(keys), width))
+    for row, key in enumerate(keys):
+        flows = flows_by_key[key]
+        ordinals = [_day_ordinal(d) for d, _ in flows]
+        base = min(ordinals)
+        years[row, :len(flows)] = [(o - base) / 365.0 for o in ordinals]
+        amounts[row, :len(flows)] = [float(a) for _, a in flows]
+
+    scale = np.abs(amounts).sum(axis=1)
+    rates = np.full(len(keys), guess, dtype=np.float64)
+    converged = np.zeros(len(keys), dtype=bool)
+    pending = np.ones(len(keys), dtype=bool)
+
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        for _ in range(max_iterations):
+            idx = np.flatnonzero(pending)
+            if idx.size == 0:
+                break
+
+            npv, dnpv = _npv_and_derivative(rates[idx], years[idx], amounts[idx])
+            solved = np.abs(npv) <= tolerance * scale[idx]
+            converged[idx[solved]] = True
+
+            step = npv / dnpv
+            stuck = ~np.isfinite(step)
+            new_rates = np.clip(rates[idx] - np.where(stuck, 0.0, step), XIRR_MIN_RATE, XIRR_MAX_RATE)
+            settled = ~solved & ~stuck & (np.abs(step) < tolerance)
+            converged[idx[settled]] = True
+
+            rates[idx] = np.where(solved, rates[idx], new_rates)
+            pending[idx[solved | stuck | settled]] = False
+
+        for row, key in enumerate(keys):
+            rate = float(rates[row])
+            if not converged[row] or not math.isfinite(rate):
+                rate = _solve_xirr(years[row], amounts[row])
+            results[key] = rate
+
+    return results
+
+
+def xirr(cash_flows: List[CashFlow], guess: float = 0.1) -> float:
+    """
+    Calculate XIRR (Extended Internal Rate of Return).
+
     Args:
         cash_flows: List of (date, amount) tuples. Negative = outflow, Positive = inflow
         guess: Initial guess for IRR (default 10%)
-    
+
     Returns:
-        Annualized return as decimal (e.g., 0.125 for 12.5%)
+        Annualized return as decimal (e.g., 0.125 for 12.5%), clamped to
+        [XIRR_MIN_RATE, XIRR_MAX_RATE]; 0.0 if the flows have no solution
     """
     if not cash_flows or len(cash_flows) < 2:
         return 0.0
-    
-    # Sort by date
-    cash_flows = sorted(cash_flows, key=lambda x: x[0])
-    
-    # Base date (first transaction)
-    base_date = cash_flows[0][0]
-    
-    # Calculate days from base for each cash flow
-    days = [(cf[0] - base_date).days for cf in cash_flows]
-    amounts = [cf[1] for cf in cash_flows]
-    
-    # Newton-Raphson iteration
-    rate = guess
-    epsilon = 1e-6  # Precision
-    max_iterations = 100
-    
-    for _ in range(max_iterations):
-        # Calculate NPV and its derivative
-        npv = sum(amt / ((1 + rate) ** (day / 365.0)) for day, amt in zip(days, amounts))
-        dnpv = sum(-amt * day / 365.0 / ((1 + rate) ** (day / 365.0 + 1)) for day, amt in zip(days, amounts))
-        
-        if abs(npv) < epsilon:
-            return rate
-        
-        if dnpv == 0:
-            return 0.0
-        
-        # Newton-Raphson update
-        rate = rate - npv / dnpv
-        
-        # Prevent extreme values
-        if rate < -0.99:
-            rate = -0.99
-        elif rate > 10:
-            rate = 10
-    
-    return rate
+
+    rate = xirr_batch({0: cash_flows}, guess=guess)[0]
+    return rate if rate is not None else 0.0
+
+
+def xirr_percent(cash_flows: List[CashFlow]) -> Optional[float]:
+    """XIRR as a percentage rounded to 2 places, or None if it cannot be computed."""
+    rate = xirr_batch({0: cash_flows})[0]
+    # + 0.0 turns a rounded -0.0 into 0.0 so a flat return is not shown as "-0.0%"
+    return round(rate * 100, 2) + 0.0 if rate is not None else None
 
 
 def categorize_fund(scheme_category: str) -> str:
@@ -0,0 +1,76 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+def _ordinal(day) -> int:
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.toordinal()
+
+
+class NavSeries:
+    """
+    Date-sorted NAV (or value) series stored as parallel arrays.
+
+    `ordinals` holds `date.toordinal()` values and `navs` the matching floats,
+    both in ascending date order. Lookups are binary searches over the ordinal
+    array, so no date formatting or parsing happens on the read path.
+    """
+
+    __slots__ = ("ordinals", "navs")
+
+    def __init__(self, ordinals: Optional[array] = None, navs: Optional[array] = None):
+        self.ordinals = ordinals if ordinals is not None else array("q")
+        self.navs = navs if navs is not None else array("d")
+
+    @classmethod
+    def from_points(cls, points: Iterable[Tuple[date, float]]) -> "NavSeries":
+        """Build from (date, nav) pairs that are already sorted by date."""
+        series = cls()
+        for day, nav in points:
+            series.append(day, nav)
+        return series
+
+    def append(self, day, nav: float) -> None:
+        self.ordinals.append(_ordinal(day))
+        self.navs.append(float(nav))
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def __iter__(self) -> Iterator[Tuple[date, float]]:
+        for ordinal, nav in zip(self.ordinals, self.navs):
+            yield date.fromordinal(ordinal), nav
+
+    def as_of(self, day, max_staleness_days: Optional[int] = None) -> Optional[float]:
+        """
+        Latest value on or before `day`.
+
+        Returns None if the series starts after `day`, or if the closest earlier
+        point is more than `max_staleness_days` old.
+        """
+        target = _ordinal(day)
+        i = bisect_right(self.ordinals, target) - 1
+        if i < 0:
+            return None
+        if max_staleness_days is not None and target - self.ordinals[i] > max_staleness_days:
+            return None
+        return self.navs[i]
+
+    def latest(self) -> Optional[Tuple[date, float]]:
+        if not self.ordinals:
+            return None
+        return date.fromordinal(self.ordinals[-1]), self.navs[-1]
+
+    def since(self, start) -> "NavSeries":
+        """Points dated on or after `start`."""
+        i = bisect_left(self.ordinals, _ordinal(start))
+        return NavSeries(self.ordinals[i:], self.navs[i:])
+
+    def tail(self, count: int) -> "NavSeries":
+        """The last `count` points."""
+        if count <= 0:
+            return NavSeries()
+        return NavSeries(self.ordinals[-count:], self.navs[-count:])
@@ -0,0 +1,129 @@
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+_NO_MATCH = 1 << 62
+
+
+class CompiledRule(NamedTuple):
+    id: str
+    name: str
+    category: str
+    is_transfer: bool
+    to_account_id: Optional[str]
+    exclude_from_reports: bool
+
+
+def _keywords(raw) -> Optional[List[str]]:
+    """Lowercase keywords of a rule, or None if they cannot be read (the rule is skipped)."""
+    try:
+        # Rows returned by the rule CRUD carry the decoded list for the response
+        keywords = raw if isinstance(raw, list) else json.loads(raw)
+        return [k.lower() for k in keywords]
+    except Exception:
+        return None
+
+
+class RuleMatcher:
+    """
+    Immutable Aho-Corasick automaton over the lowercase keywords of a tenant's
+    category rules.
+
+    Rules are ranked in evaluation order (priority, highest first). Every
+    automaton state carries the best (lowest) rank among the keywords ending
+    there, folded in along the failure links, so a single pass over a text
+    finds the first rule any of whose keywords is a substring of it - the same
+    answer as testing each rule's keywords in turn. A separate rank is kept for
+    transfer rules only.
+
+    Args:
+        rules: CategoryRule rows (or objects with the same attributes) in
+            evaluation order; `keywords` is the stored JSON list
+    """
+
+    def __init__(self, rules: Iterable):
+        self.rules: List[CompiledRule] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[int] = [_NO_MATCH]
+        self._best_transfer: List[int] = [_NO_MATCH]
+
+        for rule in rules:
+            keywords = _keywords(rule.keywords)
+            if keywords is None:
+                continue
+            rank = len(self.rules)
+            self.rules.append(CompiledRule(
+                id=rule.id,
+                name=rule.name,
+                category=rule.category,
+                is_transfer=bool(rule.is_transfer),
+                to_account_id=rule.to_account_id,
+                exclude_from_reports=bool(rule.exclude_from_reports)
+            ))
+            for keyword in keywords:
+                self._add(keyword, rank, bool(rule.is_transfer))
+        self._link()
+
+    def _add(self, keyword: str, rank: int, is_transfer: bool) -> None:
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(_NO_MATCH)
+                self._best_transfer.append(_NO_MATCH)
+            node = nxt
+        # An empty keyword ends at the root and so matches every text
+        self._best[node] = min(self._best[node], rank)
+        if is_transfer:
+            self._best_transfer[node] = min(self._best_transfer[node], rank)
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each state inherits the ranks of its failure state."""
+        goto, fail, best, best_transfer = self._goto, self._fail, self._best, self._best_transfer
+        queue = []
+        for child in goto[0].values():
+            best[child] = min(best[child], best[0])
+            best_transfer[child] = min(best_transfer[child], best_transfer[0])
+            queue.append(child)
+        for node in queue:
+            for ch, child in goto[node].items():
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(ch, 0)
+                fail[child] = target
+                best[child] = min(best[child], best[target])
+                best_transfer[child] = min(best_transfer[child], best_transfer[target])
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _scan(self, texts, best: List[int]) -> Optional[CompiledRule]:
+        goto, fail = self._goto, self._fail
+        found = best[0]
+        for text in texts:
+            if not text:
+                continue
+            node = 0
+            for ch in text.lower():
+                while node and ch not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(ch, 0)
+                if best[node] < found:
+                    found = best[node]
+                    if found == 0:
+                        return self.rules[0]
+        return self.rules[found] if found != _NO_MATCH else None
+
+    def match(self, *texts: Optional[str]) -> Optional[CompiledRule]:
+        """First rule with a keyword contained in any of the texts (case-insensitive)."""
+        return self._scan(texts, self._best)
+
+    def match_transfer(self, *texts: Optional[str]) -> Optional[CompiledRule]:
+        """First transfer rule with a keyword contained in any of the texts (case-insensitive)."""
+        return self._scan(texts, self._best_transfer)
@@ -0,0 +1,206 @@
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+# Ranked results of recent queries; pagination re-asks the same query with a new offset
+RESULT_CACHE_SIZE = 256
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens of a scheme name or query."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _short_grams(word: str):
+    """Every 1- and 2-character substring of a token."""
+    return {word[i:i + n] for n in (1, 2) for i in range(len(word) - n + 1)}
+
+
+def _intersect(postings: List[np.ndarray]) -> np.ndarray:
+    """Intersection of sorted, duplicate-free id arrays, smallest first."""
+    if not postings:
+        return _EMPTY
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        if result.size == 0:
+            break
+        result = np.intersect1d(result, other, assume_unique=True)
+    return result
+
+
+def _freeze(index: Dict[str, list]) -> Dict[str, np.ndarray]:
+    return {key: np.array(ids, dtype=np.int32) for key, ids in index.items()}
+
+
+class SchemeIndex:
+    """
+    Immutable in-memory search index over the scheme master.
+
+    Scheme names are normalised to space-separated lowercase tokens. Sorted
+    id posting arrays point back into the scheme list:
+
+    - `tokens`: whole token -> ids
+    - `short_grams`: 1-2 character substring of a token -> ids (for short queries)
+    - `leading`: every prefix of a name's first token -> ids (for ranking)
+    - `trigrams`: character trigram of the normalised name -> ids
+
+    A query term of three or more characters matches as a substring of the
+    normalised name: candidates come from intersecting the term's trigram
+    postings and only those not already known to contain it as a whole token
+    are verified against the name. Shorter terms are looked up directly in
+    `short_grams`, which is exact, so they match as substrings too.
+
+    Args:
+        schemes: mfapi.in scheme list entries
+            ({"schemeCode", "schemeName", "isinGrowth", "isinDivReinvestment"})
+    """
+
+    def __init__(self, schemes: Iterable[dict]):
+        self.schemes: List[dict] = []
+        self.names: List[str] = []
+        self.by_code: Dict[str, int] = {}
+        self.by_isin: Dict[str, int] = {}
+        self._cache: Dict[tuple, np.ndarray] = {}
+
+        tokens, short_grams, leading, trigrams = {}, {}, {}, {}
+        gram_cache: Dict[str, set] = {}
+        for scheme in schemes:
+            code = str(scheme.get("schemeCode") or "").strip()
+            name = scheme.get("schemeName") or ""
+            words = tokenize(name)
+            if not code or not words or code in self.by_code:
+                continue
+
+            idx = len(self.schemes)
+            self.schemes.append(scheme)
+            self.by_code[code] = idx
+            for isin_key in ("isinGrowth", "isinDivReinvestment"):
+                isin = (scheme.get(isin_key) or "").strip().upper()
+                if isin and isin not in self.by_isin:
+                    self.by_isin[isin] = idx
+
+            normalised = " ".join(words)
+            self.names.append(normalised)
+
+            for word in set(words):
+                tokens.setdefault(word, []).append(idx)
+            grams = set()
+            for word in set(words):
+                word_grams = gram_cache.get(word)
+                if word_grams is None:
+                    word_grams = gram_cache[word] = _short_grams(word)
+                grams |= word_grams
+            for gram in grams:
+                short_grams.setdefault(gram, []).append(idx)
+            for n in range(1, len(words[0]) + 1):
+                leading.setdefault(words[0][:n], []).append(idx)
+            for gram in _trigrams(normalised):
+                trigrams.setdefault(gram, []).append(idx)
+
+        self.tokens = _freeze(tokens)
+        self.short_grams = _freeze(short_grams)
+        self.leading = _freeze(leading)
+        self.trigrams = _freeze(trigrams)
+        self.name_lengths = np.fromiter((len(n) for n in self.names), dtype=np.int64, count=len(self.names))
+
+    def __len__(self) -> int:
+        return len(self.schemes)
+
+    def get(self, scheme_code) -> Optional[dict]:
+        idx = self.by_code.get(str(scheme_code))
+        return self.schemes[idx] if idx is not None else None
+
+    def get_by_isin(self, isin: Optional[str]) -> Optional[dict]:
+        idx = self.by_isin.get((isin or "").strip().upper())
+        return self.schemes[idx] if idx is not None else None
+
+    def _term_ids(self, term: str, within: Optional[np.ndarray] = None) -> np.ndarray:
+        """Ids (optionally restricted to `within`) whose name matches a query term."""
+        if len(term) < 3:
+            postings = [self.short_grams.get(term, _EMPTY)]
+        else:
+            postings = [self.trigrams.get(gram, _EMPTY) for gram in _trigrams(term)]
+        if within is not None:
+            postings.append(within)
+        candidates = _intersect(postings)
+        if len(term) <= 3 or candidates.size == 0:
+            # Short-gram and single-trigram postings are exact
+            return candidates
+        return self._verify(candidates, term)
+
+    def _verify(self, candidates: np.ndarray, text: str) -> np.ndarray:
+        """Keep candidates whose name contains `text`; whole-token hits skip the string scan."""
+        exact = self.tokens.get(text)
+        if exact is not None:
+            known = np.isin(candidates, exact, assume_unique=True)
+        else:
+            known = np.zeros(candidates.size, dtype=bool)
+        names = self.names
+        for pos in np.flatnonzero(~known):
+            known[pos] = text in names[candidates[pos]]
+        return candidates[known]
+
+    def _matching_ids(self, terms: List[str], phrases: List[str]) -> np.ndarray:
+        ids = None
+        # Rarest-looking (longest) terms first keeps the intersections small
+        for term in sorted(terms, key=len, reverse=True):
+            ids = self._term_ids(term, ids)
+            if ids.size == 0:
+                return _EMPTY
+        for phrase in phrases:
+            ids = self._verify(ids, phrase)
+        return ids
+
+    def _relevance_order(self, ids: np.ndarray, terms: List[str]) -> np.ndarray:
+        """
+        Order ids by: name starts with the first term, number of terms matching
+        whole tokens, then shorter names (closer matches) first.
+        """
+        leads = np.isin(ids, self.leading.get(terms[0], _EMPTY), assume_unique=True)
+        whole_words = np.zeros(ids.size, dtype=np.int64)
+        for term in terms:
+            whole_words += np.isin(ids, self.tokens.get(term, _EMPTY), assume_unique=True)
+        return ids[np.lexsort((ids, self.name_lengths[ids], -whole_words, ~leads))]
+
+    def search(self, query: Optional[str] = None, filters: Iterable[Optional[str]] = (),
+               limit: int = 20, offset: int = 0,
+               sort_key: Optional[Callable[[dict], float]] = None, descending: bool = False) -> List[dict]:
+        """
+        Ranked, paginated lookup.
+
+        Every query token must appear in the scheme name, and every filter (e.g.
+        category or AMC) must appear as a phrase. Results are ordered by
+        relevance unless `sort_key` is given.
+        """
+        terms = tokenize(query)
+        phrases = [p for p in (" ".join(tokenize(f)) for f in filters if f) if p]
+        if not terms and not phrases:
+            return []
+
+        cache_key = (tuple(terms), tuple(phrases), sort_key, descending)
+        ranked = self._cache.get(cache_key)
+        if ranked is None:
+            # Filters double as search terms when there is no free-text query
+            ids = self._matching_ids(terms or [t for p in phrases for t in p.split()], phrases)
+
+            if sort_key is not None:
+                keys = np.fromiter((sort_key(self.schemes[i]) for i in ids), dtype=np.float64, count=ids.size)
+                ranked = ids[np.lexsort((ids, -keys if descending else keys))]
+            elif terms:
+                ranked = self._relevance_order(ids, terms)
+            else:
+                ranked = ids
+
+            if len(self._cache) >= RESULT_CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[cache_key] = ranked
+
+        return [self.schemes[i] for i in ranked[offset:offset + limit]]
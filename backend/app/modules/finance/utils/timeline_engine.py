@@ -0,0 +1,119 @@
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from backend.app.modules.finance.utils.nav_series import NavSeries
+from backend.app.modules.finance.utils.financial_math import BUY_TYPES, SELL_TYPES, order_day, order_cash_amount
+
+
+def forward_filled_navs(series: NavSeries, ordinals: np.ndarray) -> np.ndarray:
+    """
+    NAV in effect on each of the given date ordinals: the latest NAV published on
+    or before that day, or 0.0 before the first published NAV.
+    """
+    if not series:
+        return np.zeros(len(ordinals))
+
+    # Zero-copy views over the series' array('q') / array('d') buffers
+    hist_ordinals = np.frombuffer(series.ordinals, dtype=np.int64)
+    hist_navs = np.frombuffer(series.navs, dtype=np.float64)
+
+    idx = np.searchsorted(hist_ordinals, ordinals, side="right") - 1
+    return np.where(idx >= 0, hist_navs[np.clip(idx, 0, None)], 0.0)
+
+
+class TimelineArrays(NamedTuple):
+    value: np.ndarray
+    invested: np.ndarray
+    benchmark: np.ndarray
+    # False where a held scheme has no NAV on or before the snapshot (value understated)
+    priced: np.ndarray
+
+
+class PortfolioTimelineEngine:
+    """
+    Vectorized portfolio timeline engine.
+
+    Orders (sorted by date) are folded once into per-snapshot deltas and
+    accumulated with a cumulative sum, giving a dense snapshot x scheme units
+    matrix. It is valued against a matching NAV matrix forward-filled from the
+    NAV histories, so every snapshot is priced with array operations instead of
+    per-date dictionary lookups.
+
+    Args:
+        orders: MutualFundOrder rows sorted by order_date ascending
+        nav_histories: {scheme_code: NavSeries}
+        benchmark_history: NavSeries of the benchmark scheme
+    """
+
+    def __init__(self, orders: List, nav_histories: Dict[str, NavSeries], benchmark_history: Optional[NavSeries] = None):
+        self.schemes = sorted({str(o.scheme_code) for o in orders})
+        scheme_index = {code: k for k, code in enumerate(self.schemes)}
+
+        self.nav_histories = nav_histories
+        self.benchmark_history = benchmark_history or NavSeries()
+
+        n = len(orders)
+        self.order_ordinals = np.empty(n, dtype=np.int64)
+        self.order_schemes = np.empty(n, dtype=np.int64)
+        self.signed_units = np.zeros(n)
+        self.signed_amounts = np.zeros(n)
+        self.signed_cash = np.zeros(n)
+
+        for i, order in enumerate(orders):
+            self.order_ordinals[i] = order_day(order).toordinal()
+            self.order_schemes[i] = scheme_index[str(order.scheme_code)]
+            if order.type in BUY_TYPES:
+                sign = 1.0
+            elif order.type in SELL_TYPES:
+                sign = -1.0
+            else:
+                continue
+            self.signed_units[i] = sign * float(order.units)
+            self.signed_amounts[i] = sign * float(order.amount)
+            self.signed_cash[i] = sign * order_cash_amount(order)
+
+    def evaluate(self, snapshot_dates: Sequence[date]) -> TimelineArrays:
+        """
+        Portfolio value, invested amount and benchmark value at each snapshot date
+        (ascending), and whether every scheme held on that date had a NAV.
+        """
+        snap_ordinals = np.fromiter((d.toordinal() for d in snapshot_dates), dtype=np.int64, count=len(snapshot_dates))
+        n_snaps = len(snap_ordinals)
+        if n_snaps == 0:
+            empty = np.zeros(0)
+            return TimelineArrays(empty, empty, empty, np.zeros(0, dtype=bool))
+
+        # First snapshot each order counts towards; orders after the last snapshot are dropped
+        bins = np.searchsorted(snap_ordinals, self.order_ordinals, side="left")
+        in_range = bins < n_snaps
+        bins, schemes = bins[in_range], self.order_schemes[in_range]
+
+        # Cumulative units matrix (snapshots x schemes) and invested vector
+        units = np.zeros((n_snaps, len(self.schemes)))
+        np.add.at(units, (bins, schemes), self.signed_units[in_range])
+        units = np.cumsum(units, axis=0)
+
+        invested = np.zeros(n_snaps)
+        np.add.at(invested, bins, self.signed_amounts[in_range])
+        invested = np.cumsum(invested)
+
+        # Forward-filled NAV matrix over the same snapshots
+        navs = np.column_stack([
+            forward_filled_navs(self.nav_histories.get(code, NavSeries()), snap_ordinals) for code in self.schemes
+        ]) if self.schemes else np.zeros((n_snaps, 0))
+
+        held = units > 0
+        value = np.where(held, units * navs, 0.0).sum(axis=1)
+        priced = ~(held & (navs <= 0)).any(axis=1)
+
+        # Benchmark shadow units: the same cash moved in/out of the benchmark on each order date
+        benchmark = np.zeros(n_snaps)
+        if self.benchmark_history:
+            order_bm_navs = forward_filled_navs(self.benchmark_history, self.order_ordinals[in_range])
+            priced = order_bm_navs > 0
+            shadow = np.zeros(n_snaps)
+            np.add.at(shadow, bins[priced], self.signed_cash[in_range][priced] / order_bm_navs[priced])
+            shadow = np.cumsum(shadow)
+            benchmark = np.maximum(0.0, shadow * forward_filled_navs(self.benchmark_history, snap_ordinals))
+
+        return TimelineArrays(value, invested, benchmark, priced)
@@ -0,0 +1,169 @@
+import math
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from sqlalchemy.orm import Session
+from backend.app.core.fingerprint import fingerprint
+from backend.app.modules.finance import models as finance_models
+from backend.app.modules.finance.services.category_service import CategoryService
+from backend.app.modules.finance.services.transaction_rollup_service import TransactionRollupService
+from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator, DedupCandidate
+from backend.app.modules.ingestion.dedup_filter import DedupFilter
+
+
+class BulkImportService:
+    """
+    Imports a verified statement (CSV/Excel rows from the parser) in one database transaction.
+
+    The whole batch is validated, deduplicated with TransactionDeduplicator.check_batch
+    and categorized with the tenant's compiled rule matcher. New rows are inserted with
+    one columnar DuckDB insert (DataFrame scan), the account balance moves by the
+    aggregated delta and transaction rollups are updated once. Every input row gets
+    an outcome: imported, duplicate or error.
+    """
+
+    @staticmethod
+    def _parse_row(item: Dict[str, Any]) -> dict:
+        """Validated row fields; raises ValueError for rows that cannot be imported."""
+        date = datetime.fromisoformat(item["date"])
+        # Statement dates are wall-clock dates; stored timestamps are naive
+        date = date.replace(tzinfo=None)
+        amount = float(item["amount"])
+        if not math.isfinite(amount):
+            raise ValueError(f"Invalid amount {item['amount']}")
+        return {
+            "date": date,
+            "amount": Decimal(str(amount)),
+            "description": item.get("description"),
+            "recipient": item.get("recipient"),
+            "external_id": item.get("external_id") or item.get("ref_id")
+        }
+
+    @staticmethod
+    def _insert(db: Session, rows: List[dict]) -> None:
+        """Insert transaction rows on the session's connection (inside its transaction)."""
+        table = finance_models.Transaction.__table__
+        conn = db.connection().connection.driver_connection
+        if not hasattr(conn, "register"):
+            db.execute(table.insert(), rows)
+            return
+
+        frame = pd.DataFrame([
+            dict(row, type=row["type"].value, amount=float(row["amount"])) for row in rows
+        ])
+        columns = ", ".join(f'"{c}"' for c in frame.columns)
+        conn.register("bulk_import_rows", frame)
+        try:
+            conn.execute(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM bulk_import_rows")
+        finally:
+            conn.unregister("bulk_import_rows")
+
+    @staticmethod
+    def import_transactions(
+        db: Session,
+        tenant_id: str,
+        account_id: str,
+        items: List[Dict[str, Any]],
+        source: str = "CSV"
+    ) -> Dict[str, Any]:
+        """
+        Import statement rows into one account.
+
+        Args:
+            items: rows with date (ISO string), amount (signed), description,
+                recipient and external_id/ref_id
+
+        Returns:
+            {"imported", "duplicates", "errors" (messages), "results" (one outcome per row)}
+        """
+        account = db.query(finance_models.Account).filter(
+            finance_models.Account.id == account_id,
+            finance_models.Account.tenant_id == tenant_id
+        ).first()
+        if not account:
+            raise ValueError("Account not found")
+
+        results: List[Optional[dict]] = [None] * len(items)
+        valid = []
+        for idx, item in enumerate(items):
+            try:
+                valid.append((idx, BulkImportService._parse_row(item)))
+            except Exception as e:
+                results[idx] = {"row": idx + 1, "status": "error", "reason": str(e)}
+
+        duplicates = TransactionDeduplicator.check_batch(db, tenant_id, [
+            DedupCandidate(account_id, float(r["amount"]), r["date"], r["description"], r["recipient"], r["external_id"])
+            for _, r in valid
+        ])
+
+        matcher = CategoryService.get_rule_matcher(db, tenant_id)
+        now = datetime.utcnow()
+        rows, row_indexes = [], []
+        for (idx, r), (is_dup, reason, existing_id) in zip(valid, duplicates):
+            if is_dup:
+                results[idx] = {"row": idx + 1, "status": "duplicate", "reason": reason, "existing_id": existing_id}
+                continue
+
+            category, exclude = "Uncategorized", False
+            rule = matcher.match(r["description"], r["recipient"]) if (r["description"] or r["recipient"]) else None
+            if rule:
+                category = rule.category
+                exclude = rule.exclude_from_reports
+
+            content_hash = TransactionDeduplicator.generate_hash(
+                tenant_id, account_id, r["date"], float(r["amount"]), r["description"], r["recipient"]
+            )
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "tenant_id": tenant_id,
+                "account_id": account_id,
+                "type": finance_models.TransactionType.DEBIT if r["amount"] < 0 else finance_models.TransactionType.CREDIT,
+                "amount": r["amount"],
+                "date": r["date"],
+                "description": r["description"],
+                "recipient": r["recipient"],
+                "category": category,
+                "tags": None,
+                "content_hash": content_hash,
+                "content_fingerprint": fingerprint(content_hash),
+                "external_id": r["external_id"] or str(uuid.uuid4()),
+                "is_transfer": False,
+                "source": source,
+                "exclude_from_reports": exclude,
+                "is_emi": False,
+                "created_at": now
+            })
+            row_indexes.append(idx)
+
+        if rows:
+            delta = sum((row["amount"] for row in rows), Decimal(0))
+            # Before the insert is visible, so concurrent checks never miss these rows
+            for row in rows:
+                DedupFilter.add(tenant_id, row["external_id"], row["content_hash"])
+            try:
+                BulkImportService._insert(db, rows)
+                TransactionRollupService.record(db, rows)
+                # Liabilities: money in reduces the balance owed, spending raises it
+                balance = Decimal(str(account.balance or 0))
+                if account.type in [finance_models.AccountType.LOAN, finance_models.AccountType.CREDIT_CARD]:
+                    account.balance = balance - delta
+                else:
+                    account.balance = balance + delta
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for idx in row_indexes:
+                    results[idx] = {"row": idx + 1, "status": "error", "reason": f"Import failed: {e}"}
+                rows = []
+            else:
+                for idx, row in zip(row_indexes, rows):
+                    results[idx] = {"row": idx + 1, "status": "imported", "transaction_id": row["id"]}
+
+        return {
+            "imported": len(rows),
+            "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+            "errors": [f"Row {r['row']}: {r['reason']}" for r in results if r["status"] == "error"],
+            "results": results
+        }
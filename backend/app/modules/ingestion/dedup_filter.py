@@ -0,0 +1,165 @@
+import threading
+from typing import Dict, Iterable, Optional, Set
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+from backend.app.core.bloom import ScalableBloomFilter
+from backend.app.modules.finance import models as finance_models
+from backend.app.modules.ingestion import models as ingestion_models
+
+# Target false-positive rate per tenant filter
+DEDUP_FILTER_ERROR_RATE = 0.01
+# Smallest first stage, so new tenants do not grow a chain of tiny stages
+DEDUP_FILTER_MIN_CAPACITY = 10_000
+# Rows read per round while warming
+WARM_BATCH_SIZE = 50_000
+
+_MODELS = (finance_models.Transaction, ingestion_models.PendingTransaction)
+
+_filters: Dict[str, ScalableBloomFilter] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+_ready = False
+_lock = threading.Lock()
+
+
+def _ref_key(value: str) -> str:
+    return f"r:{value}"
+
+
+def _hash_key(value: str) -> str:
+    return f"h:{value}"
+
+
+class DedupFilter:
+    """
+    Process-wide, per-tenant Bloom filter over the external ids and content
+    hashes of confirmed and triage transactions.
+
+    The reference-id and content-hash tiers of TransactionDeduplicator ask the
+    filter first and only query the database for values it may hold; most
+    incoming messages are new, so most of those queries are skipped. Filters
+    are warmed from the database at startup and kept current by a session
+    listener (ORM inserts and updates) and by BulkImportService. Deleted rows
+    stay in the filter and only cost false positives.
+
+    Until warm() has completed every value is reported as possibly present,
+    so scripts and workers that never warm the filter query the database as
+    before. The filter only sees writes made by this process.
+    """
+
+    @staticmethod
+    def _add_row(tenant_id: str, external_id: Optional[str], content_hash: Optional[str]) -> None:
+        """Caller holds _lock."""
+        if not tenant_id or not (external_id or content_hash):
+            return
+        bloom = _filters.get(tenant_id)
+        if bloom is None:
+            bloom = _filters[tenant_id] = ScalableBloomFilter(DEDUP_FILTER_MIN_CAPACITY, DEDUP_FILTER_ERROR_RATE)
+        if external_id:
+            bloom.add(_ref_key(external_id))
+        if content_hash:
+            bloom.add(_hash_key(content_hash))
+
+    @staticmethod
+    def add(tenant_id: str, external_id: Optional[str] = None, content_hash: Optional[str] = None) -> None:
+        """Record a row written outside the ORM unit of work (bulk insert)."""
+        with _lock:
+            DedupFilter._add_row(str(tenant_id), external_id, content_hash)
+
+    @staticmethod
+    def _after_flush(session: Session, flush_context) -> None:
+        # Flushed rows may still be rolled back; leaving them in only adds false positives
+        rows = [
+            (str(obj.tenant_id), obj.external_id, obj.content_hash)
+            for obj in list(session.new) + list(session.dirty)
+            if isinstance(obj, _MODELS)
+        ]
+        if rows:
+            with _lock:
+                for row in rows:
+                    DedupFilter._add_row(*row)
+
+    @staticmethod
+    def install(session_factory) -> None:
+        """Add rows flushed through sessions from `session_factory` to the filters."""
+        if not event.contains(session_factory, "after_flush", DedupFilter._after_flush):
+            event.listen(session_factory, "after_flush", DedupFilter._after_flush)
+
+    @staticmethod
+    def warm(db: Session) -> None:
+        """Load every tenant's external ids and content hashes; enables the filter."""
+        global _ready
+        keys: Dict[str, int] = {}
+        for model in _MODELS:
+            for tenant_id, count in db.query(model.tenant_id, func.count(model.id)).group_by(model.tenant_id).all():
+                keys[str(tenant_id)] = keys.get(str(tenant_id), 0) + 2 * count
+
+        with _lock:
+            for tenant_id, count in keys.items():
+                if tenant_id not in _filters:
+                    # Room for the existing rows plus growth before a second stage is needed
+                    _filters[tenant_id] = ScalableBloomFilter(
+                        max(DEDUP_FILTER_MIN_CAPACITY, count * 2), DEDUP_FILTER_ERROR_RATE
+                    )
+
+        for model in _MODELS:
+            stmt = select(model.tenant_id, model.external_id, model.content_hash).where(
+                or_(model.external_id != None, model.content_hash != None)
+            ).execution_options(yield_per=WARM_BATCH_SIZE)
+            for batch in db.execute(stmt).partitions():
+                with _lock:
+                    for row in batch:
+                        DedupFilter._add_row(str(row.tenant_id), row.external_id, row.content_hash)
+        _ready = True
+
+    @staticmethod
+    def _maybe(tenant_id: str, values: Iterable[str], key) -> Set[str]:
+        values = {v for v in values if v}
+        if not _ready or not values:
+            return values
+        tenant_id = str(tenant_id)
+        with _lock:
+            bloom = _filters.get(tenant_id)
+            maybe = {v for v in values if bloom is not None and key(v) in bloom}
+            stats = _stats.setdefault(tenant_id, {"probes": 0, "negatives": 0, "false_positives": 0})
+            stats["probes"] += len(values)
+            stats["negatives"] += len(values) - len(maybe)
+        return maybe
+
+    @staticmethod
+    def maybe_refs(tenant_id: str, values: Iterable[str]) -> Set[str]:
+        """External ids that may be stored for the tenant (the rest certainly are not)."""
+        return DedupFilter._maybe(tenant_id, values, _ref_key)
+
+    @staticmethod
+    def maybe_hashes(tenant_id: str, values: Iterable[str]) -> Set[str]:
+        """Content hashes that may be stored for the tenant (the rest certainly are not)."""
+        return DedupFilter._maybe(tenant_id, values, _hash_key)
+
+    @staticmethod
+    def record_false_positives(tenant_id: str, count: int = 1) -> None:
+        """Values the filter passed that the database did not have."""
+        if not _ready or count <= 0:
+            return
+        with _lock:
+            stats = _stats.setdefault(str(tenant_id), {"probes": 0, "negatives": 0, "false_positives": 0})
+            stats["false_positives"] += count
+
+    @staticmethod
+    def stats(tenant_id: str) -> dict:
+        """Size and hit statistics of the tenant's filter since startup."""
+        tenant_id = str(tenant_id)
+        with _lock:
+            bloom = _filters.get(tenant_id)
+            counters = dict(_stats.get(tenant_id, {"probes": 0, "negatives": 0, "false_positives": 0}))
+            absent = counters["negatives"] + counters["false_positives"]
+            return {
+                "enabled": _ready,
+                "keys": len(bloom) if bloom else 0,
+                "stages": len(bloom.stages) if bloom else 0,
+                "size_bytes": bloom.size_bytes if bloom else 0,
+                "target_false_positive_rate": DEDUP_FILTER_ERROR_RATE,
+                "estimated_false_positive_rate": round(bloom.estimated_error_rate(), 6) if bloom else 0.0,
+                **counters,
+                # Share of probes for absent values that still reached the database
+                "observed_false_positive_rate": round(counters["false_positives"] / absent, 6) if absent else 0.0
+            }
@@ -1,11 +1,45 @@
+import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import bindparam, or_
 import hashlib
 from datetime import datetime
-from typing import Optional, Tuple
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from backend.app.core.date_filters import same_day, within_days
+from backend.app.core.fingerprint import fingerprint
 from backend.app.modules.finance import models as finance_models
 from backend.app.modules.ingestion import models as ingestion_models
 from backend.app.modules.ingestion.base import ParsedTransaction
+from backend.app.modules.ingestion.dedup_filter import DedupFilter
+
+# Candidates resolved per round of id/hash lookups (bounds the IN lists)
+DEDUP_BATCH_SIZE = 5000
+# Above this many distinct amounts the field-match read is not filtered by amount in SQL
+FIELD_MATCH_AMOUNT_LIMIT = 500
+
+DedupResult = Tuple[bool, Optional[str], Optional[str]]
+
+
+class DedupCandidate(NamedTuple):
+    account_id: str
+    amount: float
+    date: datetime
+    description: Optional[str] = None
+    recipient: Optional[str] = None
+    external_id: Optional[str] = None
+
+
+def _amount_key(amount) -> Decimal:
+    return Decimal(str(amount))
+
+
+def _fields_match(candidate: DedupCandidate, description: Optional[str], recipient: Optional[str], pending: bool) -> bool:
+    """Description/recipient rule of the field-match tier (see check_raw_duplicate)."""
+    if candidate.recipient:
+        return description == candidate.description or recipient == candidate.recipient
+    if candidate.description or pending:
+        return description == candidate.description
+    return True
 
 class TransactionDeduplicator:
     """
@@ -49,7 +83,7 @@ class TransactionDeduplicator:
     ) -> Optional[finance_models.Transaction]:
         """
         Check if an existing transaction matches basic fields (Amount, Date, Desc/Recipient).
-        Resilient: Only compares the DATE part (ignoring time).
+        Resilient: Only compares the DATE part (ignoring time), as a range on the date column.
         """
         # Use a small epsilon or exact match for decimal/float?
         # DuckDB usually handles float equality well for stored Decimals if precision is kept.
@@ -57,7 +91,7 @@ class TransactionDeduplicator:
             finance_models.Transaction.tenant_id == tenant_id,
             finance_models.Transaction.account_id == account_id,
             finance_models.Transaction.amount == amount,
-            func.date(finance_models.Transaction.date) == date.date()
+            same_day(finance_models.Transaction.date, date)
         )
         
         # Match Description OR Recipient
@@ -112,9 +146,10 @@ class TransactionDeduplicator:
         Check for duplicates using raw fields (useful for manual entry or generic builders).
         Returns (is_duplicate, reason, existing_id)
         """
-        # 1. Reference ID
+        # 1. Reference ID (skipped when the tenant's filter rules both forms out)
         ref_id = TransactionDeduplicator.normalize_ref_id(external_id)
-        if ref_id:
+        maybe_refs = DedupFilter.maybe_refs(tenant_id, (ref_id, external_id)) if ref_id else set()
+        if maybe_refs:
             # Confirmed
             existing = db.query(finance_models.Transaction).filter(
                 finance_models.Transaction.tenant_id == tenant_id,
@@ -131,27 +166,32 @@ class TransactionDeduplicator:
             
             pending = query_pending.first()
             if pending: return True, f"Ref ID {ref_id} already in triage", str(pending.id)
+            DedupFilter.record_false_positives(tenant_id, len(maybe_refs))
 
         # 2. Content Hash Check
         content_hash = TransactionDeduplicator.generate_hash(
             tenant_id, account_id, date, amount, description, recipient
         )
-        
-        existing_hash = db.query(finance_models.Transaction).filter(
-            finance_models.Transaction.tenant_id == tenant_id,
-            finance_models.Transaction.content_hash == content_hash
-        ).first()
-        if existing_hash: return True, "Standardized field-hash match", str(existing_hash.id)
+        if DedupFilter.maybe_hashes(tenant_id, (content_hash,)):
+            content_fp = fingerprint(content_hash)
+            existing_hash = db.query(finance_models.Transaction).filter(
+                finance_models.Transaction.tenant_id == tenant_id,
+                finance_models.Transaction.content_fingerprint == content_fp,
+                finance_models.Transaction.content_hash == content_hash
+            ).first()
+            if existing_hash: return True, "Standardized field-hash match", str(existing_hash.id)
 
-        query_pending_hash = db.query(ingestion_models.PendingTransaction).filter(
-            ingestion_models.PendingTransaction.tenant_id == tenant_id,
-            ingestion_models.PendingTransaction.content_hash == content_hash
-        )
-        if exclude_pending_id:
-            query_pending_hash = query_pending_hash.filter(ingestion_models.PendingTransaction.id != exclude_pending_id)
-            
-        pending_hash = query_pending_hash.first()
-        if pending_hash: return True, "Standardized field-hash match in triage", str(pending_hash.id)
+            query_pending_hash = db.query(ingestion_models.PendingTransaction).filter(
+                ingestion_models.PendingTransaction.tenant_id == tenant_id,
+                ingestion_models.PendingTransaction.content_fingerprint == content_fp,
+                ingestion_models.PendingTransaction.content_hash == content_hash
+            )
+            if exclude_pending_id:
+                query_pending_hash = query_pending_hash.filter(ingestion_models.PendingTransaction.id != exclude_pending_id)
+
+            pending_hash = query_pending_hash.first()
+            if pending_hash: return True, "Standardized field-hash match in triage", str(pending_hash.id)
+            DedupFilter.record_false_positives(tenant_id)
 
         # 3. Fields match (Date, Amount, Desc)
         confirmed_match = TransactionDeduplicator.check_fields_match(db, tenant_id, account_id, amount, date, description, recipient)
@@ -163,7 +203,7 @@ class TransactionDeduplicator:
             ingestion_models.PendingTransaction.tenant_id == tenant_id,
             ingestion_models.PendingTransaction.account_id == account_id,
             ingestion_models.PendingTransaction.amount == amount,
-            func.date(ingestion_models.PendingTransaction.date) == date.date(),
+            same_day(ingestion_models.PendingTransaction.date, date),
             or_(
                 ingestion_models.PendingTransaction.description == description,
                 ingestion_models.PendingTransaction.recipient == recipient
@@ -177,3 +217,238 @@ class TransactionDeduplicator:
              return True, f"Identical fields match triage item {pending_match.id}", str(pending_match.id)
 
         return False, None, None
+
+    @staticmethod
+    def check_batch(
+        db: Session,
+        tenant_id: str,
+        candidates: Sequence[DedupCandidate],
+        exclude_pending_id: Optional[str] = None
+    ) -> List[DedupResult]:
+        """
+        Batch form of check_raw_duplicate for imports and syncs.
+
+        The three tiers (reference id, content hash, identical fields) are
+        resolved against confirmed and triage rows with set-based queries:
+        IN lists on external_id and content_fingerprint per DEDUP_BATCH_SIZE
+        candidates, then one read per table of the accounts' rows over the
+        date span of the candidates still unresolved. Candidates are also
+        checked against earlier non-duplicate candidates of the same batch,
+        as if those had been saved in order.
+
+        Returns one (is_duplicate, reason, existing_id) per candidate, in order.
+        existing_id is None for a duplicate of an earlier candidate.
+        """
+        hashes = [
+            TransactionDeduplicator.generate_hash(tenant_id, c.account_id, c.date, c.amount, c.description, c.recipient)
+            for c in candidates
+        ]
+        results: List[Optional[DedupResult]] = []
+        for start in range(0, len(candidates), DEDUP_BATCH_SIZE):
+            end = start + DEDUP_BATCH_SIZE
+            results.extend(TransactionDeduplicator._check_ids(
+                db, tenant_id, candidates[start:end], hashes[start:end], exclude_pending_id
+            ))
+
+        unresolved = [i for i, result in enumerate(results) if result is None]
+        field_results = TransactionDeduplicator._check_fields(
+            db, tenant_id, [candidates[i] for i in unresolved], exclude_pending_id
+        )
+        for i, result in zip(unresolved, field_results):
+            results[i] = result
+
+        # Within the batch: compare with the earlier candidates that will be saved
+        seen_refs: Dict[str, int] = {}
+        seen_hashes: Dict[str, int] = {}
+        seen_fields: Dict[tuple, List[int]] = {}
+        for i, (candidate, content_hash) in enumerate(zip(candidates, hashes)):
+            ref_id = TransactionDeduplicator.normalize_ref_id(candidate.external_id)
+            refs = (ref_id, candidate.external_id) if ref_id else ()
+            fields_key = (str(candidate.account_id), candidate.date.date(), _amount_key(candidate.amount))
+
+            if not results[i][0]:
+                earlier = next((seen_refs[r] for r in refs if r in seen_refs), None)
+                if earlier is not None:
+                    results[i] = (True, f"Ref ID {ref_id} repeated in batch (row {earlier + 1})", None)
+                elif content_hash in seen_hashes:
+                    results[i] = (True, f"Standardized field-hash match in batch (row {seen_hashes[content_hash] + 1})", None)
+                else:
+                    earlier = next((
+                        j for j in seen_fields.get(fields_key, [])
+                        if _fields_match(candidate, candidates[j].description, candidates[j].recipient, pending=False)
+                    ), None)
+                    if earlier is not None:
+                        results[i] = (True, f"Identical fields match row {earlier + 1} in batch", None)
+            if results[i][0]:
+                continue
+
+            if candidate.external_id:
+                # Saved rows keep the external id as given
+                seen_refs.setdefault(candidate.external_id, i)
+            seen_hashes.setdefault(content_hash, i)
+            seen_fields.setdefault(fields_key, []).append(i)
+        return results
+
+    @staticmethod
+    def _scoped(db: Session, tenant_id: str, model, exclude_pending_id: Optional[str], *columns):
+        query = db.query(*columns).filter(model.tenant_id == tenant_id)
+        if model is ingestion_models.PendingTransaction and exclude_pending_id:
+            query = query.filter(model.id != exclude_pending_id)
+        return query
+
+    @staticmethod
+    def _check_ids(
+        db: Session,
+        tenant_id: str,
+        candidates: Sequence[DedupCandidate],
+        hashes: Sequence[str],
+        exclude_pending_id: Optional[str] = None
+    ) -> List[Optional[DedupResult]]:
+        """Reference id and content hash tiers for one round of candidates (None: not resolved)."""
+        confirmed = finance_models.Transaction
+        pending = ingestion_models.PendingTransaction
+
+        def lookup(model, column, values) -> Dict[str, str]:
+            found: Dict[str, str] = {}
+            if values:
+                query = TransactionDeduplicator._scoped(db, tenant_id, model, exclude_pending_id, column, model.id)
+                for value, row_id in query.filter(column.in_(values)).all():
+                    found.setdefault(value, str(row_id))
+            return found
+
+        def lookup_hashes(model, values) -> Dict[str, str]:
+            # Probe the BIGINT fingerprint index, then confirm the full hash
+            found: Dict[str, str] = {}
+            if values:
+                query = TransactionDeduplicator._scoped(
+                    db, tenant_id, model, exclude_pending_id, model.content_hash, model.id
+                ).filter(model.content_fingerprint.in_({fingerprint(h) for h in values}))
+                for value, row_id in query.all():
+                    if value in values:
+                        found.setdefault(value, str(row_id))
+            return found
+
+        ref_ids = [TransactionDeduplicator.normalize_ref_id(c.external_id) for c in candidates]
+        refs = {v for c, ref_id in zip(candidates, ref_ids) if ref_id for v in (ref_id, c.external_id)}
+        # Only values the tenant's filter may hold reach the database
+        refs = DedupFilter.maybe_refs(tenant_id, refs)
+        maybe_hashes = DedupFilter.maybe_hashes(tenant_id, hashes)
+        confirmed_refs = lookup(confirmed, confirmed.external_id, refs)
+        pending_refs = lookup(pending, pending.external_id, refs)
+        confirmed_hashes = lookup_hashes(confirmed, maybe_hashes)
+        pending_hashes = lookup_hashes(pending, maybe_hashes)
+        DedupFilter.record_false_positives(
+            tenant_id,
+            len(refs - confirmed_refs.keys() - pending_refs.keys())
+            + len(maybe_hashes - confirmed_hashes.keys() - pending_hashes.keys())
+        )
+
+        results: List[Optional[DedupResult]] = []
+        for c, ref_id, content_hash in zip(candidates, ref_ids, hashes):
+            if ref_id:
+                match = confirmed_refs.get(ref_id) or confirmed_refs.get(c.external_id)
+                if match:
+                    results.append((True, f"Ref ID {ref_id} already confirmed", match))
+                    continue
+                match = pending_refs.get(ref_id) or pending_refs.get(c.external_id)
+                if match:
+                    results.append((True, f"Ref ID {ref_id} already in triage", match))
+                    continue
+
+            if content_hash in confirmed_hashes:
+                results.append((True, "Standardized field-hash match", confirmed_hashes[content_hash]))
+            elif content_hash in pending_hashes:
+                results.append((True, "Standardized field-hash match in triage", pending_hashes[content_hash]))
+            else:
+                results.append(None)
+        return results
+
+    @staticmethod
+    def _check_fields(
+        db: Session,
+        tenant_id: str,
+        candidates: Sequence[DedupCandidate],
+        exclude_pending_id: Optional[str] = None
+    ) -> List[DedupResult]:
+        """Identical-fields tier: one read per table of the candidates' accounts over their date span."""
+        if not candidates:
+            return []
+        days = [c.date.date() for c in candidates]
+        amounts = {_amount_key(c.amount) for c in candidates}
+
+        def same_day_rows(model) -> Dict[tuple, list]:
+            query = TransactionDeduplicator._scoped(
+                db, tenant_id, model, exclude_pending_id,
+                model.id, model.account_id, model.amount, model.date, model.description, model.recipient
+            ).filter(
+                model.account_id.in_({c.account_id for c in candidates}),
+                within_days(model.date, min(days), max(days))
+            )
+            if len(amounts) <= FIELD_MATCH_AMOUNT_LIMIT:
+                # Large IN lists cost more than reading the span and filtering here
+                query = query.filter(model.amount.in_(amounts))
+
+            rows: Dict[tuple, list] = {}
+            for row_id, account_id, amount, row_date, description, recipient in query.all():
+                key = (str(account_id), row_date.date(), _amount_key(amount))
+                rows.setdefault(key, []).append((str(row_id), description, recipient))
+            return rows
+
+        confirmed_fields = same_day_rows(finance_models.Transaction)
+        pending_fields = same_day_rows(ingestion_models.PendingTransaction)
+
+        results: List[DedupResult] = []
+        for c, day in zip(candidates, days):
+            key = (str(c.account_id), day, _amount_key(c.amount))
+            match = next((
+                row_id for row_id, description, recipient in confirmed_fields.get(key, [])
+                if _fields_match(c, description, recipient, pending=False)
+            ), None)
+            if match:
+                results.append((True, f"Identical fields match transaction {match}", match))
+                continue
+            match = next((
+                row_id for row_id, description, recipient in pending_fields.get(key, [])
+                if _fields_match(c, description, recipient, pending=True)
+            ), None)
+            if match:
+                results.append((True, f"Identical fields match triage item {match}", match))
+                continue
+            results.append((False, None, None))
+        return results
+
+    @staticmethod
+    def backfill_fingerprints(db: Session) -> int:
+        """
+        Fill content_fingerprint for rows stored before the column existed.
+        New rows get it on insert; returns the number of rows updated.
+        """
+        updated = 0
+        for model in (finance_models.Transaction, ingestion_models.PendingTransaction, ingestion_models.UnparsedMessage):
+            rows = db.query(model.id, model.content_hash).filter(
+                model.content_fingerprint.is_(None),
+                model.content_hash.isnot(None)
+            ).all()
+            if not rows:
+                continue
+
+            table = model.__table__
+            values = [{"row_id": str(row_id), "fp": fingerprint(content_hash)} for row_id, content_hash in rows]
+            conn = db.connection().connection.driver_connection
+            if hasattr(conn, "register"):
+                conn.register("fingerprint_backfill", pd.DataFrame(values))
+                try:
+                    conn.execute(
+                        f"UPDATE {table.name} SET content_fingerprint = b.fp "
+                        f"FROM fingerprint_backfill b WHERE {table.name}.id = b.row_id"
+                    )
+                finally:
+                    conn.unregister("fingerprint_backfill")
+            else:
+                db.execute(
+                    table.update().where(table.c.id == bindparam("row_id")).values(content_fingerprint=bindparam("fp")),
+                    values
+                )
+            updated += len(values)
+        db.commit()
+        return updated
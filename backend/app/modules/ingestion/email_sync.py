@@ -62,6 +62,8 @@ class EmailSyncService:
 
             email_ids = messages[0].split()
             stats["total_fetched"] = len(email_ids)
+            fetched = []
+            parsed_items = []
 
             for e_id in email_ids:
                 try:
@@ -138,75 +140,8 @@ class EmailSyncService:
                                 stats["errors"].append(f"Skipped noise: {subject[:30]}...")
                                 continue
 
-                            # Parse via External Microservice
-                            from backend.app.modules.ingestion.parser_service import ExternalParserService
-                            from backend.app.modules.ingestion.base import ParsedTransaction
-
-                            sender_id = msg.get("From")
-                            parser_response = ExternalParserService.parse_email(subject, body, sender_id)
-                            
-                            if parser_response and parser_response.get("status") == "processed":
-                                results = parser_response.get("results", [])
-                                if not results:
-                                    stats["failed"] += 1
-                                    stats["errors"].append(f"No transactions found in email: {subject[:30]}")
-                                    continue
-                                    
-                                for item in results:
-                                    t = item.get("transaction")
-                                    if not t: continue
-                                    
-                                    # Map to ParsedTransaction
-                                    parsed = ParsedTransaction(
-                                        amount=t.get("amount"),
-                                        date=datetime.fromisoformat(t.get("date").replace("Z", "+00:00")),
-                                        description=t.get("description") or subject,
-                                        type=t.get("type"),
-                                        account_mask=t.get("account", {}).get("mask"),
-                                        recipient=t.get("recipient") or t.get("merchant", {}).get("cleaned"),
-                                        category=t.get("category"),
-                                        ref_id=t.get("ref_id"),
-                                        balance=t.get("balance"),
-                                        credit_limit=t.get("credit_limit"),
-                                        raw_message=t.get("raw_message") or body,
-                                        source="EMAIL",
-                                        is_ai_parsed=item.get("metadata", {}).get("parser_used") == "AI"
-                                    )
-                                    
-                                    result = IngestionService.process_transaction(db, tenant_id, parsed)
-                                    status = result.get("status")
-                                    
-                                    if status in ["success", "triaged"]:
-                                        stats["processed"] += 1
-                                    elif result.get("deduplicated"):
-                                        pass
-                                    else:
-                                        stats["failed"] += 1
-                                        reason = result.get('message') or result.get('reason') or "Unknown Error"
-                                        err_msg = f"Ingestion failed for '{subject[:30]}...': {reason}"
-                                        stats["errors"].append(err_msg)
-                            else:
-                                stats["failed"] += 1
-                                err_msg = f"External parser failed for: {subject[:30]}..."
-                                stats["errors"].append(err_msg)
-                                
-                                # --- INTERACTIVE TRAINING CAPTURE ---
-                                # Check for transaction-related keywords
-                                keywords = ["bill", "mutual fund", "paid", "sent", "upi", "rs", "spent", "debited", "vpa", "txn", "transaction"]
-                                combined_text = (subject + " " + body).lower()
-                                if any(k in combined_text for k in keywords):
-                                    IngestionService.capture_unparsed(
-                                        db=db,
-                                        tenant_id=tenant_id,
-                                        source="EMAIL",
-                                        raw_content=f"Subject: {subject}\nBody: {body}",
-                                        subject=subject,
-                                        sender=msg.get("From")
-                                    )
-                                
-                                # Print body snippet for debugging
-                                if any(k in combined_text for k in ["txn", "upi", "hdfc", "spent", "debited", "transaction"]):
-                                    clean_body = body.replace("\n", " ").strip()
+                            # Parsed together after the fetch (batched parser calls)
+                            fetched.append((subject, body, msg.get("From")))
 
                 except Exception as e:
                     stats["errors"].append(f"Error processing message {e_id}: {str(e)}")
@@ -215,6 +150,86 @@ class EmailSyncService:
             mail.close()
             mail.logout()
 
+            # Parse via External Microservice
+            from backend.app.modules.ingestion.parser_service import ExternalParserService
+            from backend.app.modules.ingestion.base import ParsedTransaction
+
+            parser_responses = ExternalParserService.parse_batch([
+                {"source": "EMAIL", "sender": sender_id or "Unknown", "subject": subject, "body": body}
+                for subject, body, sender_id in fetched
+            ])
+            for (subject, body, sender_id), parser_response in zip(fetched, parser_responses):
+                try:
+                    if parser_response and parser_response.get("status") == "processed":
+                        results = parser_response.get("results", [])
+                        if not results:
+                            stats["failed"] += 1
+                            stats["errors"].append(f"No transactions found in email: {subject[:30]}")
+                            continue
+
+                        for item in results:
+                            t = item.get("transaction")
+                            if not t: continue
+
+                            # Map to ParsedTransaction
+                            parsed = ParsedTransaction(
+                                amount=t.get("amount"),
+                                date=datetime.fromisoformat(t.get("date").replace("Z", "+00:00")),
+                                description=t.get("description") or subject,
+                                type=t.get("type"),
+                                account_mask=t.get("account", {}).get("mask"),
+                                recipient=t.get("recipient") or t.get("merchant", {}).get("cleaned"),
+                                category=t.get("category"),
+                                ref_id=t.get("ref_id"),
+                                balance=t.get("balance"),
+                                credit_limit=t.get("credit_limit"),
+                                raw_message=t.get("raw_message") or body,
+                                source="EMAIL",
+                                is_ai_parsed=item.get("metadata", {}).get("parser_used") == "AI"
+                            )
+
+                            # Ingested together after the fetch (one batched dedup pass)
+                            parsed_items.append((subject, parsed))
+                    else:
+                        stats["failed"] += 1
+                        err_msg = f"External parser failed for: {subject[:30]}..."
+                        stats["errors"].append(err_msg)
+
+                        # --- INTERACTIVE TRAINING CAPTURE ---
+                        # Check for transaction-related keywords
+                        keywords = ["bill", "mutual fund", "paid", "sent", "upi", "rs", "spent", "debited", "vpa", "txn", "transaction"]
+                        combined_text = (subject + " " + body).lower()
+                        if any(k in combined_text for k in keywords):
+                            IngestionService.capture_unparsed(
+                                db=db,
+                                tenant_id=tenant_id,
+                                source="EMAIL",
+                                raw_content=f"Subject: {subject}\nBody: {body}",
+                                subject=subject,
+                                sender=sender_id
+                            )
+
+                        # Print body snippet for debugging
+                        if any(k in combined_text for k in ["txn", "upi", "hdfc", "spent", "debited", "transaction"]):
+                            clean_body = body.replace("\n", " ").strip()
+                except Exception as e:
+                    stats["errors"].append(f"Error processing message {subject[:30]}: {str(e)}")
+                    stats["failed"] += 1
+
+            results = IngestionService.process_batch(db, tenant_id, [parsed for _, parsed in parsed_items])
+            for (subject, _), result in zip(parsed_items, results):
+                status = result.get("status")
+                
+                if status in ["success", "triaged"]:
+                    stats["processed"] += 1
+                elif result.get("deduplicated"):
+                    pass
+                else:
+                    stats["failed"] += 1
+                    reason = result.get('message') or result.get('reason') or "Unknown Error"
+                    err_msg = f"Ingestion failed for '{subject[:30]}...': {reason}"
+                    stats["errors"].append(err_msg)
+
             # Update Log Success
             if log_entry:
                 log_entry.status = "completed"
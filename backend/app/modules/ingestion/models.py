@@ -1,8 +1,9 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Numeric
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Numeric, BigInteger, Index
 from sqlalchemy.orm import relationship, foreign, remote
 from backend.app.core.database import Base
+from backend.app.core.fingerprint import fingerprint_default
 
 class EmailConfiguration(Base):
     __tablename__ = "email_configurations"
@@ -54,6 +55,7 @@ class PendingTransaction(Base):
     source = Column(String, nullable=False) # SMS, EMAIL
     raw_message = Column(String, nullable=True)
     content_hash = Column(String, nullable=True, index=True)
+    content_fingerprint = Column(BigInteger, nullable=True, index=True, default=fingerprint_default) # 64-bit probe key for content_hash
     external_id = Column(String, nullable=True) # Reference Number/UTR
     is_transfer = Column(Boolean, default=False, nullable=False)
     to_account_id = Column(String, nullable=True) # Destination Account ID for transfers
@@ -66,6 +68,11 @@ class PendingTransaction(Base):
     exclude_from_reports = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Same-day duplicate checks (TransactionDeduplicator)
+        Index("ix_pending_txns_dedup", "tenant_id", "account_id", "amount", "date"),
+    )
+
 class MobileDevice(Base):
     __tablename__ = "mobile_devices"
 
@@ -90,6 +97,7 @@ class UnparsedMessage(Base):
     source = Column(String, nullable=False) # SMS, EMAIL
     raw_content = Column(String, nullable=False)
     content_hash = Column(String, nullable=True, index=True)
+    content_fingerprint = Column(BigInteger, nullable=True, index=True, default=fingerprint_default) # 64-bit probe key for content_hash
     subject = Column(String, nullable=True)
     sender = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,7 +1,42 @@
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, Any, List
 from backend.app.core.config import settings
 
+# Keep-alive connections to the parser microservice, shared by all threads
+PARSER_POOL_SIZE = 16
+# Messages per /ingest/batch request (the parser accepts up to 500)
+PARSER_BATCH_SIZE = 100
+PARSER_BATCH_TIMEOUT = 120
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_parser_session() -> requests.Session:
+    """The process-wide pooled session for parser calls, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PARSER_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def close_parser_session() -> None:
+    """Close pooled parser connections (application shutdown)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
 class ExternalParserService:
     @staticmethod
     def parse_sms(sender: str, body: str) -> Optional[Dict[str, Any]]:
@@ -12,7 +47,7 @@ class ExternalParserService:
             url = f"{settings.PARSER_SERVICE_URL}/ingest/sms"
             # Parser expects 'sender' and 'body'
             payload = {"sender": sender, "body": body}
-            response = requests.post(url, json=payload, timeout=10)
+            response = get_parser_session().post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -34,7 +69,7 @@ class ExternalParserService:
                 "body_text": body_text,
                 "sender": sender
             }
-            response = requests.post(url, json=payload, timeout=10)
+            response = get_parser_session().post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 return response.json()
@@ -43,6 +78,43 @@ class ExternalParserService:
             print(f"Error calling external parser: {e}")
             return None
 
+    @staticmethod
+    def parse_batch(items: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Parse many messages through the parser's /ingest/batch endpoint.
+
+        Args:
+            items: {"source": "SMS" | "EMAIL", "sender", "body", "subject" (email)}
+
+        Returns one parser response per item, in order (None where parsing
+        failed). Falls back to one call per message against a parser without
+        the batch endpoint.
+        """
+        responses: List[Optional[Dict[str, Any]]] = []
+        url = f"{settings.PARSER_SERVICE_URL}/ingest/batch"
+        for start in range(0, len(items), PARSER_BATCH_SIZE):
+            chunk = items[start:start + PARSER_BATCH_SIZE]
+            try:
+                response = get_parser_session().post(url, json={"items": chunk}, timeout=PARSER_BATCH_TIMEOUT)
+                if response.status_code in (404, 405):
+                    responses.extend(ExternalParserService._parse_one(item) for item in chunk)
+                    continue
+                results = response.json().get("results", []) if response.status_code == 200 else []
+                if len(results) != len(chunk):
+                    print(f"Error calling external parser batch: status {response.status_code}")
+                    results = [None] * len(chunk)
+                responses.extend(results)
+            except Exception as e:
+                print(f"Error calling external parser batch: {e}")
+                responses.extend([None] * len(chunk))
+        return responses
+
+    @staticmethod
+    def _parse_one(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if item["source"] == "SMS":
+            return ExternalParserService.parse_sms(item["sender"], item["body"])
+        return ExternalParserService.parse_email(item.get("subject") or "", item["body"], item["sender"])
+
     @staticmethod
     def sync_ai_config(api_key: str, model_name: str, is_enabled: bool):
         """
@@ -55,7 +127,7 @@ class ExternalParserService:
                 "model_name": model_name,
                 "is_enabled": is_enabled
             }
-            response = requests.post(url, json=payload, timeout=10)
+            response = get_parser_session().post(url, json=payload, timeout=10)
             return response.status_code == 200
         except Exception as e:
             print(f"Error syncing AI config: {e}")
@@ -79,7 +151,7 @@ class ExternalParserService:
             if password:
                 data['password'] = password
                 
-            response = requests.post(url, files=files, data=data, timeout=30)
+            response = get_parser_session().post(url, files=files, data=data, timeout=30)
             
             if response.status_code == 200:
                 return response.json()
@@ -99,7 +171,7 @@ class ExternalParserService:
             files = {'file': ('cas.pdf', file_content, 'application/pdf')}
             data = {'password': password}
             
-            response = requests.post(url, files=files, data=data, timeout=60)
+            response = get_parser_session().post(url, files=files, data=data, timeout=60)
             
             if response.status_code == 200:
                 return response.json() 
@@ -120,7 +192,7 @@ class ExternalParserService:
                 "regex_pattern": regex_pattern,
                 "mapping": mapping
             }
-            response = requests.post(url, json=payload, timeout=10)
+            response = get_parser_session().post(url, json=payload, timeout=10)
             return response.status_code == 200
         except Exception as e:
             print(f"Error creating pattern in external parser: {e}")
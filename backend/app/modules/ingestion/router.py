@@ -568,45 +568,34 @@ def import_csv(
 ):
     """
     Bulk import verified transactions.
+    The batch is deduplicated, categorized and inserted in one database transaction;
+    `results` carries the outcome of every row.
     """
-    success_count = 0
-    errors = []
+    from backend.app.modules.ingestion.bulk_import import BulkImportService
     
-    from datetime import datetime
-    
-    for idx, txn in enumerate(payload.transactions):
-        try:
-             # Convert to Finance Service format
-             # Note: Parser already returns negative amounts for DEBIT, positive for CREDIT
-             txn_create = finance_schemas.TransactionCreate(
-                 account_id=payload.account_id,
-                 amount=txn.amount,  # Use parsed amount as-is
-                 date=datetime.fromisoformat(txn.date),
-                 description=txn.description,
-                 recipient=txn.recipient,  # Extracted merchant/payee
-                 category="Uncategorized",
-                 tags=[],
-                 source=payload.source,
-                 external_id=txn.external_id or txn.ref_id
-             )
-             TransactionService.create_transaction(db, txn_create, str(current_user.tenant_id))
-             success_count += 1
-        except Exception as e:
-            errors.append(f"Row {idx+1}: {str(e)}")
+    tenant_id = str(current_user.tenant_id)
+    try:
+        outcome = BulkImportService.import_transactions(
+            db, tenant_id, payload.account_id,
+            [txn.model_dump() for txn in payload.transactions],
+            source=payload.source
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    success_count = outcome["imported"]
             
     IngestionService.log_event(
         db, 
-        str(current_user.tenant_id), 
+        tenant_id, 
         "bulk_import", 
         "success" if success_count > 0 else "failed",
         f"Imported {success_count} transactions from {payload.source}",
-        data={"source": payload.source, "success_count": success_count, "error_count": len(errors), "total": len(payload.transactions)}
+        data={"source": payload.source, "success_count": success_count, "duplicate_count": outcome["duplicates"], "error_count": len(outcome["errors"]), "total": len(payload.transactions)}
     )
 
     return {
         "status": "completed",
-        "imported": success_count,
-        "errors": errors
+        **outcome
     }
 
 # --- Triage Area ---
@@ -970,6 +959,14 @@ def list_ingestion_events(
         "skip": skip
     }
 
+@router.get("/dedup/filter-stats")
+def get_dedup_filter_stats(
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """Size and false-positive statistics of the tenant's duplicate-check filter."""
+    from backend.app.modules.ingestion.dedup_filter import DedupFilter
+    return DedupFilter.stats(str(current_user.tenant_id))
+
 class BulkDeleteEventsRequest(BaseModel):
     event_ids: List[str]
 
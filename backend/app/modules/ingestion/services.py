@@ -3,8 +3,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 import hashlib
 from typing import Optional, Dict, Any, List
+from backend.app.core.fingerprint import fingerprint
 from backend.app.modules.finance import models as finance_models
 from backend.app.modules.finance.services.transaction_service import TransactionService
+from backend.app.modules.finance.services.category_service import CategoryService
 from backend.app.modules.finance import schemas as finance_schemas
 from backend.app.modules.ingestion import models as ingestion_models
 from backend.app.modules.ingestion.base import ParsedTransaction
@@ -52,9 +54,9 @@ class IngestionService:
         return None
 
     @staticmethod
-    def process_transaction(db: Session, tenant_id: str, parsed: ParsedTransaction, extra_data: Optional[dict] = None):
+    def resolve_account(db: Session, tenant_id: str, parsed: ParsedTransaction) -> Optional[finance_models.Account]:
         """
-        Process a parsed transaction: match account, save transaction.
+        Match the parsed account mask to an account, creating an unverified one if none matches.
         """
         account = None
         if parsed.account_mask:
@@ -74,6 +76,62 @@ class IngestionService:
             db.add(account)
             db.commit()
             db.refresh(account)
+        return account
+
+    @staticmethod
+    def signed_amount(parsed: ParsedTransaction) -> float:
+        if parsed.type == "DEBIT":
+            return -abs(parsed.amount)
+        return abs(parsed.amount)
+
+    @staticmethod
+    def process_batch(db: Session, tenant_id: str, parsed_list: List[ParsedTransaction]) -> List[Dict[str, Any]]:
+        """
+        Process several parsed transactions (e.g. one email sync run).
+        Accounts are resolved once per mask and all items are deduplicated together
+        with TransactionDeduplicator.check_batch. Returns one result per item, in order.
+        """
+        from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator, DedupCandidate
+
+        accounts: Dict[Optional[str], Optional[finance_models.Account]] = {}
+        for parsed in parsed_list:
+            mask = parsed.account_mask[-4:] if parsed.account_mask else None
+            if mask not in accounts:
+                accounts[mask] = IngestionService.resolve_account(db, tenant_id, parsed)
+
+        items = {}
+        for i, parsed in enumerate(parsed_list):
+            account = accounts[parsed.account_mask[-4:] if parsed.account_mask else None]
+            if account:
+                items[i] = (account, DedupCandidate(
+                    str(account.id), IngestionService.signed_amount(parsed), parsed.date,
+                    parsed.description, parsed.recipient, parsed.ref_id
+                ))
+        duplicates = dict(zip(items, TransactionDeduplicator.check_batch(db, tenant_id, [c for _, c in items.values()])))
+
+        results = []
+        for i, parsed in enumerate(parsed_list):
+            if i not in items:
+                results.append({"status": "skipped", "reason": f"No account found and no mask in SMS"})
+                continue
+            try:
+                results.append(IngestionService.process_transaction(
+                    db, tenant_id, parsed, account=items[i][0], duplicate=duplicates[i]
+                ))
+            except Exception as e:
+                db.rollback()
+                results.append({"status": "error", "message": str(e)})
+        return results
+
+    @staticmethod
+    def process_transaction(db: Session, tenant_id: str, parsed: ParsedTransaction, extra_data: Optional[dict] = None,
+                            account: Optional[finance_models.Account] = None, duplicate: Optional[tuple] = None):
+        """
+        Process a parsed transaction: match account, save transaction.
+        `account` and `duplicate` (a TransactionDeduplicator result) are supplied by process_batch.
+        """
+        if account is None:
+            account = IngestionService.resolve_account(db, tenant_id, parsed)
             
         if not account:
              # Fallback if no mask was present in SMS at all
@@ -83,11 +141,7 @@ class IngestionService:
         # Create Transaction or Move to Triage
         
         # Determine amount sign
-        final_amount = parsed.amount
-        if parsed.type == "DEBIT":
-            final_amount = -abs(parsed.amount)
-        else:
-            final_amount = abs(parsed.amount)
+        final_amount = IngestionService.signed_amount(parsed)
 
         # --- DEDUPLICATION CHECK ---
         from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
@@ -95,7 +149,9 @@ class IngestionService:
             tenant_id, str(account.id), parsed.date, final_amount, parsed.description, parsed.recipient
         )
 
-        is_dup, reason, existing_id = TransactionDeduplicator.check_duplicate(db, tenant_id, parsed, str(account.id), final_amount)
+        if duplicate is None:
+            duplicate = TransactionDeduplicator.check_duplicate(db, tenant_id, parsed, str(account.id), final_amount)
+        is_dup, reason, existing_id = duplicate
         
         if is_dup:
             return {"status": "skipped", "reason": f"Deduplicated: {reason}", "deduplicated": True, "existing_id": existing_id}
@@ -112,9 +168,9 @@ class IngestionService:
         
         # 1. Try to detect internal transfer
         all_accounts = db.query(finance_models.Account).filter(finance_models.Account.tenant_id == tenant_id).all()
-        all_rules = db.query(finance_models.CategoryRule).filter(finance_models.CategoryRule.tenant_id == tenant_id).all()
+        rule_matcher = CategoryService.get_rule_matcher(db, tenant_id)
         
-        is_transfer, to_account_id = TransferDetector.detect(parsed.description, parsed.recipient, all_accounts, all_rules)
+        is_transfer, to_account_id = TransferDetector.detect(parsed.description, parsed.recipient, all_accounts, rule_matcher)
         
         # 2. Try to auto-categorize
         # Prioritize category from parser if available (e.g. from Learned Patterns)
@@ -152,7 +208,8 @@ class IngestionService:
                 exclude_from_reports=is_transfer
             )
             try:
-                db_txn = TransactionService.create_transaction(db, txn_create, tenant_id)
+                # Already checked above with the same fields
+                db_txn = TransactionService.create_transaction(db, txn_create, tenant_id, duplicate=duplicate)
                 return {"status": "success", "transaction_id": db_txn.id, "account": account.name}
             except Exception as e:
                 raise e
@@ -203,6 +260,7 @@ class IngestionService:
         # 2. Check if already exists to avoid spam
         existing = db.query(ingestion_models.UnparsedMessage).filter(
             ingestion_models.UnparsedMessage.tenant_id == tenant_id,
+            ingestion_models.UnparsedMessage.content_fingerprint == fingerprint(msg_hash),
             ingestion_models.UnparsedMessage.content_hash == msg_hash
         ).first()
         if existing: return
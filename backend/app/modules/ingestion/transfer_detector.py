@@ -1,7 +1,7 @@
-import json
 import re
 from typing import Optional, List
-from backend.app.modules.finance.models import CategoryRule, Account
+from backend.app.modules.finance.models import Account
+from backend.app.modules.finance.utils.rule_matcher import RuleMatcher
 
 class TransferDetector:
     """
@@ -9,9 +9,10 @@ class TransferDetector:
     """
     
     @staticmethod
-    def detect(description: Optional[str], recipient: Optional[str], accounts: List[Account], rules: List[CategoryRule] = None) -> (bool, Optional[str]):
+    def detect(description: Optional[str], recipient: Optional[str], accounts: List[Account], rules: Optional[RuleMatcher] = None) -> (bool, Optional[str]):
         """
         Analyzes description and recipient to find a destination account ID.
+        `rules` is the tenant's compiled rule matcher (CategoryService.get_rule_matcher).
         Returns (is_transfer, to_account_id).
         """
         if not description and not recipient:
@@ -21,11 +22,9 @@ class TransferDetector:
         
         # 0. Check Rules first (User defined/learned)
         if rules:
-            for rule in rules:
-                if not rule.is_transfer: continue
-                keywords = json.loads(rule.keywords)
-                if any(k.lower() in text for k in keywords):
-                    return True, rule.to_account_id
+            rule = rules.match_transfer(text)
+            if rule:
+                return True, rule.to_account_id
 
         # 1. Match by Account Mask (e.g., *1234 or XX1234)
         for acc in accounts:
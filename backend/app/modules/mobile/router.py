@@ -422,32 +422,31 @@ def get_mobile_dashboard(
     )
     
     # --- 1. Category Distribution (Pie Chart) ---
-    from sqlalchemy import func, or_
+    # Both charts read the daily transaction rollups for the month
+    from sqlalchemy import func
     from backend.app.modules.finance import models
+    from backend.app.modules.finance.services.transaction_rollup_service import TransactionRollupService
     
-    cat_query = db.query(
-        models.Transaction.category,
-        func.sum(models.Transaction.amount).label('total')
-    ).filter(
-        models.Transaction.tenant_id == str(current_user.tenant_id),
-        models.Transaction.amount < 0,
-        models.Transaction.is_transfer == False,
-        models.Transaction.exclude_from_reports == False,
-        models.Transaction.date >= start_date,
-        models.Transaction.date <= end_date
-    )
-    
-    if target_user_id:
-        cat_query = cat_query.join(
-            models.Account, models.Transaction.account_id == models.Account.id
+    rollup = models.TransactionRollup
+    def month_spending(*columns):
+        return TransactionRollupService.query(
+            db, str(current_user.tenant_id), *columns, user_id=target_user_id
         ).filter(
-            or_(models.Account.owner_id == target_user_id, models.Account.owner_id == None)
+            rollup.is_transfer == False,
+            rollup.exclude_from_reports == False,
+            rollup.day >= start_date.date(),
+            rollup.day <= end_date.date()
         )
     
-    cat_results = cat_query.group_by(models.Transaction.category).order_by(func.sum(models.Transaction.amount).asc()).all()
+    cat_results = month_spending(
+        rollup.category,
+        func.sum(rollup.debit_total).label('total')
+    ).group_by(rollup.category).having(
+        func.sum(rollup.debit_count) > 0
+    ).order_by(func.sum(rollup.debit_total).asc()).all()
     
     category_distribution = [
-        schemas.CategoryPieItem(name=cat[0], value=abs(float(cat[1])))
+        schemas.CategoryPieItem(name=cat[0] or "Uncategorized", value=abs(float(cat[1])))
         for cat in cat_results
     ]
     
@@ -455,26 +454,12 @@ def get_mobile_dashboard(
     total_budget = metrics["budget_health"]["limit"]
     daily_budget_limit = total_budget / last_day if total_budget > 0 else 0
     
-    trend_query = db.query(
-        func.date(models.Transaction.date).label('day'),
-        func.sum(models.Transaction.amount).label('total')
-    ).filter(
-        models.Transaction.tenant_id == str(current_user.tenant_id),
-        models.Transaction.amount < 0,
-        models.Transaction.is_transfer == False,
-        models.Transaction.exclude_from_reports == False,
-        models.Transaction.date >= start_date,
-        models.Transaction.date <= end_date
-    )
-    
-    if target_user_id:
-        trend_query = trend_query.join(
-            models.Account, models.Transaction.account_id == models.Account.id
-        ).filter(
-            or_(models.Account.owner_id == target_user_id, models.Account.owner_id == None)
-        )
-    
-    trend_results = trend_query.group_by(func.date(models.Transaction.date)).all()
+    trend_results = month_spending(
+        rollup.day,
+        func.sum(rollup.debit_total).label('total')
+    ).group_by(rollup.day).having(
+        func.sum(rollup.debit_count) > 0
+    ).all()
     trend_map = {str(row.day): abs(float(row.total)) for row in trend_results}
     
     spending_trend = []
@@ -633,6 +618,7 @@ def get_mobile_funds(
     
     # Fetch portfolio
     holdings = MutualFundService.get_portfolio(db, str(current_user.tenant_id), target_user_id)
+    xirr_values = MutualFundService.get_holdings_xirr(db, str(current_user.tenant_id), holdings)
     
     total_invested = 0.0
     total_current = 0.0
@@ -654,14 +640,14 @@ def get_mobile_funds(
             invested_value=inv,
             profit_loss=cur - inv,
             last_updated=h.get('last_updated', ''),
-            xirr=None # Individual XIRR requires expensive calc, skipping for list view
+            xirr=xirr_values["holdings"].get(h['id'])
         ))
         
     return {
         "total_invested": total_invested,
         "total_current": total_current,
         "total_pl": total_current - total_invested,
-        "xirr": None, # Global XIRR requires full logic
+        "xirr": xirr_values["portfolio"],
         "holdings": clean_holdings
     }
 
@@ -94,6 +94,7 @@ CREATE TABLE transactions (
 	tags VARCHAR, 
 	external_id VARCHAR, 
 	content_hash VARCHAR,
+	content_fingerprint BIGINT,
 	is_transfer BOOLEAN DEFAULT FALSE NOT NULL,
 	linked_transaction_id VARCHAR,
 	source VARCHAR NOT NULL DEFAULT 'MANUAL',
@@ -112,6 +113,8 @@ CREATE TABLE transactions (
 );
 CREATE INDEX ix_transactions_query ON transactions (tenant_id, account_id, date);
 CREATE INDEX ix_transactions_category ON transactions (tenant_id, category);
+CREATE INDEX ix_transactions_dedup ON transactions (tenant_id, account_id, amount, date);
+CREATE INDEX ix_transactions_content_fingerprint ON transactions (content_fingerprint);
 
 -- Expense Groups
 CREATE TABLE expense_groups (
@@ -190,6 +193,47 @@ CREATE TABLE mutual_funds_meta (
 	PRIMARY KEY (scheme_code)
 );
 
+CREATE TABLE mutual_fund_nav_history (
+	scheme_code VARCHAR NOT NULL, 
+	nav_date DATE NOT NULL, 
+	nav NUMERIC(15, 4) NOT NULL, 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	PRIMARY KEY (scheme_code, nav_date)
+);
+
+CREATE TABLE mutual_fund_scheme_aliases (
+	alias VARCHAR NOT NULL, 
+	scheme_code VARCHAR NOT NULL, 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	PRIMARY KEY (alias)
+);
+
+CREATE TABLE net_worth_snapshots (
+	tenant_id VARCHAR NOT NULL, 
+	scope VARCHAR NOT NULL, 
+	snapshot_date DATE NOT NULL, 
+	liquid NUMERIC(15, 2) NOT NULL, 
+	credit NUMERIC(15, 2) NOT NULL, 
+	loan NUMERIC(15, 2) NOT NULL, 
+	investments NUMERIC(15, 2) NOT NULL, 
+	total NUMERIC(15, 2) NOT NULL, 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	PRIMARY KEY (tenant_id, scope, snapshot_date)
+);
+
+CREATE TABLE transaction_rollups (
+	tenant_id VARCHAR NOT NULL, 
+	account_id VARCHAR NOT NULL, 
+	day DATE NOT NULL, 
+	category VARCHAR NOT NULL, 
+	is_transfer BOOLEAN NOT NULL, 
+	exclude_from_reports BOOLEAN NOT NULL, 
+	debit_total NUMERIC(15, 2) NOT NULL, 
+	debit_count INTEGER NOT NULL, 
+	credit_total NUMERIC(15, 2) NOT NULL, 
+	credit_count INTEGER NOT NULL, 
+	PRIMARY KEY (tenant_id, account_id, day, category, is_transfer, exclude_from_reports)
+);
 
 CREATE TABLE investment_goals (
 	id VARCHAR NOT NULL, 
@@ -274,6 +318,7 @@ CREATE TABLE portfolio_timeline_cache (
 	portfolio_hash VARCHAR NOT NULL, 
 	portfolio_value NUMERIC(15, 2) NOT NULL, 
 	invested_value NUMERIC(15, 2) NOT NULL, 
+	benchmark_value NUMERIC(15, 2), 
 	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
 	PRIMARY KEY (id), 
 	FOREIGN KEY(tenant_id) REFERENCES tenants (id)
@@ -325,6 +370,7 @@ CREATE TABLE pending_transactions (
 	source VARCHAR NOT NULL, 
 	raw_message VARCHAR, 
 	content_hash VARCHAR,
+	content_fingerprint BIGINT,
 	external_id VARCHAR, 
 	is_transfer BOOLEAN DEFAULT FALSE NOT NULL,
 	to_account_id VARCHAR,
@@ -341,6 +387,8 @@ CREATE TABLE pending_transactions (
 	FOREIGN KEY(expense_group_id) REFERENCES expense_groups (id)
 );
 CREATE INDEX ix_pending_txns_lookup ON pending_transactions (tenant_id, account_id);
+CREATE INDEX ix_pending_txns_dedup ON pending_transactions (tenant_id, account_id, amount, date);
+CREATE INDEX ix_pending_transactions_content_fingerprint ON pending_transactions (content_fingerprint);
 
 CREATE TABLE unparsed_messages (
 	id VARCHAR NOT NULL, 
@@ -348,12 +396,14 @@ CREATE TABLE unparsed_messages (
 	source VARCHAR NOT NULL, 
 	raw_content VARCHAR NOT NULL, 
 	content_hash VARCHAR,
+	content_fingerprint BIGINT,
 	subject VARCHAR, 
 	sender VARCHAR, 
 	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
 	PRIMARY KEY (id), 
 	FOREIGN KEY(tenant_id) REFERENCES tenants (id)
 );
+CREATE INDEX ix_unparsed_messages_content_fingerprint ON unparsed_messages (content_fingerprint);
 
 CREATE TABLE parsing_patterns (
 	id VARCHAR NOT NULL, 
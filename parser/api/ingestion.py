@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel
+from typing import Optional, Dict, Any, List, Literal
+from pydantic import BaseModel, Field
 import json
 import hashlib
 
 from parser.db.database import get_db
 from parser.core.pipeline import IngestionPipeline
-from parser.schemas.transaction import IngestionResult, ParsedItem, TransactionMeta
+from parser.schemas.transaction import IngestionResult, BatchIngestionResult, ParsedItem, TransactionMeta
 from parser.parsers.bank.hdfc import HdfcSmsParser, HdfcEmailParser
 from parser.parsers.bank.icici import IciciSmsParser, IciciEmailParser
 from parser.parsers.bank.sbi import SbiSmsParser, SbiEmailParser
@@ -34,6 +34,9 @@ ParserRegistry.register_email(SbiEmailParser())
 
 router = APIRouter(prefix="/v1/ingest", tags=["Ingestion"])
 
+# Messages accepted per /batch request
+MAX_BATCH_ITEMS = 500
+
 class SmsIngestRequest(BaseModel):
     sender: str
     body: str
@@ -45,6 +48,16 @@ class EmailIngestRequest(BaseModel):
     sender: str
     received_at: Optional[str] = None
 
+class BatchIngestItem(BaseModel):
+    source: Literal["SMS", "EMAIL"]
+    sender: str
+    body: str  # SMS text or email body
+    subject: Optional[str] = None  # EMAIL only
+    received_at: Optional[str] = None
+
+class BatchIngestRequest(BaseModel):
+    items: List[BatchIngestItem] = Field(..., max_length=MAX_BATCH_ITEMS)
+
 @router.post("/sms", response_model=IngestionResult)
 def ingest_sms(
     payload: SmsIngestRequest,
@@ -65,6 +78,27 @@ def ingest_email(
     result = pipeline.run(payload.body_text, "EMAIL", sender=payload.sender, subject=payload.subject)
     return result
 
+@router.post("/batch", response_model=BatchIngestionResult)
+def ingest_batch(
+    payload: BatchIngestRequest,
+    x_api_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Parse many SMS/email messages in one request; one result per item, in order."""
+    pipeline = IngestionPipeline(db)
+    results = []
+    for item in payload.items:
+        try:
+            if item.source == "SMS":
+                results.append(pipeline.run(item.body, "SMS", item.sender))
+            else:
+                results.append(pipeline.run(item.body, "EMAIL", sender=item.sender, subject=item.subject))
+        except Exception as e:
+            # One bad message must not fail the rest of the batch
+            db.rollback()
+            results.append(IngestionResult(status="failed", results=[], logs=[str(e)]))
+    return BatchIngestionResult(results=results)
+
 @router.post("/file", response_model=IngestionResult)
 async def ingest_file(
     file: UploadFile = File(...),
@@ -50,3 +50,6 @@ class IngestionResult(BaseModel):
     status: str
     results: List[ParsedItem]
     logs: Optional[List[str]] = []
+
+class BatchIngestionResult(BaseModel):
+    results: List[IngestionResult]
@@ -150,5 +150,38 @@ class TestParserMicroservice(unittest.TestCase):
         # Should succeed because it's just a CSV and password shouldn't break it
         self.assertEqual(resp.json()['status'], 'success')
 
+    def test_09_batch_ingest(self):
+        unique_id = str(uuid.uuid4())[:8]
+        payload = {
+            "items": [
+                {
+                    "source": "SMS",
+                    "sender": "HDFCBK",
+                    "body": f"Rs.1234.00 debited from a/c XX1234 on 13-01-26 to VPA IND*AMZN Pay India. Ref {unique_id}. Not you? Call 1800..."
+                },
+                {
+                    "source": "SMS",
+                    "sender": "TM-JIO",
+                    "body": f"Your plan expires tomorrow. Recharge now. {unique_id}"
+                },
+                {
+                    "source": "EMAIL",
+                    "sender": "alerts@example.com",
+                    "subject": "Newsletter",
+                    "body": f"Our latest offers for you. {unique_id}"
+                }
+            ]
+        }
+        resp = requests.post(f"{BASE_URL}/v1/ingest/batch", json=payload)
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()['results']
+
+        # One result per item, in request order
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['status'], 'success', f"Failed batch SMS: {results[0].get('logs')}")
+        self.assertEqual(float(results[0]['results'][0]['transaction']['amount']), 1234.00)
+        self.assertEqual(results[1]['status'], 'ignored')
+        self.assertEqual(results[2]['status'], 'ignored')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,121 @@
+"""
+Microbenchmark: same-day duplicate lookups on `transactions`.
+
+Compares `func.date(date) == day` with the range predicate from
+backend.app.core.date_filters.same_day, before and after creating the
+(tenant_id, account_id, amount, date) index, on a throwaway DuckDB file.
+
+Usage: python scripts/benchmark_dedup_date_filter.py [--rows 1000000] [--lookups 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+from backend.app.core.database import Base
+from backend.app.core.date_filters import same_day
+from backend.app.modules.finance.models import Transaction
+import backend.app.modules.auth.models  # noqa: F401 (tables referenced by foreign keys)
+import backend.app.modules.ingestion.models  # noqa: F401
+
+TENANTS = 20
+ACCOUNTS_PER_TENANT = 10
+
+
+def populate(db, rows: int) -> None:
+    db.execute(text("DROP INDEX IF EXISTS ix_transactions_dedup"))
+    db.execute(text(
+        "INSERT INTO tenants (id, name, created_at) "
+        f"SELECT 'tenant-' || i, 'Tenant ' || i, now() FROM range({TENANTS}) t(i)"
+    ))
+    # Roughly five years of history, inserted in date order like statement imports
+    db.execute(text(f"""
+        INSERT INTO transactions (id, tenant_id, account_id, type, amount, date, description,
+                                  category, is_transfer, source, exclude_from_reports, is_emi, created_at)
+        SELECT
+            'txn-' || i,
+            'tenant-' || (i % {TENANTS}),
+            'account-' || (i % {TENANTS}) || '-' || ((i // {TENANTS}) % {ACCOUNTS_PER_TENANT}),
+            CASE WHEN i % 5 = 0 THEN 'CREDIT' ELSE 'DEBIT' END,
+            CAST(CASE WHEN i % 5 = 0 THEN 1 ELSE -1 END * round(10 + random() * 5000, 2) AS DECIMAL(15, 2)),
+            TIMESTAMP '2021-01-01' + to_seconds(CAST(i * (157680000 / {rows}) AS BIGINT)),
+            'Merchant ' || (i % 997),
+            'Uncategorized', FALSE, 'BENCH', FALSE, FALSE, now()
+        FROM range({rows}) t(i)
+    """))
+    db.commit()
+
+
+def sample(db, lookups: int):
+    rows = db.query(Transaction.tenant_id, Transaction.account_id, Transaction.amount, Transaction.date).order_by(
+        func.random()
+    ).limit(lookups).all()
+    return [tuple(r) for r in rows]
+
+
+def run(db, probes, predicate) -> list:
+    timings = []
+    for tenant_id, account_id, amount, day in probes:
+        start = time.perf_counter()
+        db.query(Transaction.id).filter(
+            Transaction.tenant_id == tenant_id,
+            Transaction.account_id == account_id,
+            Transaction.amount == amount,
+            predicate(day)
+        ).first()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: list) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<42} mean {statistics.mean(timings):7.2f} ms   p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"duckdb:///{os.path.join(tmp, 'bench.duckdb')}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        populate(db, args.rows)
+        print(f"Generated {args.rows:,} transactions in {time.perf_counter() - start:.1f}s")
+        probes = sample(db, args.lookups)
+
+        func_date = lambda day: func.date(Transaction.date) == day.date()
+        range_day = lambda day: same_day(Transaction.date, day)
+
+        # Warm up the buffer pool so both variants read from memory
+        run(db, probes[:20], func_date)
+        report("func.date(date) == day", run(db, probes, func_date))
+        report("date range", run(db, probes, range_day))
+
+        start = time.perf_counter()
+        db.execute(text("CREATE INDEX ix_transactions_dedup ON transactions (tenant_id, account_id, amount, date)"))
+        db.commit()
+        print(f"Created ix_transactions_dedup in {time.perf_counter() - start:.1f}s")
+        report("func.date(date) == day + index", run(db, probes, func_date))
+        report("date range + index", run(db, probes, range_day))
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()